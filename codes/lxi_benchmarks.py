@@ -0,0 +1,609 @@
+import contextlib
+import datetime
+import glob
+import importlib
+import json
+import logging
+import os
+import platform
+import shutil
+import time
+import tracemalloc
+from pathlib import Path
+
+import matplotlib as mpl
+
+# Render the plots on an Agg canvas, without a display
+mpl.use("Agg")
+
+import global_variables  # noqa: E402
+import lxi_file_read_funcs as lxrf  # noqa: E402
+import lxi_gui_plot_routines as lgpr  # noqa: E402
+import lxi_synthetic_data as lsd  # noqa: E402
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from tabulate import tabulate  # noqa: E402
+
+importlib.reload(lxrf)
+importlib.reload(lgpr)
+importlib.reload(lsd)
+
+global_variables.init()
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+formatter = logging.Formatter("%(asctime)s:%(name)s:%(message)s")
+
+# Check if the log folder exists. If not, create it
+Path("../log").mkdir(parents=True, exist_ok=True)
+
+file_handler = logging.FileHandler("../log/lxi_benchmarks.log")
+file_handler.setFormatter(formatter)
+
+logger.addHandler(file_handler)
+
+# Folder of the bundled sample datasets, and the folder the benchmark results are saved in
+sample_folder = "../git_data/sample_datasets/"
+benchmark_folder = "../benchmarks"
+
+# Version of the layout of the results, saved with them
+benchmark_version = 1
+
+
+def time_stage(func=None, n_events=None, repeat=3, setup=None):
+    """
+    Times a stage of the pipeline. The stage is run repeat times and the shortest wall time is
+    kept, as the other runs are slowed down by whatever else the computer is doing. It is then
+    run once more with tracemalloc tracing to get its peak memory, as tracing slows it down. What
+    the stage prints is not shown.
+
+    Parameters
+    ----------
+    func : callable
+        The stage, a function without arguments. Default is None.
+    n_events : int or callable
+        Number of events the stage goes through, or a function which gets it from what the stage
+        returns. Default is None.
+    repeat : int
+        Number of timed runs. Default is 3.
+    setup : callable
+        A function without arguments which is run, untimed, before each run of the stage, e.g. to
+        remove what the previous run left behind so that each run starts cold. Default is None.
+
+    Returns
+    -------
+    record : dict
+        The wall times of the runs, the shortest one, the peak memory in bytes, the number of
+        events and the events per second. If the stage fails, the error instead.
+    result :
+        What the stage returned in its last run, or None if it failed.
+    """
+    wall_times = []
+    is_tracing = tracemalloc.is_tracing()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for _ in range(repeat):
+                if setup is not None:
+                    setup()
+                start_time = time.perf_counter()
+                result = func()
+                wall_times.append(time.perf_counter() - start_time)
+            del result
+
+            if setup is not None:
+                setup()
+            if not is_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            result = func()
+            peak_memory = tracemalloc.get_traced_memory()[1]
+            if not is_tracing:
+                tracemalloc.stop()
+    except Exception as error:
+        if tracemalloc.is_tracing() and not is_tracing:
+            tracemalloc.stop()
+        logger.exception("The stage failed")
+        return {"error": repr(error)}, None
+
+    if callable(n_events):
+        n_events = n_events(result)
+    wall_time = min(wall_times)
+    record = {
+        "wall_time": wall_time,
+        "wall_times": wall_times,
+        "peak_memory": peak_memory,
+        "n_events": n_events,
+        "events_per_second": n_events / wall_time if n_events and wall_time > 0 else None,
+    }
+    return record, result
+
+
+def prepare_datasets(
+    work_folder=None, n_synthetic_files=2, n_synthetic_packets=2**20, seed=0
+):
+    """
+    Prepares the datasets the benchmarks are run on, in the "raw" folder of work_folder so that
+    the L0 and L1a files written by the stages go to work_folder too: a copy of the bundled sample
+    datasets, and large synthetic files written by lxi_synthetic_data. The synthetic files are the
+    same for the same seed, so the benchmarks of different versions of the code can be compared.
+
+    Parameters
+    ----------
+    work_folder : str
+        The folder. Default is None.
+    n_synthetic_files : int
+        Number of synthetic files. Default is 2.
+    n_synthetic_packets : int
+        Number of packets in each synthetic file. Default is 2**20.
+    seed : int
+        Seed of the synthetic files. Default is 0.
+
+    Returns
+    -------
+    datasets : dict
+        The folder of each dataset, with a trailing slash.
+    """
+    datasets = {}
+
+    sample_copy = os.path.join(work_folder, "raw", "sample_datasets") + "/"
+    Path(sample_copy).mkdir(parents=True, exist_ok=True)
+    for file_name in sorted(glob.glob(os.path.join(sample_folder, "payload_lexi_*.dat"))):
+        shutil.copy2(file_name, sample_copy)
+    datasets["sample"] = sample_copy
+
+    if n_synthetic_files > 0:
+        synthetic_folder = os.path.join(work_folder, "raw", "synthetic_datasets") + "/"
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            lsd.write_synthetic_folder(
+                folder_name=synthetic_folder,
+                n_files=n_synthetic_files,
+                n_packets=n_synthetic_packets,
+                seed=seed,
+            )
+        datasets["synthetic"] = synthetic_folder
+
+    return datasets
+
+
+def benchmark_dataset(folder_name=None, repeat=3):
+    """
+    Runs each stage of the pipeline on a dataset and times it, see time_stage. The stages are
+    - read_binary_data_sci and read_binary_data_hk, on each file of the folder,
+    - read_binary_file, on the largest file of the folder and on the whole folder. Each run on the
+      whole folder starts without its L0 folder and file index, so that every run copies the
+      files to L0 and indexes them, as the first load of a folder does,
+    - read_csv_sci, on the L1a science file of the largest file,
+    - compute_position and non_lin_correction, on all the science data of the folder,
+    - non_lin_correction_grid, the same with the grid of the model (see lxrf.get_gp_grid), whose
+      accuracy (see lxrf.check_gp_grid) is added to the record of the stage,
+    - plot_data_class.hist_plots and plot_data_class.ts_plots, drawn on an Agg canvas.
+
+    Parameters
+    ----------
+    folder_name : str
+        The folder of the dataset. Default is None.
+    repeat : int
+        Number of timed runs of each stage. Default is 3.
+
+    Returns
+    -------
+    stages : dict
+        The record of each stage, see time_stage.
+    """
+    file_list = sorted(glob.glob(os.path.join(folder_name, "payload_lexi_*.dat")))
+    largest_file = max(file_list, key=os.path.getsize)
+    stages = {}
+
+    stages["read_binary_data_sci"], _ = time_stage(
+        func=lambda: [lxrf.read_binary_data_sci(in_file_name=f)[0] for f in file_list],
+        n_events=lambda dfs: sum(len(df) for df in dfs),
+        repeat=repeat,
+    )
+    stages["read_binary_data_hk"], _ = time_stage(
+        func=lambda: [lxrf.read_binary_data_hk(in_file_name=f)[0] for f in file_list],
+        n_events=lambda dfs: sum(len(df) for df in dfs),
+        repeat=repeat,
+    )
+    stages["read_binary_file_single"], _ = time_stage(
+        func=lambda: lxrf.read_binary_file(file_val=largest_file),
+        n_events=lambda result: len(result[5]) + len(result[4]),
+        repeat=repeat,
+    )
+
+    # The L0 folder of the dataset, and a file index folder of its own in the work folder, which
+    # are removed before each run of read_binary_file_multiple
+    l0_folder = lxrf.get_l0_folder_name(in_file_name=largest_file)
+    index_folder = os.path.join(
+        Path(folder_name).parent.parent, "file_index", Path(folder_name).name
+    )
+
+    def cold_start():
+        shutil.rmtree(l0_folder, ignore_errors=True)
+        shutil.rmtree(index_folder, ignore_errors=True)
+
+    file_index_folder = lxrf.file_index_folder
+    lxrf.file_index_folder = index_folder
+    try:
+        stages["read_binary_file_multiple"], result = time_stage(
+            func=lambda: lxrf.read_binary_file(file_val=folder_name, multiple_files=True),
+            n_events=lambda result: len(result[5]) + len(result[4]),
+            repeat=repeat,
+            setup=cold_start,
+        )
+    finally:
+        lxrf.file_index_folder = file_index_folder
+    if result is None:
+        return stages
+    df_hk = result[4]
+    df_sci = result[5]
+
+    csv_file_name = lxrf.get_l1a_file_name(in_file_name=largest_file, data_type="sci")
+    stages["read_csv_sci"], _ = time_stage(
+        func=lambda: lxrf.read_csv_sci(file_val=csv_file_name),
+        n_events=lambda result: len(result[0]),
+        repeat=repeat,
+    )
+
+    v1 = df_sci["Channel1"].values
+    v3 = df_sci["Channel3"].values
+    stages["compute_position"], _ = time_stage(
+        func=lambda: lxrf.compute_position(v1=v1, v2=v3),
+        n_events=len(df_sci),
+        repeat=repeat,
+    )
+    stages["non_lin_correction"], _ = time_stage(
+        func=lambda: lxrf.non_lin_correction(
+            df_sci["x_mcp_lin"].values, df_sci["y_mcp_lin"].values
+        ),
+        n_events=len(df_sci),
+        repeat=repeat,
+    )
+    stages["non_lin_correction_grid"], _ = time_stage(
+        func=lambda: lxrf.non_lin_correction(
+            df_sci["x_mcp_lin"].values, df_sci["y_mcp_lin"].values, use_grid=True
+        ),
+        n_events=len(df_sci),
+        repeat=repeat,
+    )
+    if "error" not in stages["non_lin_correction_grid"]:
+        stages["non_lin_correction_grid"]["accuracy"] = lxrf.check_gp_grid(
+            x=df_sci["x_mcp_lin"].values, y=df_sci["y_mcp_lin"].values
+        )
+
+    start_time = df_sci.index.min().strftime("%Y-%m-%d %H:%M:%S")
+    end_time = df_sci.index.max().strftime("%Y-%m-%d %H:%M:%S")
+
+    def hist_plots():
+        fig = lgpr.plot_data_class(
+            df_slice_sci=df_sci,
+            start_time=start_time,
+            end_time=end_time,
+            bins=50,
+            cmin=1,
+            cmax=1e6,
+            x_min=0,
+            x_max=1,
+            y_min=0,
+            y_max=1,
+            density=False,
+            norm="log",
+            unit="volt",
+            hist_fig_height=5,
+            hist_fig_width=5,
+            v_min=0,
+            v_max=4,
+            v_sum_min=0,
+            v_sum_max=16,
+            cut_status_var=False,
+            crv_fit=False,
+            lin_corr=False,
+            non_lin_corr=False,
+            cmap="viridis",
+            use_fig_size=True,
+            dark_mode=False,
+        ).hist_plots()
+        fig.canvas.draw()
+        plt.close(fig)
+
+    # The housekeeping channel which goes through ts_plots. HK_id has no outliers, which
+    # ts_plots can't plot when the data has several rows at the same time.
+    def ts_plots():
+        fig = lgpr.plot_data_class(
+            df_slice_hk=df_hk,
+            plot_key="HK_id",
+            start_time=start_time,
+            end_time=end_time,
+            ts_fig_height=3,
+            ts_fig_width=6,
+            dark_mode=False,
+            hv_status=False,
+            display_time_label=True,
+        ).ts_plots()
+        fig.canvas.draw()
+        plt.close(fig)
+
+    stages["hist_plots"], _ = time_stage(func=hist_plots, n_events=len(df_sci), repeat=repeat)
+    stages["ts_plots"], _ = time_stage(func=ts_plots, n_events=len(df_hk), repeat=repeat)
+
+    return stages
+
+
+def run_benchmarks(
+    work_folder=None, n_synthetic_files=2, n_synthetic_packets=2**20, seed=0, repeat=3
+):
+    """
+    Runs the benchmarks on the bundled sample datasets and on large synthetic files, see
+    prepare_datasets and benchmark_dataset.
+
+    Parameters
+    ----------
+    work_folder : str
+        The folder the datasets are prepared in. If None, a "work" folder in the benchmark folder
+        is used, and removed at the end. Default is None.
+    n_synthetic_files : int
+        Number of synthetic files. Default is 2.
+    n_synthetic_packets : int
+        Number of packets in each synthetic file. Default is 2**20.
+    seed : int
+        Seed of the synthetic files. Default is 0.
+    repeat : int
+        Number of timed runs of each stage. Default is 3.
+
+    Returns
+    -------
+    results : dict
+        The record of each stage of each dataset, under "<dataset>/<stage>", along with the
+        versions of python and of the packages and the settings of the benchmarks.
+    """
+    remove_work_folder = work_folder is None
+    if work_folder is None:
+        work_folder = os.path.join(benchmark_folder, "work")
+
+    results = {
+        "version": benchmark_version,
+        "date": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "matplotlib": mpl.__version__,
+        "settings": {
+            "n_synthetic_files": n_synthetic_files,
+            "n_synthetic_packets": n_synthetic_packets,
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "stages": {},
+    }
+
+    try:
+        datasets = prepare_datasets(
+            work_folder=work_folder,
+            n_synthetic_files=n_synthetic_files,
+            n_synthetic_packets=n_synthetic_packets,
+            seed=seed,
+        )
+        for dataset, folder_name in datasets.items():
+            print(f"\n Benchmarking the \x1b[1;36;255m {dataset} \x1b[0m dataset")
+            stages = benchmark_dataset(folder_name=folder_name, repeat=repeat)
+            for stage, record in stages.items():
+                results["stages"][f"{dataset}/{stage}"] = record
+                logger.info(f"Benchmark of {dataset}/{stage}: {record}")
+    finally:
+        lxrf.wait_for_l1a_files()
+        lxrf.wait_for_l0_files()
+        if remove_work_folder:
+            shutil.rmtree(work_folder, ignore_errors=True)
+
+    print_benchmarks(results)
+    return results
+
+
+def print_benchmarks(results=None):
+    """
+    Prints the wall time, events per second and peak memory of each stage in a table.
+
+    Parameters
+    ----------
+    results : dict
+        The results of the benchmarks, see run_benchmarks. Default is None.
+
+    Returns
+    -------
+    None
+    """
+    table = []
+    for stage, record in results["stages"].items():
+        if "error" in record:
+            table.append([stage, "failed", "", "", record["error"]])
+            continue
+        events_per_second = record["events_per_second"]
+        table.append(
+            [
+                stage,
+                f"{record['wall_time']:.3f}",
+                record["n_events"],
+                f"{events_per_second:.0f}" if events_per_second else "",
+                f"{record['peak_memory'] / 2**20:.1f}",
+            ]
+        )
+    print(
+        tabulate(
+            table,
+            headers=["Stage", "Wall time (s)", "Events", "Events/s", "Peak memory (MiB)"],
+            tablefmt="fancy_grid",
+            floatfmt=".3f",
+            numalign="center",
+        )
+    )
+    for stage, record in results["stages"].items():
+        if "accuracy" in record:
+            accuracy = record["accuracy"]
+            print(
+                f"Accuracy of {stage}: largest error \x1b[1;32;255m "
+                f"{accuracy['max_error']:.2e} \x1b[0m, rms error {accuracy['rms_error']:.2e}, "
+                f"{100 * accuracy['outside_fraction']:.2f} % of the events outside of the grid"
+            )
+
+
+def save_benchmarks(results=None, file_name=None):
+    """
+    Saves the results of the benchmarks to a json file.
+
+    Parameters
+    ----------
+    results : dict
+        The results of the benchmarks, see run_benchmarks. Default is None.
+    file_name : str
+        Name of the json file. If None, the file is named after the date of the results in the
+        benchmark folder. Default is None.
+
+    Returns
+    -------
+    file_name : str
+        Name of the json file.
+    """
+    if file_name is None:
+        date = datetime.datetime.fromisoformat(results["date"]).strftime("%Y%m%d_%H%M%S")
+        file_name = os.path.join(benchmark_folder, f"benchmark_{date}.json")
+
+    Path(file_name).parent.mkdir(parents=True, exist_ok=True)
+    with open(file_name, "w") as file:
+        json.dump(results, file, indent=2)
+
+    print(f"\n Saved the benchmarks to \x1b[1;32;255m {file_name} \x1b[0m")
+    logger.info(f"Saved the benchmarks to {file_name}")
+    return file_name
+
+
+def load_benchmarks(file_name=None):
+    """
+    Loads the results of the benchmarks from a json file.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the json file. Default is None.
+
+    Raises
+    ------
+    ValueError :
+        If the results were saved with a different version of the layout.
+
+    Returns
+    -------
+    results : dict
+        The results of the benchmarks, see run_benchmarks.
+    """
+    with open(file_name) as file:
+        results = json.load(file)
+
+    if results.get("version") != benchmark_version:
+        raise ValueError(
+            f"The benchmarks in {file_name} have version {results.get('version')}, "
+            f"expected {benchmark_version}."
+        )
+    return results
+
+
+def compare_benchmarks(results=None, baseline=None, threshold=0.25):
+    """
+    Compares the results of the benchmarks with a baseline, e.g. the results of the previous
+    version of the code, and flags the stages which got slower or use more memory than the
+    baseline by more than the threshold. The stages which failed, and didn't in the baseline, are
+    flagged too.
+
+    Parameters
+    ----------
+    results : dict
+        The results of the benchmarks, see run_benchmarks. Default is None.
+    baseline : dict or str
+        The baseline results, or the name of their json file. Default is None.
+    threshold : float
+        The relative increase of the wall time or the peak memory which is flagged. Default is
+        0.25.
+
+    Returns
+    -------
+    regressions : list
+        The flagged stages.
+    """
+    if isinstance(baseline, str):
+        baseline = load_benchmarks(file_name=baseline)
+
+    if baseline["settings"] != results["settings"]:
+        print(
+            "\n \x1b[1;31;255m WARNING: The benchmarks were run with different settings "
+            f"({baseline['settings']} and {results['settings']}) \x1b[0m"
+        )
+
+    table = []
+    regressions = []
+    for stage, record in results["stages"].items():
+        base_record = baseline["stages"].get(stage)
+        if "error" in record:
+            # A stage which failed in the baseline too, e.g. for want of a model file, is not a
+            # regression
+            if base_record is not None and "error" not in base_record:
+                regressions.append(stage)
+            table.append([stage, "", "", "", "", "\x1b[1;31;255m failed \x1b[0m"])
+            continue
+        if base_record is None or "error" in base_record:
+            table.append([stage, "", "", "", "", "new"])
+            continue
+
+        time_ratio = record["wall_time"] / base_record["wall_time"]
+        memory_ratio = record["peak_memory"] / max(base_record["peak_memory"], 1)
+        is_regression = time_ratio > 1 + threshold or memory_ratio > 1 + threshold
+        if is_regression:
+            regressions.append(stage)
+            status = "\x1b[1;31;255m regression \x1b[0m"
+        elif time_ratio < 1 - threshold:
+            status = "\x1b[1;32;255m faster \x1b[0m"
+        else:
+            status = "ok"
+        table.append(
+            [
+                stage,
+                base_record["wall_time"],
+                record["wall_time"],
+                time_ratio,
+                memory_ratio,
+                status,
+            ]
+        )
+
+    print(
+        tabulate(
+            table,
+            headers=[
+                "Stage",
+                "Baseline time (s)",
+                "Time (s)",
+                "Time ratio",
+                "Memory ratio",
+                "Status",
+            ],
+            tablefmt="fancy_grid",
+            floatfmt=".3f",
+            numalign="center",
+        )
+    )
+    if regressions:
+        logger.warning(f"Regressions against the baseline: {regressions}")
+    return regressions
+
+
+if __name__ == "__main__":
+    # Run the benchmarks and compare them with the baseline, if there is one, else save them as
+    # the baseline
+    baseline_file_name = os.path.join(benchmark_folder, "baseline.json")
+
+    results = run_benchmarks(n_synthetic_files=2, n_synthetic_packets=2**20, seed=0, repeat=3)
+    save_benchmarks(results=results)
+    if Path(baseline_file_name).is_file():
+        compare_benchmarks(results=results, baseline=baseline_file_name, threshold=0.25)
+    else:
+        save_benchmarks(results=results, file_name=baseline_file_name)
@@ -0,0 +1,262 @@
+import contextlib
+import importlib
+import logging
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import lxi_file_read_funcs as lxrf
+import lxi_synthetic_data as lsd
+import numpy as np
+from tabulate import tabulate
+
+importlib.reload(lxrf)
+importlib.reload(lsd)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+formatter = logging.Formatter("%(asctime)s:%(name)s:%(message)s")
+
+# Check if the log folder exists. If not, create it
+Path("../log").mkdir(parents=True, exist_ok=True)
+
+file_handler = logging.FileHandler("../log/lxi_decoder_regression.log")
+file_handler.setFormatter(formatter)
+
+logger.addHandler(file_handler)
+
+# The synthetic PIT files the decoders are compared on: one with each kind of misaligned packet
+# only, and one with all of them. The rates are the fractions of the packets which are slipped
+# and which have the first 3, 2 and 1 bytes of sync_lxi at the end of the previous frame, see
+# lxi_synthetic_data.add_misalignments.
+regression_cases = {
+    "clean": {"slip_rate": 0.0, "split_rates": (0.0, 0.0, 0.0)},
+    "slip": {"slip_rate": 0.02, "split_rates": (0.0, 0.0, 0.0)},
+    "split_3": {"slip_rate": 0.0, "split_rates": (0.02, 0.0, 0.0)},
+    "split_2": {"slip_rate": 0.0, "split_rates": (0.0, 0.02, 0.0)},
+    "split_1": {"slip_rate": 0.0, "split_rates": (0.0, 0.0, 0.02)},
+    "all": {"slip_rate": 0.01, "split_rates": (0.01, 0.01, 0.01)},
+}
+
+# Number of zero bytes added at the end of each file. The per-frame decoder never reads the last
+# frame of a file, nor repairs a frame in the last 44 bytes, so two frames without the PIT sync
+# word, which neither decoder keeps, are added for it to read all the frames of the file.
+regression_padding = 2 * 28
+
+# Time in seconds added to the PIT time stamp of each frame for each frame before it. The
+# synthetic files give both frames of a misaligned packet the time of the packet, so without it
+# the science packets would be the same whichever frame the PIT header is taken from.
+regression_frame_step = 1e-3
+
+
+def find_pit_frames_per_frame(raw=None, header_from_next=False):
+    """
+    Finds the PIT frames of a file one frame at a time, the way the science and housekeeping
+    readers did before the frames were found in bulk (see lxi_file_read_funcs.find_pit_frames).
+    It is kept as the reference the bulk decoder is checked against, and is not meant to be fast.
+
+    Parameters
+    ----------
+    raw : bytes
+        The raw data of the file. Default is None.
+    header_from_next : bool
+        If True, the PIT header of a frame whose LEXI packet runs into the next frame is taken from
+        the next frame, as the science reader did. Else the header of the frame itself is kept, as
+        the housekeeping reader did. Default is False.
+
+    Returns
+    -------
+    frames : list
+        The 28 bytes of each frame, repaired if needed, in the order they are in the file.
+    """
+    sync_pit = lxrf.sync_pit
+    sync_lxi = lxrf.sync_lxi
+    index = 0
+    frames = []
+    while index < len(raw) - 28:
+        if raw[index:index + 2] == sync_pit and raw[index + 12:index + 16] == sync_lxi:
+            frames.append(raw[index:index + 28])
+        elif raw[index:index + 2] == sync_pit:
+            # Ignore the last packet
+            if index >= len(raw) - 28 - 16:
+                index += 28
+                continue
+            # Check if sync_lxi is present in the next 16 bytes
+            if sync_lxi in raw[index + 12:index + 28] and index + 28 < len(raw):
+                index_sync = index + 12 + raw[index + 12:index + 28].index(sync_lxi)
+                header = raw[index + 28:index + 40] if header_from_next else raw[index:index + 12]
+                frames.append(
+                    header + raw[index_sync:index + 28] + raw[index + 40:index_sync + 28]
+                )
+            # Check if the first 3, 2 or 1 bytes of sync_lxi are at the end of the previous frame.
+            # NOTE: The old readers took the rest of the LEXI packet from index + 13 and index + 14
+            # for the 2 and 1 byte cases, which gave frames of 27 and 26 bytes that
+            # struct.unpack couldn't decode. Here the rest is taken from index + 12, as for the 3
+            # byte case and as find_pit_frames does.
+            else:
+                for n_bytes in (3, 2, 1):
+                    if raw[index - n_bytes:index] + raw[index + 12:index + 16 - n_bytes] == sync_lxi:
+                        frames.append(
+                            raw[index:index + 12] + raw[index - n_bytes:index]
+                            + raw[index + 12:index + 28 - n_bytes]
+                        )
+                        break
+        index += 28
+
+    return frames
+
+
+def check_pit_file(file_name=None, chunk_size=None):
+    """
+    Decodes a PIT file with lxi_file_read_funcs.read_binary_data and with the per-frame decoder
+    (see find_pit_frames_per_frame and the packet classes sci_packet_cls and hk_packet_cls), and
+    checks that both give exactly the same packets.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the PIT file. Default is None.
+    chunk_size : int
+        If given, read_binary_data decodes the file this many bytes at a time. Default is None.
+
+    Raises
+    ------
+    AssertionError :
+        If the packets aren't the same.
+
+    Returns
+    -------
+    stats : dict
+        The decoder statistics of the file, see lxi_file_read_funcs.new_decode_stats.
+    """
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        packets_sci, packets_hk, stats = lxrf.read_binary_data(
+            in_file_name=file_name, chunk_size=chunk_size, return_stats=True
+        )
+
+    with open(file_name, "rb") as file:
+        raw = file.read()
+    # The science reader kept the frames without the housekeeping bit of the time stamp word, and
+    # the housekeeping reader the ones hk_packet_cls could decode
+    reference_sci = [
+        lxrf.sci_packet_cls.from_bytes(frame)
+        for frame in find_pit_frames_per_frame(raw=raw, header_from_next=True)
+        if not frame[16] & 0x80
+    ]
+    reference_hk = [
+        packet for packet in (
+            lxrf.hk_packet_cls.from_bytes(frame)
+            for frame in find_pit_frames_per_frame(raw=raw, header_from_next=False)
+        )
+        if packet is not None
+    ]
+
+    for name, packets, reference in (
+        ("science", packets_sci, reference_sci),
+        ("housekeeping", packets_hk, reference_hk),
+    ):
+        assert len(packets) == len(reference), (
+            f"{file_name}: {len(packets)} {name} packets instead of {len(reference)}"
+        )
+        for field in reference[0]._fields if reference else []:
+            values = packets[field]
+            reference_values = [getattr(packet, field) for packet in reference]
+            mismatch = [
+                ii for ii, (value, reference_value) in enumerate(zip(values, reference_values))
+                if value != reference_value
+            ]
+            assert not mismatch, (
+                f"{file_name}: {len(mismatch)} {name} packets have a different {field}, the "
+                f"first one is packet {mismatch[0]}"
+            )
+
+    return stats
+
+
+def run_regression(n_packets=2**15, seed=0, chunk_size=2**14):
+    """
+    Checks the bulk PIT frame decoder against the per-frame decoder on synthetic PIT files with
+    each kind of misaligned packets (see regression_cases), decoded whole and in chunks. The
+    number of repaired frames of each kind is checked against the number of misaligned packets
+    the files were written with too.
+
+    Parameters
+    ----------
+    n_packets : int
+        Number of packets of each file. Default is 2**15.
+    seed : int
+        Seed of the synthetic files. Default is 0.
+    chunk_size : int
+        Size of the chunks the files are decoded in, in bytes. Default is 2**14.
+
+    Raises
+    ------
+    AssertionError :
+        If the decoders don't give the same packets, or the repaired frames don't add up.
+
+    Returns
+    -------
+    table : list
+        The number of packets of each kind and of repaired frames of each kind for each file.
+    """
+    table = []
+    with tempfile.TemporaryDirectory() as folder_name:
+        for case, rates in regression_cases.items():
+            file_name = os.path.join(folder_name, f"payload_lexi_regression_{case}.dat")
+            summary = lsd.write_pit_file(
+                file_name=file_name, n_packets=n_packets, seed=seed, **rates
+            )
+            frames = np.memmap(file_name, dtype=lxrf.pit_frame_dtype, mode="r+")
+            frames["Date"] += regression_frame_step * np.arange(len(frames))
+            frames.flush()
+            del frames
+            with open(file_name, "ab") as file:
+                file.write(bytes(regression_padding))
+
+            for mode, mode_chunk_size in (("whole", None), ("chunks", chunk_size)):
+                stats = check_pit_file(file_name=file_name, chunk_size=mode_chunk_size)
+                for counter, expected in (
+                    ("n_repaired_slip", summary["n_slipped"]),
+                    ("n_repaired_split_3", summary["n_split_3"]),
+                    ("n_repaired_split_2", summary["n_split_2"]),
+                    ("n_repaired_split_1", summary["n_split_1"]),
+                ):
+                    assert stats[counter] == expected, (
+                        f"{case} ({mode}): {stats[counter]} frames counted in {counter} instead "
+                        f"of {expected}"
+                    )
+                table.append(
+                    [
+                        case,
+                        mode,
+                        stats["n_sci"],
+                        stats["n_hk"],
+                        f"{stats['n_repaired_slip']}/{stats['n_repaired_split_3']}/"
+                        f"{stats['n_repaired_split_2']}/{stats['n_repaired_split_1']}",
+                        "ok",
+                    ]
+                )
+                logger.info(f"The decoders agree on the {case} file ({mode}): {stats}")
+
+    return table
+
+
+if __name__ == "__main__":
+    try:
+        table = run_regression(n_packets=2**15, seed=0, chunk_size=2**14)
+    except AssertionError as e:
+        logger.error(f"The decoders don't agree: {e}")
+        print(f"\n\033[91m The decoders don't agree: {e}\033[00m\n")
+        sys.exit(1)
+
+    print(
+        tabulate(
+            table,
+            headers=["File", "Decoded", "Science", "Housekeeping", "Repaired (slip/3/2/1)", ""],
+            tablefmt="fancy_grid",
+            numalign="center",
+        )
+    )
+    print("\n\033[92m The bulk and the per-frame decoders give the same packets\033[00m\n")
@@ -1,11 +1,19 @@
-import csv
+import concurrent.futures
+import contextlib
 import datetime
+import functools
+import hashlib
 import importlib
+import json
+import mmap
 import os
 import platform
 import logging
 import shutil
 import struct
+import threading
+import time
+import tracemalloc
 from pathlib import Path
 from tkinter import filedialog
 from typing import NamedTuple
@@ -49,6 +57,174 @@ sync_pit = b"\x54\x53"
 
 volts_per_count = 4.5126 / 65536  # volts per increment of digitization
 
+# Sync words as integers, for comparing against the fields of the structured frame arrays
+sync_lxi_word = int.from_bytes(sync_lxi, "big")
+sync_pit_word = int.from_bytes(sync_pit, "big")
+
+# Layout of a 28-byte PIT frame: the PIT sync word, the PIT time stamp, two spare bytes and the
+# 16-byte LEXI packet (LEXI sync word, time stamp word and the four channels). Everything is
+# big-endian, same as packet_format_pit and packet_format_sci.
+pit_frame_dtype = np.dtype(
+    [
+        ("sync_pit", ">u2"),
+        ("Date", ">f8"),
+        ("spare", ">u2"),
+        ("sync_lxi", ">u4"),
+        ("timestamp", ">u4"),
+        ("channel1", ">u2"),
+        ("channel2", ">u2"),
+        ("channel3", ">u2"),
+        ("channel4", ">u2"),
+    ]
+)
+
+# Layout of a 16-byte LEXI packet on its own, as in the GSFC files
+lxi_packet_dtype = np.dtype(
+    [
+        ("sync_lxi", ">u4"),
+        ("timestamp", ">u4"),
+        ("channel1", ">u2"),
+        ("channel2", ">u2"),
+        ("channel3", ">u2"),
+        ("channel4", ">u2"),
+    ]
+)
+
+# Layouts of the decoded science and housekeeping packets, with the same fields as sci_packet_cls
+# and hk_packet_cls. The packets of a file are kept in a single record array with one of these
+# layouts, see new_packet_block.
+sci_packet_dtype = np.dtype(
+    [
+        ("Date", np.float64),
+        ("is_commanded", np.bool_),
+        ("timestamp", np.int64),
+        ("channel1", np.float64),
+        ("channel2", np.float64),
+        ("channel3", np.float64),
+        ("channel4", np.float64),
+    ]
+)
+
+hk_packet_dtype = np.dtype(
+    [
+        ("Date", np.float64),
+        ("timestamp", np.int64),
+        ("hk_id", np.int64),
+        ("hk_value", np.int64),
+        ("delta_event_count", np.int64),
+        ("delta_drop_event_count", np.int64),
+        ("delta_lost_event_count", np.int64),
+    ]
+)
+
+
+def new_packet_block(n_packets=0, dtype=None, has_date=True):
+    """
+    Allocates a block of packets, which is then filled in place one field at a time. The block is
+    a numpy record array: indexing it with the name of a field, or getting the field as an
+    attribute (e.g. "block.channel1"), gives the field for all the packets, and indexing it with
+    an integer gives a single packet whose fields are attributes too (e.g. "block[0].hk_id"),
+    same as sci_packet_cls and hk_packet_cls.
+
+    Parameters
+    ----------
+    n_packets : int
+        Number of packets. Default is 0.
+    dtype : numpy.dtype
+        Either sci_packet_dtype or hk_packet_dtype. Default is None.
+    has_date : bool
+        If False, the packets have no "Date" field, as in the GSFC files. Default is True.
+
+    Returns
+    -------
+    block : numpy.recarray
+        The block of packets, not filled yet.
+    """
+    if not has_date:
+        dtype = np.dtype([(name, dtype[name]) for name in dtype.names if name != "Date"])
+    return np.recarray(n_packets, dtype=dtype)
+
+
+# Counters of the decoder statistics of a file, see new_decode_stats
+decode_stats_counters = [
+    "n_frames",
+    "n_clean",
+    "n_repaired_slip",
+    "n_repaired_split_3",
+    "n_repaired_split_2",
+    "n_repaired_split_1",
+    "n_skipped",
+    "n_skipped_bytes",
+    "n_trailing_bytes",
+    "n_sci",
+    "n_hk",
+    "n_bytes",
+]
+
+
+def new_decode_stats(file_name=None):
+    """
+    Creates the record of the decoder statistics of a file, which the decoders fill in. It tells
+    how many frames of the file were read as they are, repaired or dropped, so that a corrupt file
+    can be told apart from a large one.
+    - n_frames: number of PIT frames in the file, or of LEXI packets in a GSFC file.
+    - n_clean: number of frames with their LEXI sync word at the right place.
+    - n_repaired_slip: number of frames repaired with sync_lxi 1 to 12 bytes into the LEXI part.
+    - n_repaired_split_3, _2 and _1: number of frames repaired with the first 3, 2 or 1 bytes of
+      sync_lxi at the end of the previous frame.
+    - n_skipped: number of frames dropped, without the PIT sync word or which couldn't be
+      repaired. Each repair usually drops a frame too, the one holding the rest of the packet.
+    - n_skipped_bytes: number of bytes in the dropped frames, or between the packets of a GSFC
+      file.
+    - n_trailing_bytes: number of bytes after the last whole frame or packet of the file.
+    - n_sci and n_hk: number of science and housekeeping packets.
+    - n_bytes: number of bytes of the file which were read, which is where following the file
+      carries on from (see start_follow).
+    - decode_time: time it took to decode the file, in seconds.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the file. Default is None.
+
+    Returns
+    -------
+    stats : dict
+        The decoder statistics, with all the counters at 0.
+    """
+    stats = {"file_name": file_name}
+    stats.update({counter: 0 for counter in decode_stats_counters})
+    stats["decode_time"] = 0.0
+    return stats
+
+
+def add_gsfc_stats(stats=None, packet_start=None, n_bytes=0, final=True):
+    """
+    Adds the packets found in the raw data of a GSFC file to its decoder statistics, see
+    new_decode_stats. There are no frames to repair in a GSFC file, so all the packets are clean.
+
+    Parameters
+    ----------
+    stats : dict
+        The decoder statistics. Default is None.
+    packet_start : numpy.ndarray
+        Position of each packet in the raw data, see find_gsfc_packets. Default is None.
+    n_bytes : int
+        Number of bytes of the raw data which were looked at: all of them if final is True, else
+        the ones which aren't carried over to the next chunk. Default is 0.
+    final : bool
+        If True, the raw data runs up to the end of the file. Default is True.
+    """
+    n_packets = len(packet_start)
+    stats["n_frames"] += n_packets
+    stats["n_clean"] += n_packets
+    if final:
+        packet_end = int(packet_start[-1]) + 16 if n_packets > 0 else 0
+        stats["n_skipped_bytes"] += packet_end - 16 * n_packets
+        stats["n_trailing_bytes"] += n_bytes - packet_end
+    else:
+        stats["n_skipped_bytes"] += n_bytes - 16 * n_packets
+
 
 class sci_packet_cls(NamedTuple):
     """
@@ -271,10 +447,701 @@ class hk_packet_cls_gsfc(NamedTuple):
             )
 
 
+class pit_frame_set:
+    """
+    Class for the PIT frames found in a file.
+    The frames are not copied out of the raw data of the file. Instead, the class keeps a
+    structured array (dtype pit_frame_dtype) which is a view of the raw data, the index of the
+    frames which are read from it as they are, and a small array with the repaired frames. Only the
+    repaired frames are copies.
+
+    Indexing the class with the name of a field returns that field for all the frames, in the order
+    they are in the file. Indexing it with a boolean mask or an array of indices returns the class
+    for those frames.
+    """
+
+    def __init__(self, frames=None, index=None, repaired=None):
+        """
+        Parameters
+        ----------
+        frames : numpy.ndarray
+            Structured array of all the frames in the raw data.
+        index : numpy.ndarray or None
+            Index of the frames in the set. Frames from "frames" have their index in it, and the
+            repaired frames have their index in "repaired" plus the number of frames. If None, the
+            set has all the frames, in order.
+        repaired : numpy.ndarray or None
+            Structured array of the repaired frames.
+        """
+        self.frames = frames
+        self.index = index
+        if repaired is None:
+            repaired = np.empty(0, dtype=pit_frame_dtype)
+        self.repaired = repaired
+
+    @property
+    def dtype(self):
+        return self.frames.dtype
+
+    def __len__(self):
+        if self.index is None:
+            return len(self.frames)
+        return len(self.index)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            if self.index is None:
+                return self.frames[key]
+            is_repaired = self.index >= len(self.frames)
+            if not is_repaired.any():
+                return self.frames[key][self.index]
+            field = np.empty(len(self.index), dtype=self.frames.dtype[key])
+            field[~is_repaired] = self.frames[key][self.index[~is_repaired]]
+            field[is_repaired] = self.repaired[key][self.index[is_repaired] - len(self.frames)]
+            return field
+
+        if self.index is None:
+            index = np.arange(len(self.frames))[key]
+        else:
+            index = self.index[key]
+        return pit_frame_set(frames=self.frames, index=index, repaired=self.repaired)
+
+
+def find_pit_frames(
+    raw=None, header_from_next=False, return_next_date=False, offset=0, final=True, stats=None
+):
+    """
+    Finds all the 28-byte PIT frames in the raw data of a file. The frames are laid out every 28
+    bytes from the start of the file, so all of them are read at once as a structured array
+    using pit_frame_dtype. This is a view of the raw data, so "raw" can also be a memory-mapped
+    file and the frames are not copied.
+
+    The raw data can also be a chunk of a file (see iter_binary_file). The chunk then starts
+    "offset" bytes before a frame, so that a frame whose sync_lxi starts at the end of the
+    previous frame can still be repaired. If the chunk is not the last one of the file, i.e.
+    final is False, only the frames that can be repaired without the bytes after the chunk are
+    returned.
+
+    Some frames have their LEXI sync word at the wrong place. These are repaired in bulk: the
+    position of sync_lxi is looked up for all of them at once, each frame is put in one of the
+    following classes, and the bytes of the repaired frames are gathered with a single fancy
+    index into the raw data.
+    - sync_lxi starts 1 to 12 bytes into the LEXI part of the frame. The LEXI packet then runs
+      into the next frame, past the header of the next frame.
+    - The first 3, 2 or 1 bytes of sync_lxi are at the end of the previous frame and the rest of
+      them are at the start of the LEXI part of the frame.
+    Frames that fit none of these are dropped.
+
+    Parameters
+    ----------
+    raw : bytes or mmap.mmap
+        The raw data of the file.
+    header_from_next : bool
+        If True, the PIT header (sync word and time stamp) of a frame whose LEXI packet runs into
+        the next frame is taken from the next frame. This is what the science reader has always
+        done, while the housekeeping reader keeps the header of the frame itself. Default is False.
+    return_next_date : bool
+        If True, also return the PIT time stamps the science reader uses, i.e. the ones with
+        header_from_next=True. This way the frames only have to be found once for both the science
+        and the housekeeping packets. Default is False.
+    offset : int
+        Position of the first frame in the raw data. Default is 0.
+    final : bool
+        If True, the raw data runs up to the end of the file. Default is True.
+    stats : dict
+        If given, the number of clean, repaired and dropped frames are added to these decoder
+        statistics, see new_decode_stats. Default is None.
+
+    Returns
+    -------
+    frames : pit_frame_set
+        The frames, in the order they are in the file.
+    date_next : numpy.ndarray
+        PIT time stamp of each frame, taken from the next frame for the frames whose LEXI packet
+        runs into it. Only returned if return_next_date is True.
+    """
+    if final:
+        # Every complete frame, including the one ending at the end of the file
+        n_frames = (len(raw) - offset) // 28
+    else:
+        # A repaired LEXI packet reaches at most 24 bytes into the next frame
+        n_frames = max((len(raw) - offset - 24) // 28, 0)
+    frames = np.frombuffer(raw, dtype=pit_frame_dtype, count=n_frames, offset=offset)
+
+    has_sync_pit = frames["sync_pit"] == sync_pit_word
+    is_aligned = has_sync_pit & (frames["sync_lxi"] == sync_lxi_word)
+    misaligned_idx = np.flatnonzero(has_sync_pit & ~is_aligned)
+    if stats is not None:
+        n_clean = int(np.count_nonzero(is_aligned))
+        stats["n_frames"] += n_frames
+        stats["n_clean"] += n_clean
+        # The frames which are repaired are taken off the skipped ones below
+        stats["n_skipped"] += n_frames - n_clean
+        stats["n_skipped_bytes"] += 28 * (n_frames - n_clean)
+        if final:
+            stats["n_trailing_bytes"] += len(raw) - offset - 28 * n_frames
+    if len(misaligned_idx) == 0:
+        if is_aligned.all():
+            frames = pit_frame_set(frames=frames)
+        else:
+            frames = pit_frame_set(frames=frames, index=np.flatnonzero(is_aligned))
+        if return_next_date:
+            return frames, frames["Date"].astype(np.float64)
+        return frames
+
+    raw_bytes = np.frombuffer(raw, dtype=np.uint8)
+    sync_bytes = np.frombuffer(sync_lxi, dtype=np.uint8)
+    start = offset + misaligned_idx * 28
+
+    # Look for sync_lxi in the LEXI part (16 bytes) of each frame. The first match wins.
+    lxi_part = raw_bytes[start[:, None] + 12 + np.arange(16)]
+    sync_match = np.all(
+        np.lib.stride_tricks.sliding_window_view(lxi_part, 4, axis=1) == sync_bytes, axis=2
+    )
+    in_frame = sync_match.any(axis=1)
+    sync_offset = sync_match.argmax(axis=1)
+    # The part of the LEXI packet in the next frame must be in the file. If it isn't, the
+    # packet was cut off at the end of the file.
+    is_repaired = in_frame & (start + 40 + sync_offset <= len(raw))
+    lxi_start = start + 12 + sync_offset
+    lxi_split = 16 - sync_offset
+    n_repaired = {"n_repaired_slip": int(np.count_nonzero(is_repaired))}
+
+    # Check if sync_lxi is split between the end of the previous frame and this one
+    for n_bytes in (3, 2, 1):
+        is_split = (
+            ~in_frame
+            & ~is_repaired
+            & (start >= n_bytes)
+            & np.all(
+                raw_bytes[np.maximum(start - n_bytes, 0)[:, None] + np.arange(n_bytes)]
+                == sync_bytes[:n_bytes],
+                axis=1,
+            )
+            & np.all(
+                raw_bytes[start[:, None] + 12 + np.arange(4 - n_bytes)]
+                == sync_bytes[n_bytes:],
+                axis=1,
+            )
+        )
+        is_repaired |= is_split
+        lxi_start[is_split] = start[is_split] - n_bytes
+        lxi_split[is_split] = n_bytes
+        n_repaired[f"n_repaired_split_{n_bytes}"] = int(np.count_nonzero(is_split))
+
+    if stats is not None:
+        for counter, count in n_repaired.items():
+            stats[counter] += count
+            stats["n_skipped"] -= count
+            stats["n_skipped_bytes"] -= 28 * count
+
+    misaligned_idx = misaligned_idx[is_repaired]
+    start = start[is_repaired]
+    lxi_start = lxi_start[is_repaired]
+    lxi_split = lxi_split[is_repaired]
+    header_start = start.copy()
+    if header_from_next:
+        header_start[in_frame[is_repaired]] += 28
+
+    # Index of each byte of the repaired frames in the raw data. The LEXI packet is made of two
+    # pieces, with the 12 bytes of PIT header in between.
+    lxi_byte = np.arange(16)
+    repaired_idx = np.concatenate(
+        (
+            header_start[:, None] + np.arange(12),
+            lxi_start[:, None] + lxi_byte + 12 * (lxi_byte >= lxi_split[:, None]),
+        ),
+        axis=1,
+    )
+    repaired_frames = raw_bytes[repaired_idx].view(pit_frame_dtype)[:, 0]
+
+    # The repaired frames take the place of the misaligned ones
+    index = np.arange(n_frames)
+    index[misaligned_idx] = n_frames + np.arange(len(misaligned_idx))
+    is_aligned[misaligned_idx] = True
+    frames = pit_frame_set(frames=frames, index=index[is_aligned], repaired=repaired_frames)
+    if not return_next_date:
+        return frames
+
+    date_next = frames["Date"].astype(np.float64)
+    spans_next = in_frame[is_repaired]
+    # Position of the frames in the set
+    position = np.cumsum(is_aligned) - 1
+    date_next[position[misaligned_idx[spans_next]]] = raw_bytes[
+        (start[spans_next] + 28 + 2)[:, None] + np.arange(8)
+    ].view(">f8")[:, 0]
+
+    return frames, date_next
+
+
+def decode_sci_frames(frames=None):
+    """
+    Decodes the science packets from an array of PIT frames all at once. The values are exactly
+    the same as the ones of sci_packet_cls.from_bytes applied to each frame.
+
+    Parameters
+    ----------
+    frames : pit_frame_set or numpy.ndarray
+        The frames, as returned by find_pit_frames, or a structured array of LEXI packets without
+        the PIT header (dtype lxi_packet_dtype), in which case there is no "Date".
+
+    Returns
+    -------
+    packets : numpy.recarray
+        Block of packets with the fields of sci_packet_cls (or sci_packet_cls_gsfc), see
+        new_packet_block.
+    """
+    packets = new_packet_block(
+        n_packets=len(frames), dtype=sci_packet_dtype, has_date="Date" in frames.dtype.names
+    )
+    if "Date" in frames.dtype.names:
+        packets["Date"] = frames["Date"]
+    timestamp_word = frames["timestamp"]
+    # mask to test for commanded event type
+    packets["is_commanded"] = (timestamp_word & 0x40000000) != 0
+    # mask for getting all timestamp bits
+    packets["timestamp"] = timestamp_word & 0x3FFFFFFF
+    packets["channel1"] = frames["channel1"] * volts_per_count
+    packets["channel2"] = frames["channel2"] * volts_per_count
+    packets["channel3"] = frames["channel3"] * volts_per_count
+    packets["channel4"] = frames["channel4"] * volts_per_count
+    return packets
+
+
+def decode_hk_frames(frames=None):
+    """
+    Decodes the housekeeping packets from an array of PIT frames all at once. Only the frames
+    which are house-keeping packets are kept. The values are exactly the same as the ones of
+    hk_packet_cls.from_bytes applied to each frame.
+
+    Parameters
+    ----------
+    frames : pit_frame_set or numpy.ndarray
+        The frames, as returned by find_pit_frames, or a structured array of LEXI packets without
+        the PIT header (dtype lxi_packet_dtype), in which case there is no "Date".
+
+    Returns
+    -------
+    packets : numpy.recarray
+        Block of packets with the fields of hk_packet_cls (or hk_packet_cls_gsfc), see
+        new_packet_block.
+    """
+    # Check if the frame is a house-keeping packet. Only the house-keeping packets are processed.
+    frames = frames[(frames["timestamp"] & 0x80000000) != 0]
+
+    hk_word = frames["channel1"].astype(np.int64)
+    hk_id = (hk_word & 0xF000) >> 12  # Down-shift 12 bits to get the hk_id
+    # Up-shift 4 bits to get the hk_value, except for the command count and the pin puller
+    hk_value = np.where((hk_id == 10) | (hk_id == 11), hk_word & 0xFFF, (hk_word & 0xFFF) << 4)
+    packets = new_packet_block(
+        n_packets=len(frames), dtype=hk_packet_dtype, has_date="Date" in frames.dtype.names
+    )
+    if "Date" in frames.dtype.names:
+        packets["Date"] = frames["Date"]
+    # mask for getting all timestamp bits
+    packets["timestamp"] = frames["timestamp"] & 0x3FFFFFFF
+    packets["hk_id"] = hk_id
+    packets["hk_value"] = hk_value
+    packets["delta_event_count"] = frames["channel2"]
+    packets["delta_drop_event_count"] = frames["channel3"]
+    packets["delta_lost_event_count"] = frames["channel4"]
+    return packets
+
+
+def find_gsfc_packets(raw=None):
+    """
+    Finds the 16-byte LEXI packets in the raw data of a GSFC file, i.e. a file with only the
+    LEXI packets and no PIT frames. All the positions of sync_lxi are found at once, and a packet
+    is taken at each of them unless it overlaps the packet before it. This gives the same packets
+    as searching the data one byte at a time, including a packet ending at the end of the data.
+
+    Parameters
+    ----------
+    raw : bytes or mmap.mmap
+        The raw data of the file.
+
+    Returns
+    -------
+    packet_start : numpy.ndarray
+        Position of each packet in the raw data.
+    """
+    if len(raw) < 16:
+        return np.empty(0, dtype=np.int64)
+
+    # Compare each of the 4 bytes of sync_lxi against the data shifted by that many bytes. Only
+    # the positions with a whole packet after them are looked at.
+    raw_bytes = np.frombuffer(raw, dtype=np.uint8)
+    n_candidates = len(raw) - 15
+    is_sync = raw_bytes[:n_candidates] == sync_lxi[0]
+    for n_byte in range(1, 4):
+        is_sync &= raw_bytes[n_byte:n_byte + n_candidates] == sync_lxi[n_byte]
+    candidates = np.flatnonzero(is_sync)
+
+    # Usually no two candidates are closer than a packet, and all of them are packets
+    if np.all(np.diff(candidates) >= 16):
+        return candidates
+
+    # Otherwise a candidate which falls inside the packet before it is not a packet. This only
+    # loops over the candidates, not over every byte.
+    packet_start = []
+    next_index = 0
+    for index in candidates.tolist():
+        if index >= next_index:
+            packet_start.append(index)
+            next_index = index + 16
+
+    return np.array(packet_start, dtype=np.int64)
+
+
+def read_gsfc_packets(raw=None, packet_cls=None, packet_start=None):
+    """
+    Reads the packets from the raw data of a GSFC file, i.e. a file with only the 16-byte LEXI
+    packets and no PIT frames. All the packets are decoded at once, with the same values as
+    packet_cls.from_bytes applied to each of them.
+
+    Parameters
+    ----------
+    raw : bytes or mmap.mmap
+        The raw data of the file.
+    packet_cls : class
+        Either sci_packet_cls_gsfc or hk_packet_cls_gsfc.
+    packet_start : numpy.ndarray
+        Position of each packet in the raw data, as returned by find_gsfc_packets. If None, the
+        packets are looked for in the raw data. Default is None.
+
+    Returns
+    -------
+    packets : numpy.recarray
+        Block of packets with the fields of packet_cls, see new_packet_block.
+    """
+    if packet_start is None:
+        packet_start = find_gsfc_packets(raw=raw)
+
+    raw_bytes = np.frombuffer(raw, dtype=np.uint8)
+    packets = raw_bytes[packet_start[:, None] + np.arange(16)].view(lxi_packet_dtype)[:, 0]
+
+    # Unlike sci_packet_cls_gsfc, hk_packet_cls_gsfc only keeps the house-keeping packets
+    if packet_cls is hk_packet_cls_gsfc:
+        return decode_hk_frames(packets)
+    return decode_sci_frames(packets)
+
+
+def concat_packets(batches=None):
+    """
+    Concatenates the batches of packets given by iter_binary_file into a single batch.
+
+    Parameters
+    ----------
+    batches : list
+        List of blocks of packets, all with the same fields (see new_packet_block).
+
+    Returns
+    -------
+    packets : numpy.recarray
+        Block with all the packets of the batches.
+    """
+    if len(batches) == 1:
+        return batches[0]
+    packets = new_packet_block(n_packets=sum(len(batch) for batch in batches), dtype=batches[0].dtype)
+    np.concatenate(batches, out=packets)
+    return packets
+
+
+def decode_raw_chunk(raw=None, offset=0, is_payload=True, final=True, stats=None):
+    """
+    Decodes the packets in a chunk of raw data, and finds the bytes at the end of the chunk which
+    can't be decoded yet (an incomplete frame or a packet which runs into the next chunk). These
+    bytes are carried over to the next chunk, see iter_binary_file.
+
+    Parameters
+    ----------
+    raw : bytes
+        The raw data, starting with the bytes carried over from the previous chunk. Default is
+        None.
+    offset : int
+        Position of the first frame in the raw data, see find_pit_frames. Only used if is_payload
+        is True. Default is 0.
+    is_payload : bool
+        If True, the raw data is made of PIT frames, else of LEXI packets as in the GSFC files.
+        Default is True.
+    final : bool
+        If True, the raw data runs up to the end of the file. Default is True.
+    stats : dict
+        If given, the frames and packets of the chunk are added to these decoder statistics, see
+        new_decode_stats. Default is None.
+
+    Returns
+    -------
+    packets_sci : numpy.recarray
+        Block of the science packets in the chunk, see decode_sci_frames.
+    packets_hk : numpy.recarray
+        Block of the housekeeping packets in the chunk, see decode_hk_frames.
+    carry : bytes
+        The bytes to carry over to the next chunk.
+    offset : int
+        Position of the first frame in the carried over bytes.
+    """
+    if is_payload:
+        frames, date_next = find_pit_frames(
+            raw=raw, return_next_date=True, offset=offset, final=final, stats=stats
+        )
+        is_hk = (frames["timestamp"] & 0x80000000) != 0
+        packets_sci = decode_sci_frames(frames[~is_hk])
+        packets_sci["Date"] = date_next[~is_hk]
+        packets_hk = decode_hk_frames(frames[is_hk])
+
+        # Carry over the frames which were not looked at, along with the last 3 bytes of the
+        # frame before them
+        next_frame = offset + 28 * len(frames.frames)
+        offset = min(next_frame, 3)
+        carry = raw[next_frame - offset:]
+    else:
+        packet_start = find_gsfc_packets(raw=raw)
+        packets_sci = read_gsfc_packets(
+            raw=raw, packet_cls=sci_packet_cls_gsfc, packet_start=packet_start
+        )
+        packets_hk = read_gsfc_packets(
+            raw=raw, packet_cls=hk_packet_cls_gsfc, packet_start=packet_start
+        )
+
+        # Carry over the bytes after the last packet which were not searched
+        next_index = max(len(raw) - 15, 0)
+        if len(packet_start) > 0:
+            next_index = max(next_index, int(packet_start[-1]) + 16)
+        carry = raw[next_index:]
+        offset = 0
+        if stats is not None:
+            add_gsfc_stats(
+                stats=stats,
+                packet_start=packet_start,
+                n_bytes=len(raw) if final else next_index,
+                final=final,
+            )
+
+    if stats is not None:
+        stats["n_sci"] += len(packets_sci)
+        stats["n_hk"] += len(packets_hk)
+
+    return packets_sci, packets_hk, carry, offset
+
+
+def iter_binary_file(in_file_name=None, chunk_size=2**22, stats=None):
+    """
+    Decodes a binary file one chunk at a time. Each chunk is decoded in bulk, and the bytes at the
+    end of the chunk which can't be decoded yet (an incomplete frame or a packet which runs into
+    the next chunk) are carried over to the next chunk. The memory used only depends on the size
+    of the chunks, and the packets are the same as the ones decoded from the whole file at once.
+
+    Parameters
+    ----------
+    in_file_name : str
+        Name of the input file. Default is None.
+    chunk_size : int
+        Number of bytes read from the file at a time. Default is 4 MiB.
+    stats : dict
+        If given, the frames and packets of each chunk are added to these decoder statistics, see
+        new_decode_stats. Default is None.
+
+    Yields
+    ------
+    packets_sci : numpy.recarray
+        Block of the science packets in the chunk, see decode_sci_frames.
+    packets_hk : numpy.recarray
+        Block of the housekeeping packets in the chunk, see decode_hk_frames.
+    """
+    if in_file_name is None:
+        raise FileNotFoundError("The input file name must be specified.")
+
+    # Check if the file exists, if does not exist raise an error
+    if not Path(in_file_name).is_file():
+        raise FileNotFoundError("The file " + in_file_name + " does not exist.")
+    # Check if the file name and folder name are strings, if not then raise an error
+    if not isinstance(in_file_name, str):
+        raise TypeError("The file name must be a string.")
+
+    # Check the chunk size, it must at least hold a frame and the bytes around it
+    if not isinstance(chunk_size, int) or chunk_size < 64:
+        raise ValueError("The chunk size must be an integer of at least 64 bytes.")
+
+    is_payload = "payload" in in_file_name
+    carry = b""
+    # Position of the first frame in the carried over bytes
+    offset = 0
+    with open(in_file_name, "rb") as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if stats is not None:
+                stats["n_bytes"] += len(chunk)
+            # The carried over bytes are decoded on their own once the end of the file is reached
+            final = len(chunk) == 0
+            raw = carry + chunk
+
+            packets_sci, packets_hk, carry, offset = decode_raw_chunk(
+                raw=raw, offset=offset, is_payload=is_payload, final=final, stats=stats
+            )
+
+            yield packets_sci, packets_hk
+
+            if final:
+                break
+
+
+@contextlib.contextmanager
+def open_raw_data(in_file_name=None, use_mmap=False):
+    """
+    Opens a binary file and gives its raw data.
+
+    Parameters
+    ----------
+    in_file_name : str
+        Name of the input file. Default is None.
+    use_mmap : bool
+        If True, the file is memory-mapped instead of being read into memory, so that the frames
+        can be decoded from views of the file without copying it. Default is False.
+
+    Yields
+    ------
+    raw : bytes or mmap.mmap
+        The raw data of the file.
+    """
+    with open(in_file_name, "rb") as file:
+        # An empty file can't be memory-mapped
+        if not use_mmap or os.fstat(file.fileno()).st_size == 0:
+            yield file.read()
+            return
+
+        raw = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            yield raw
+        finally:
+            try:
+                raw.close()
+            except BufferError:
+                # Some numpy views of the file are still alive, the map is closed once they are
+                # garbage collected
+                logger.warning(f"Could not close the memory map of {in_file_name}")
+
+
+def read_binary_data(
+    in_file_name=None, use_mmap=False, report_memory=False, chunk_size=None, return_stats=False
+):
+    """
+    Reads the binary data from a file and decodes both the science and the housekeeping packets.
+    The file is read and its frames are found only once, and the frames are then split into
+    science and housekeeping packets using the HK bit of the time stamp word.
+
+    Parameters
+    ----------
+    in_file_name : str
+        Name of the input file. Default is None.
+    use_mmap : bool
+        If True, the file is memory-mapped and the frames are decoded without copying it. Default
+        is False.
+    report_memory : bool
+        If True, the peak memory used while decoding the file is printed and logged. Default is
+        False.
+    chunk_size : int
+        If given, the file is decoded this many bytes at a time with iter_binary_file, and
+        use_mmap is ignored. Default is None.
+    return_stats : bool
+        If True, the decoder statistics of the file are returned too. They are logged either way.
+        Default is False.
+
+    Raises
+    ------
+    FileNotFoundError :
+        If the input file does not exist or isn't specified.
+    TypeError :
+        If the name of the input file is not a string.
+
+    Returns
+    -------
+    packets_sci : numpy.recarray
+        Block of the science packets, see decode_sci_frames.
+    packets_hk : numpy.recarray
+        Block of the housekeeping packets, see decode_hk_frames.
+    stats : dict
+        The decoder statistics of the file, see new_decode_stats. Only returned if return_stats
+        is True.
+    """
+    if in_file_name is None:
+        raise FileNotFoundError("The input file name must be specified.")
+
+    # Check if the file exists, if does not exist raise an error
+    if not Path(in_file_name).is_file():
+        raise FileNotFoundError("The file " + in_file_name + " does not exist.")
+    # Check if the file name and folder name are strings, if not then raise an error
+    if not isinstance(in_file_name, str):
+        raise TypeError("The file name must be a string.")
+
+    print(f"Reading the file \033[96m {in_file_name}\033[0m")
+
+    if report_memory:
+        is_tracing = tracemalloc.is_tracing()
+        if not is_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+
+    stats = new_decode_stats(file_name=in_file_name)
+    start_time = time.perf_counter()
+    if chunk_size is not None:
+        batches = list(
+            iter_binary_file(in_file_name=in_file_name, chunk_size=chunk_size, stats=stats)
+        )
+        packets_sci = concat_packets([batch[0] for batch in batches])
+        packets_hk = concat_packets([batch[1] for batch in batches])
+        del batches
+    else:
+        with open_raw_data(in_file_name=in_file_name, use_mmap=use_mmap) as raw:
+            stats["n_bytes"] = len(raw)
+            if "payload" in in_file_name:
+                frames, date_next = find_pit_frames(raw=raw, return_next_date=True, stats=stats)
+                is_hk = (frames["timestamp"] & 0x80000000) != 0
+                packets_sci = decode_sci_frames(frames[~is_hk])
+                packets_sci["Date"] = date_next[~is_hk]
+                packets_hk = decode_hk_frames(frames[is_hk])
+                # Drop the views of the raw data so that the memory map can be closed
+                del frames
+            else:
+                # Print in green color that the gsfc code is running
+                print("\033[92mRunning the GSFC code for Science and Housekeeping.\033[0m")
+                packet_start = find_gsfc_packets(raw=raw)
+                add_gsfc_stats(stats=stats, packet_start=packet_start, n_bytes=len(raw))
+                packets_sci = read_gsfc_packets(
+                    raw=raw, packet_cls=sci_packet_cls_gsfc, packet_start=packet_start
+                )
+                packets_hk = read_gsfc_packets(
+                    raw=raw, packet_cls=hk_packet_cls_gsfc, packet_start=packet_start
+                )
+        stats["n_sci"] = len(packets_sci)
+        stats["n_hk"] = len(packets_hk)
+    stats["decode_time"] = time.perf_counter() - start_time
+    logger.info(f"Decoder statistics of {in_file_name}: {stats}")
+
+    if report_memory:
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        if not is_tracing:
+            tracemalloc.stop()
+        if chunk_size is not None:
+            mode = f"chunks of {chunk_size} bytes"
+        else:
+            mode = "memory-mapped" if use_mmap else "read"
+        print(
+            f"Peak memory used decoding \033[96m {in_file_name}\033[0m ({mode}): "
+            f"\033[92m{peak_memory / 2**20:.2f} MiB\033[0m"
+        )
+        logger.info(f"Peak memory used decoding {in_file_name} ({mode}): {peak_memory} bytes")
+
+    if return_stats:
+        return packets_sci, packets_hk, stats
+    return packets_sci, packets_hk
+
+
 def read_binary_data_sci(
     in_file_name=None,
     save_file_name="../data/processed/sci/output_sci.csv",
     number_of_decimals=6,
+    use_mmap=False,
 ):
     """
     Reads science packet of the binary data from a file and saves it to a csv file.
@@ -287,6 +1154,9 @@ def read_binary_data_sci(
         Name of the output file. Default is "output_sci.csv".
     number_of_decimals : int
         Number of decimals to save. Default is 6.
+    use_mmap : bool
+        If True, the file is memory-mapped and the frames are decoded without copying it. Default
+        is False.
 
     Raises
     ------
@@ -328,205 +1198,608 @@ def read_binary_data_sci(
         os.path.getctime(input_file_name)
     )
 
-    with open(input_file_name, "rb") as file:
-        raw = file.read()
+    stats = new_decode_stats(file_name=in_file_name)
+    start_time = time.perf_counter()
+    with open_raw_data(in_file_name=input_file_name, use_mmap=use_mmap) as raw:
+        # Check if the "file_name" has payload in its name or not. If it has payload in its name,
+        # then decode the PIT frames all at once, else use sci_packet_cls_gsfc
+        if "payload" in in_file_name:
+            packets = decode_sci_frames(
+                find_pit_frames(raw=raw, header_from_next=True, stats=stats)
+            )
+        else:
+            # Print in green color that the gsfc code is running
+            print("\033[92mRunning the GSFC code for Science.\033[0m")
+            packet_start = find_gsfc_packets(raw=raw)
+            add_gsfc_stats(stats=stats, packet_start=packet_start, n_bytes=len(raw))
+            packets = read_gsfc_packets(
+                raw=raw, packet_cls=sci_packet_cls_gsfc, packet_start=packet_start
+            )
+    stats["n_sci"] = len(packets)
+    stats["decode_time"] = time.perf_counter() - start_time
+    logger.info(f"Decoder statistics of {in_file_name}: {stats}")
 
-    index = 0
-    packets = []
+    return save_binary_data_sci(
+        packets=packets, in_file_name=in_file_name, number_of_decimals=number_of_decimals
+    )
 
-    # Check if the "file_name" has payload in its name or not. If it has payload in its name, then
-    # use the sci_packet_cls else use sci_packet_cls_gsfc
-    if "payload" in in_file_name:
-        while index < len(raw) - 28:
-            if (raw[index:index + 2] == sync_pit and raw[index + 12:index + 16] == sync_lxi):
-                packets.append(sci_packet_cls.from_bytes(raw[index:index + 28]))
-                index += 28
-                continue
-            elif (raw[index:index + 2] == sync_pit) and (raw[index + 12:index + 16] != sync_lxi):
-                # Ignore the last packet
-                if index >= len(raw) - 28 - 16:
-                    # NOTE: This is a temporary fix. The last packet is ignored because the last
-                    # packet often isn't complete. Need to find a better solution. Check the function
-                    # read_binary_data_hk for the same.
-                    index += 28
-                    continue
-                # Check if sync_lxi is present in the next 16 bytes
-                if sync_lxi in raw[index + 12:index + 28] and index + 28 < len(raw):
-                    # Find the index of sync_lxi
-                    index_sync = index + 12 + raw[index + 12:index + 28].index(sync_lxi)
-                    # Reorder the packet
-                    new_packet = (raw[index + 28:index + 12 + 28] +
-                                  raw[index_sync:index + 28] +
-                                  raw[index + 12 + 28:index_sync + 28])
-                    # Check if the packet length is 28
-                    if len(new_packet) != 28:
-                        # If the index + 28 is greater than the length of the raw data, then break
-                        if index + 28 > len(raw):
-                            break
-                    packets.append(sci_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                # Check if raw[index - 3:index] + raw[index+12:index+13] == sync_lxi
-                elif raw[index - 3:index] + raw[index + 12:index + 13] == sync_lxi:
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index - 3:index] +
-                                  raw[index + 12:index + 25])
-                    packets.append(sci_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                # Check if raw[index - 2:index] + raw[index+12:index+14] == sync_lxi
-                elif raw[index - 2:index] + raw[index + 12:index + 14] == sync_lxi:
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index - 2:index] +
-                                  raw[index + 13:index + 26])
-                    packets.append(sci_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                # Check if raw[index - 1:index] + raw[index+12:index+15] == sync_lxi
-                elif raw[index - 1:index] + raw[index + 12:index + 15] == sync_lxi:
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index - 1:index] +
-                                  raw[index + 14:index + 27])
-                    packets.append(sci_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                index += 28
-                continue
-            index += 28
-    else:
-        # Print in green color that the gsfc code is running
-        print("\033[92mRunning the GSFC code for Science.\033[0m")
-        while index < len(raw) - 16:
-            if raw[index:index + 4] == sync_lxi:
-                packets.append(sci_packet_cls_gsfc.from_bytes(raw[index:index + 16]))
-                index += 16
-                continue
 
-            index += 1
+def unix_to_datetime(seconds=None):
+    """
+    Converts times in seconds since the epoch to UTC dates, all at once. The times are rounded to
+    microseconds (half to even) the same way as datetime.datetime.utcfromtimestamp.
+
+    Parameters
+    ----------
+    seconds : numpy.ndarray
+        Times in seconds since the epoch. Default is None.
+
+    Returns
+    -------
+    dates : numpy.ndarray
+        The dates, as numpy.datetime64 without time zone.
+    """
+    seconds = np.asarray(seconds, dtype=np.float64)
+    whole_seconds = np.trunc(seconds)
+    micro_seconds = np.round((seconds - whole_seconds) * 1e6)
+    # Carry over the microseconds which were rounded up to a whole second
+    whole_seconds[micro_seconds >= 1e6] += 1
+    micro_seconds[micro_seconds >= 1e6] -= 1e6
+    whole_seconds[micro_seconds < 0] -= 1
+    micro_seconds[micro_seconds < 0] += 1e6
+    micro_seconds = whole_seconds.astype(np.int64) * 1000000 + micro_seconds.astype(np.int64)
+    return micro_seconds.astype("datetime64[us]").astype("datetime64[ns]")
+
+
+def get_l1a_file_name(in_file_name=None, data_type="sci"):
+    """
+    Gets the name of the L1a csv file of a binary file. The L1a files are saved in the "L1a/sci" or
+    "L1a/hk" folder next to the folder of the binary files.
+
+    Parameters
+    ----------
+    in_file_name : str
+        Name of the binary file. Default is None.
+    data_type : str
+        Either "sci" or "hk". Default is "sci".
+
+    Raises
+    ------
+    OSError :
+        If the operating system is not supported.
 
+    Returns
+    -------
+    save_file_name : str
+        Name of the L1a csv file.
+    """
     # Split the file name in a folder and a file name
     # Format filenames and folder names for the different operating systems
     if platform.system() == "Linux":
-        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + "_sci_output_L1a.csv"
+        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + f"_{data_type}_output_L1a.csv"
         output_folder_name_list = os.path.dirname(os.path.normpath(in_file_name)).split("/")
-        output_folder_name = "/".join(output_folder_name_list[:-2]) + "/L1a/sci/" + output_folder_name_list[-1]
+        output_folder_name = "/".join(output_folder_name_list[:-2]) + f"/L1a/{data_type}/" + output_folder_name_list[-1]
         save_file_name = output_folder_name + "/" + output_file_name
     elif platform.system() == "Windows":
-        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + "_sci_output_L1a.csv"
+        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + f"_{data_type}_output_L1a.csv"
         output_folder_name_list = os.path.dirname(os.path.normpath(in_file_name)).split("\\")
-        output_folder_name = "\\".join(output_folder_name_list[:-2]) + "\\L1a\\sci\\" + output_folder_name_list[-1]
+        output_folder_name = "\\".join(output_folder_name_list[:-2]) + f"\\L1a\\{data_type}\\" + output_folder_name_list[-1]
         save_file_name = output_folder_name + "\\" + output_file_name
     elif platform.system() == "Darwin":
-        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + "_sci_output_L1a.csv"
+        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + f"_{data_type}_output_L1a.csv"
         output_folder_name_list = os.path.dirname(os.path.normpath(in_file_name)).split("/")
-        output_folder_name = "/".join(output_folder_name_list[:-2]) + "/L1a/sci/" + output_folder_name_list[-1]
+        output_folder_name = "/".join(output_folder_name_list[:-2]) + f"/L1a/{data_type}/" + output_folder_name_list[-1]
         save_file_name = output_folder_name + "/" + output_file_name
     else:
         raise OSError("The operating system is not supported.")
 
-    # Check if the save folder exists, if not then create it
-    if not Path(output_folder_name).exists():
-        Path(output_folder_name).mkdir(parents=True, exist_ok=True)
+    return save_file_name
 
-    if "payload" in in_file_name:
-        with open(save_file_name, "w", newline="") as file:
-            dict_writer = csv.DictWriter(
-                file,
-                fieldnames=(
-                    "Date",
-                    "TimeStamp",
-                    "IsCommanded",
-                    "Channel1",
-                    "Channel2",
-                    "Channel3",
-                    "Channel4",
-                ),
-            )
-            dict_writer.writeheader()
-            try:
-                dict_writer.writerows(
-                    {
-                        "Date": datetime.datetime.utcfromtimestamp(sci_packet_cls.Date),
-                        "TimeStamp": sci_packet_cls.timestamp / 1e3,
-                        "IsCommanded": sci_packet_cls.is_commanded,
-                        "Channel1": np.round(
-                            sci_packet_cls.channel1, decimals=number_of_decimals
-                        ),
-                        "Channel2": np.round(
-                            sci_packet_cls.channel2, decimals=number_of_decimals
-                        ),
-                        "Channel3": np.round(
-                            sci_packet_cls.channel3, decimals=number_of_decimals
-                        ),
-                        "Channel4": np.round(
-                            sci_packet_cls.channel4, decimals=number_of_decimals
-                        ),
-                    }
-                    for sci_packet_cls in packets
-                )
-            except Exception as e:
-                # Print the exception in red color
-                print(f"\n\033[91m{e}\033[00m\n")
-                print(f"Number of science packets found in the file \033[96m {in_file_name}\033[0m "
-                      f"is just \033[91m {len(packets)}\033[0m. \n \033[96m Check the datafile to "
-                      "see if the datafile has proper data.\033[0m \n ")
+
+# Thread which saves the L1a files in the background, and the files it hasn't saved yet. A single
+# thread saves the files in the order they were given.
+l1a_writer = None
+l1a_pending = []
+
+
+def save_l1a_npz(df=None, save_file_name=None):
+    """
+    Saves a DataFrame in the binary columnar L1a format, next to its csv file and with the same
+    name: a ".npz" file with one numpy array per column, and a ".json" file with the name, data
+    type and time zone of each column. Dates are saved as nanoseconds since the epoch, so that the
+    DataFrame is loaded back with the same values, data types and time zones.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science or housekeeping data. Default is None.
+    save_file_name : str
+        Name of the csv file. Default is None.
+
+    Raises
+    ------
+    TypeError :
+        If a column isn't a number, a boolean or a date.
+    """
+    arrays = {}
+    schema = {"format": "lxi_l1a_npz", "version": 1, "n_rows": len(df), "columns": []}
+
+    def pack(values, key):
+        if pd.api.types.is_datetime64_any_dtype(values.dtype):
+            values = pd.DatetimeIndex(values)
+            arrays[key] = values.asi8
+            return {"kind": "datetime", "tz": None if values.tz is None else str(values.tz)}
+        values = np.asarray(values)
+        if values.dtype.kind not in "biuf":
+            raise TypeError(f"Can't save a column of type {values.dtype} in the npz format.")
+        arrays[key] = values
+        return {"kind": "numpy", "dtype": values.dtype.str}
+
+    for ii, name in enumerate(df.columns):
+        schema["columns"].append({"name": name, **pack(df[name], f"column_{ii}")})
+    # A default index (0, 1, 2, ...) isn't saved
+    if df.index.equals(pd.RangeIndex(len(df))):
+        schema["index"] = None
     else:
-        default_time = datetime.datetime(
-            2024, 1, 1, 0, 0, 0, tzinfo=pytz.timezone("UTC")
-        )
-        with open(save_file_name, "w", newline="") as file:
-            dict_writer = csv.DictWriter(
-                file,
-                fieldnames=(
-                    "Date",
-                    "TimeStamp",
-                    "IsCommanded",
-                    "Channel1",
-                    "Channel2",
-                    "Channel3",
-                    "Channel4",
-                ),
-            )
-            dict_writer.writeheader()
-            try:
-                dict_writer.writerows(
-                    {
-                        "Date": default_time + datetime.timedelta(milliseconds=sci_packet_cls.timestamp),
-                        "TimeStamp": sci_packet_cls.timestamp,
-                        "IsCommanded": sci_packet_cls.is_commanded,
-                        "Channel1": np.round(
-                            sci_packet_cls.channel1, decimals=number_of_decimals
-                        ),
-                        "Channel2": np.round(
-                            sci_packet_cls.channel2, decimals=number_of_decimals
-                        ),
-                        "Channel3": np.round(
-                            sci_packet_cls.channel3, decimals=number_of_decimals
-                        ),
-                        "Channel4": np.round(
-                            sci_packet_cls.channel4, decimals=number_of_decimals
-                        ),
-                    }
-                    for sci_packet_cls in packets
-                )
-            except Exception as e:
-                # Print the exception in red color
-                print(f"\n\033[91m{e}\033[00m\n")
-                print(f"Number of science packets found in the file \033[96m {in_file_name}\033[0m "
-                      f"is just \033[91m {len(packets)}\033[0m. \n \033[96m Check the datafile to "
-                      "see if the datafile has proper data.\033[0m \n ")
+        schema["index"] = {"name": df.index.name, **pack(df.index, "index")}
 
-    # Read the saved file data in a dataframe
-    df = pd.read_csv(save_file_name)
+    base_name = os.path.splitext(save_file_name)[0]
+    np.savez(base_name + ".npz", **arrays)
+    with open(base_name + ".json", "w") as file:
+        json.dump(schema, file, indent=4)
 
-    # Convert the date column to datetime
-    df["Date"] = pd.to_datetime(df["Date"])
 
-    # Set index to the date
-    df.set_index("Date", inplace=False)
+def read_l1a_npz(file_name=None):
+    """
+    Reads a DataFrame saved by save_l1a_npz.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the ".npz" file, or of the csv file next to it. Default is None.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The science or housekeeping data.
+    """
+    base_name = os.path.splitext(file_name)[0]
+    with open(base_name + ".json", "r") as file:
+        schema = json.load(file)
+
+    def unpack(values, column):
+        if column["kind"] == "datetime":
+            values = pd.DatetimeIndex(values.view("datetime64[ns]"))
+            if column["tz"] is not None:
+                values = values.tz_localize("UTC").tz_convert(column["tz"])
+        return values
+
+    with np.load(base_name + ".npz") as arrays:
+        df = pd.DataFrame(
+            {
+                column["name"]: unpack(arrays[f"column_{ii}"], column)
+                for ii, column in enumerate(schema["columns"])
+            }
+        )
+        if schema["index"] is not None:
+            df.index = unpack(arrays["index"], schema["index"])
+            df.index.name = schema["index"]["name"]
+
+    return df
+
+
+def find_l1a_npz(file_name=None):
+    """
+    Checks if a csv file has a file in the columnar L1a format next to it, which isn't older than
+    the csv file.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the csv file. Default is None.
+
+    Returns
+    -------
+    npz_file_name : str or None
+        Name of the ".npz" file, or None if there is no such file.
+    """
+    base_name = os.path.splitext(file_name)[0]
+    npz_file_name = base_name + ".npz"
+    if not (Path(npz_file_name).is_file() and Path(base_name + ".json").is_file()):
+        return None
+    if Path(file_name).is_file() and os.path.getmtime(npz_file_name) < os.path.getmtime(file_name):
+        return None
+    return npz_file_name
+
+
+def is_l1a_file_current(in_file_name=None, l1a_file_name=None):
+    """
+    Checks if the L1a csv file of a binary file exists and isn't older than the binary file, i.e.
+    if it was saved from the binary file as it is now.
+
+    Parameters
+    ----------
+    in_file_name : str
+        Name of the binary file. Default is None.
+    l1a_file_name : str
+        Name of the L1a csv file, see get_l1a_file_name. Default is None.
+
+    Returns
+    -------
+    is_current : bool
+        True if the L1a file is up to date.
+    """
+    try:
+        return os.path.getmtime(l1a_file_name) >= os.path.getmtime(in_file_name)
+    except OSError:
+        return False
+
+
+def write_l1a_file(df=None, save_file_name=None, columnar=True):
+    """
+    Writes a DataFrame to an L1a csv file and, if columnar is True, also in the columnar L1a
+    format (see save_l1a_npz). The columnar file is written after the csv file, so that it is the
+    newer one of the two.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science or housekeeping data. Default is None.
+    save_file_name : str
+        Name of the csv file. Default is None.
+    columnar : bool
+        If True, the columnar file is also written. Default is True.
+    """
+    df.to_csv(save_file_name, index=False)
+    if columnar:
+        try:
+            save_l1a_npz(df=df, save_file_name=save_file_name)
+        except TypeError as e:
+            logger.warning(f"{save_file_name} was not saved in the npz format: {e}")
+
+
+def save_l1a_file(df=None, save_file_name=None, background=False, columnar=True):
+    """
+    Saves a DataFrame to an L1a csv file. The DataFrame must not be modified until it is saved.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science or housekeeping data. Default is None.
+    save_file_name : str
+        Name of the csv file. Default is None.
+    background : bool
+        If True, the file is saved by a background thread and the function returns right away.
+        wait_for_l1a_files waits until the files are saved. Default is False.
+    columnar : bool
+        If True, the data is also saved in the columnar L1a format next to the csv file, see
+        save_l1a_npz. Default is True.
+
+    Returns
+    -------
+    future : concurrent.futures.Future or None
+        The saving of the file if it is saved in the background, else None.
+    """
+    global l1a_writer
+
+    # Check if the save folder exists, if not then create it
+    Path(save_file_name).parent.mkdir(parents=True, exist_ok=True)
+
+    if not background:
+        write_l1a_file(df=df, save_file_name=save_file_name, columnar=columnar)
+        return None
+
+    if l1a_writer is None:
+        l1a_writer = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="l1a_writer"
+        )
+    future = l1a_writer.submit(
+        write_l1a_file, df=df, save_file_name=save_file_name, columnar=columnar
+    )
+    l1a_pending.append((future, save_file_name))
+    return future
+
+
+def wait_for_l1a_files():
+    """
+    Waits until all the L1a files given to save_l1a_file with background=True are saved. The files
+    which couldn't be saved are logged and printed.
+
+    Returns
+    -------
+    saved_files : list
+        Names of the files which were saved.
+    """
+    saved_files = []
+    while l1a_pending:
+        future, save_file_name = l1a_pending.pop(0)
+        try:
+            future.result()
+            saved_files.append(save_file_name)
+        except Exception as e:
+            logger.error(f"Could not save the L1a file {save_file_name}: {e}")
+            print(f"\n\033[91m Could not save the L1a file {save_file_name}: {e}\033[00m\n")
+
+    return saved_files
+
+
+# Threads which copy the binary files to the L0 folder in the background, and the copies they
+# haven't finished yet. A copy is removed from l0_pending when it finishes, see report_l0_file.
+l0_archiver = None
+l0_pending = []
+l0_pending_lock = threading.Lock()
+l0_archive_workers = 4
+
+
+def get_l0_folder_name(in_file_name=None):
+    """
+    Gets the name of the L0 folder of a binary file. The binary files are archived in the "L0"
+    folder next to the folder of the binary files.
+
+    Parameters
+    ----------
+    in_file_name : str
+        Name of the binary file. Default is None.
+
+    Raises
+    ------
+    OSError :
+        If the operating system is not supported.
+
+    Returns
+    -------
+    folder_name : str
+        Name of the L0 folder.
+    """
+    if platform.system() == "Linux" or platform.system() == "Darwin":
+        folder_name_list = in_file_name.split("/")[:-1]
+        folder_name = "/".join(folder_name_list[:-2]) + "/L0/" + folder_name_list[-1]
+    elif platform.system() == "Windows":
+        folder_name_list = in_file_name.split("\\")[:-1]
+        folder_name = "\\".join(folder_name_list[:-2]) + "\\L0\\" + folder_name_list[-1]
+    else:
+        raise OSError("Operating system not supported.")
+
+    return folder_name
+
+
+def clone_file(src=None, dst=None):
+    """
+    Makes a copy-on-write clone (reflink) of a file, which shares the data of the file until one
+    of them is modified. This only works on Linux, on file systems which support it (e.g. Btrfs
+    and XFS).
+
+    Parameters
+    ----------
+    src : str
+        Name of the file. Default is None.
+    dst : str
+        Name of the clone. Default is None.
+
+    Raises
+    ------
+    OSError :
+        If the file couldn't be cloned.
+    """
+    if platform.system() != "Linux":
+        raise OSError("Reflinks are only supported on Linux.")
+
+    import fcntl
+
+    # ioctl request which clones a whole file, from linux/fs.h
+    FICLONE = 0x40049409
+    with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+        fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
+
+
+def archive_l0_file(file_name=None, folder_name=None, link=None):
+    """
+    Copies a binary file to its L0 folder, unless the same file is already there. The file in the
+    L0 folder is the same if it has the same size and either the same modification time (which
+    shutil.copy2 keeps) or the same hash. The copy is written next to its final name first, so an
+    interrupted copy never looks like an archived file.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the binary file. Default is None.
+    folder_name : str
+        The L0 folder. If None, the folder is found with get_l0_folder_name. Default is None.
+    link : str
+        How the file is put in the L0 folder: None to copy it, "hardlink" to make a hard link to
+        it, or "reflink" to make a copy-on-write clone of it. If the file can't be linked, e.g.
+        because the L0 folder is on another file system, it is copied. Note that a hard link is
+        the file itself, so it also changes if the file is appended to. Default is None.
+
+    Raises
+    ------
+    ValueError :
+        If link is not None, "hardlink" or "reflink".
+
+    Returns
+    -------
+    method : str
+        "skipped" if the file was already archived, else "copy", "hardlink" or "reflink".
+    """
+    if link not in (None, "hardlink", "reflink"):
+        raise ValueError(f"link should be None, 'hardlink' or 'reflink', not {link}.")
+    if folder_name is None:
+        folder_name = get_l0_folder_name(in_file_name=file_name)
+
+    Path(folder_name).mkdir(parents=True, exist_ok=True)
+    dst = os.path.join(folder_name, os.path.basename(file_name))
+    if os.path.exists(dst):
+        if os.path.samefile(file_name, dst):
+            return "skipped"
+        src_stat = os.stat(file_name)
+        dst_stat = os.stat(dst)
+        if src_stat.st_size == dst_stat.st_size and (
+            src_stat.st_mtime_ns == dst_stat.st_mtime_ns
+            or get_file_hash(file_name=file_name) == get_file_hash(file_name=dst)
+        ):
+            return "skipped"
+
+    tmp = dst + ".part"
+    Path(tmp).unlink(missing_ok=True)
+    method = "copy"
+    try:
+        if link == "hardlink":
+            os.link(file_name, tmp)
+            method = "hardlink"
+        elif link == "reflink":
+            clone_file(src=file_name, dst=tmp)
+            method = "reflink"
+    except OSError as e:
+        logger.info(f"Could not {link} {file_name} to {folder_name}, copying it instead: {e}")
+        Path(tmp).unlink(missing_ok=True)
+    if method == "copy":
+        shutil.copy2(file_name, tmp)
+    os.replace(tmp, dst)
+
+    return method
+
+
+def archive_l0_files(file_list=None, link=None, background=False):
+    """
+    Archives binary files in their L0 folders, see archive_l0_file.
+
+    Parameters
+    ----------
+    file_list : list
+        Names of the binary files. Default is None.
+    link : str
+        How the files are put in the L0 folders, see archive_l0_file. Default is None.
+    background : bool
+        If True, the files are archived by background threads and the function returns right
+        away. wait_for_l0_files waits until the files are archived. Default is False.
+
+    Returns
+    -------
+    methods : list
+        How each file was archived, see archive_l0_file. Empty if the files are archived in the
+        background.
+    """
+    global l0_archiver
+
+    if not background:
+        methods = [archive_l0_file(file_name=file_name, link=link) for file_name in file_list]
+        logger.info(
+            f"Archived {len(methods) - methods.count('skipped')} of {len(methods)} files in L0"
+        )
+        return methods
+
+    if l0_archiver is None:
+        l0_archiver = concurrent.futures.ThreadPoolExecutor(
+            max_workers=l0_archive_workers, thread_name_prefix="l0_archiver"
+        )
+    for file_name in file_list:
+        future = l0_archiver.submit(archive_l0_file, file_name=file_name, link=link)
+        with l0_pending_lock:
+            l0_pending.append((future, file_name))
+        future.add_done_callback(functools.partial(report_l0_file, file_name=file_name))
+    return []
+
+
+def report_l0_file(future=None, file_name=None):
+    """
+    Called when the archiving of a file in the background finishes. The file is removed from the
+    pending copies, and is logged and printed if it couldn't be archived, so that the failures are
+    seen even if nothing waits for the copies.
+
+    Parameters
+    ----------
+    future : concurrent.futures.Future
+        The archiving of the file. Default is None.
+    file_name : str
+        Name of the binary file. Default is None.
+    """
+    with l0_pending_lock:
+        if (future, file_name) in l0_pending:
+            l0_pending.remove((future, file_name))
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Could not archive {file_name} in L0: {error}")
+        print(f"\n\033[91m Could not archive {file_name} in L0: {error}\033[00m\n")
+
+
+def wait_for_l0_files():
+    """
+    Waits until all the files given to archive_l0_files with background=True are archived. The
+    files which couldn't be archived are logged and printed by report_l0_file.
+
+    Returns
+    -------
+    archived_files : list
+        Names of the files which were archived or were already in the L0 folder.
+    """
+    with l0_pending_lock:
+        pending = list(l0_pending)
+
+    archived_files = []
+    for future, file_name in pending:
+        try:
+            future.result()
+            archived_files.append(file_name)
+        except Exception:
+            pass
+
+    return archived_files
+
+
+def create_df_sci(packets=None, in_file_name=None, number_of_decimals=6):
+    """
+    Creates the DataFrame of the science packets decoded from a binary file. The DataFrame has
+    the same columns as the L1a csv file.
+
+    Parameters
+    ----------
+    packets : numpy.recarray
+        Block of the science packets, see decode_sci_frames.
+    in_file_name : str
+        Name of the binary file the packets were read from. Default is None.
+    number_of_decimals : int
+        Number of decimals of the voltages. Default is 6.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        DataFrame of the science packets.
+    """
+    input_file_name = in_file_name
+    n_packets = len(packets["timestamp"])
+
+    if "payload" in in_file_name:
+        # The packets after a PIT time stamp which isn't a valid date are left out
+        Date = packets["Date"]
+        is_valid = (Date >= pd.Timestamp.min.timestamp()) & (Date <= pd.Timestamp.max.timestamp())
+        if not is_valid.all():
+            n_packets = int(np.argmin(is_valid))
+            # Print the exception in red color
+            print(f"\n\033[91mInvalid PIT time stamp {Date[n_packets]}\033[00m\n")
+            print(f"Number of science packets found in the file \033[96m {in_file_name}\033[0m "
+                  f"is just \033[91m {len(packets['Date'])}\033[0m. \n \033[96m Check the "
+                  "datafile to see if the datafile has proper data.\033[0m \n ")
+        Date = unix_to_datetime(Date[:n_packets])
+        TimeStamp = packets["timestamp"][:n_packets] / 1e3
+    else:
+        default_time = pd.Timestamp("2024-01-01", tz="UTC")
+        Date = default_time + pd.to_timedelta(packets["timestamp"], unit="ms")
+        TimeStamp = packets["timestamp"]
+
+    df = pd.DataFrame(
+        {
+            "Date": Date,
+            "TimeStamp": TimeStamp,
+            "IsCommanded": packets["is_commanded"][:n_packets],
+            "Channel1": np.round(packets["channel1"][:n_packets], decimals=number_of_decimals),
+            "Channel2": np.round(packets["channel2"][:n_packets], decimals=number_of_decimals),
+            "Channel3": np.round(packets["channel3"][:n_packets], decimals=number_of_decimals),
+            "Channel4": np.round(packets["channel4"][:n_packets], decimals=number_of_decimals),
+        }
+    )
 
     # For each row, get the time difference between the current row and the last row
     try:
@@ -543,8 +1816,39 @@ def read_binary_data_sci(
         time_diff_seconds = 0
         logger.warning(f"For the scicence data, the time difference between the current row and the last row is 0 for {input_file_name}.")
 
-    # Save the dataframe to a csv file
-    df.to_csv(save_file_name, index=False)
+    return df
+
+
+def save_binary_data_sci(
+    packets=None, in_file_name=None, number_of_decimals=6, save_in_background=False
+):
+    """
+    Saves the science packets decoded from a binary file to the L1a csv file.
+
+    Parameters
+    ----------
+    packets : numpy.recarray
+        Block of the science packets, see decode_sci_frames.
+    in_file_name : str
+        Name of the binary file the packets were read from. Default is None.
+    number_of_decimals : int
+        Number of decimals to save. Default is 6.
+    save_in_background : bool
+        If True, the csv file is saved in the background, see save_l1a_file. Default is False.
+
+    Returns
+    -------
+        df : pandas.DataFrame
+            DataFrame of the science packet.
+        save_file_name : str
+            Name of the output file.
+    """
+    df = create_df_sci(
+        packets=packets, in_file_name=in_file_name, number_of_decimals=number_of_decimals
+    )
+
+    save_file_name = get_l1a_file_name(in_file_name=in_file_name, data_type="sci")
+    save_l1a_file(df=df, save_file_name=save_file_name, background=save_in_background)
 
     return df, save_file_name
 
@@ -553,6 +1857,8 @@ def read_binary_data_hk(
     in_file_name=None,
     save_file_name="../data/processed/hk/output_hk.csv",
     number_of_decimals=6,
+    use_mmap=False,
+    last_update=False,
 ):
     """
     Reads housekeeping packet of the binary data from a file and saves it to a csv file.
@@ -565,6 +1871,12 @@ def read_binary_data_hk(
         Name of the output file. Default is "output_hk.csv".
     number_of_decimals : int
         Number of decimals to save. Default is 6.
+    use_mmap : bool
+        If True, the file is memory-mapped and the frames are decoded without copying it. Default
+        is False.
+    last_update : bool
+        If True, a "<channel>_last_update" column is added for each housekeeping channel, see
+        save_binary_data_hk. Default is False.
 
     Raises
     ------
@@ -611,117 +1923,117 @@ def read_binary_data_hk(
         os.path.getctime(input_file_name)
     )
 
-    with open(input_file_name, "rb") as file:
-        raw = file.read()
+    stats = new_decode_stats(file_name=in_file_name)
+    start_time = time.perf_counter()
+    with open_raw_data(in_file_name=input_file_name, use_mmap=use_mmap) as raw:
+        if "payload" in in_file_name:
+            packets = decode_hk_frames(find_pit_frames(raw=raw, stats=stats))
+        else:
+            # Print in green color that the gsfc code is running
+            print("\033[92mRunning the GSFC code for Housekeeping.\033[0m")
+            packet_start = find_gsfc_packets(raw=raw)
+            add_gsfc_stats(stats=stats, packet_start=packet_start, n_bytes=len(raw))
+            packets = read_gsfc_packets(
+                raw=raw, packet_cls=hk_packet_cls_gsfc, packet_start=packet_start
+            )
+    stats["n_hk"] = len(packets)
+    stats["decode_time"] = time.perf_counter() - start_time
+    logger.info(f"Decoder statistics of {in_file_name}: {stats}")
+
+    return save_binary_data_hk(
+        packets=packets,
+        in_file_name=in_file_name,
+        number_of_decimals=number_of_decimals,
+        last_update=last_update,
+    )
 
-    index = 0
-    packets = []
 
-    if "payload" in in_file_name:
-        while index < len(raw) - 28:
-            if (raw[index:index + 2] == sync_pit and raw[index + 12:index + 16] == sync_lxi):
-                # print(f"{index} d ==> {raw[index:index + 28].hex()}\n")
-                packets.append(hk_packet_cls.from_bytes(raw[index:index + 28]))
-                index += 28
-                continue
-            elif (raw[index:index + 2] == sync_pit and raw[index + 12:index + 16] != sync_lxi):
-                # Ignore the last packet
-                if index >= len(raw) - 28 - 16:
-                    # NOTE: This is a temporary fix. The last packet is ignored because the last
-                    # packet often isn't complete. Need to find a better solution. Check the function
-                    # read_binary_data_sci for the same.
-                    index += 28
-                    continue
-                # Check if sync_lxi is present in the next 16 bytes
-                if sync_lxi in raw[index + 12:index + 28] and index + 28 < len(raw):
-                    # Find the index of sync_lxi
-                    index_sync = index + 12 + raw[index + 12:index + 28].index(sync_lxi)
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index_sync:index + 28] +
-                                  raw[index + 12 + 28:index_sync + 28])
-                    # Check if the packet length is 28
-                    if len(new_packet) != 28:
-                        # Print the packet length
-                        print(f"The packet length is {len(new_packet)}, index = {index} and length of raw is {len(raw)}")
-                        print(f"{index} 1 ==> {new_packet.hex()}\n")
-                        # If the index + 28 is greater than the length of the raw data, then break
-                        if index + 28 > len(raw):
-                            break
-                    # print(f"{index} 1 ==> {new_packet.hex()}\n")
-                    packets.append(hk_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                # Check if raw[index - 3:index] + raw[index+12:index+13] == sync_lxi
-                elif raw[index - 3:index] + raw[index + 12:index + 13] == sync_lxi:
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index - 3:index] +
-                                  raw[index + 12:index + 25])
-                    # print(f"{index} 2 ==> {new_packet.hex()}\n")
-                    packets.append(hk_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                # Check if raw[index - 2:index] + raw[index+12:index+14] == sync_lxi
-                elif raw[index - 2:index] + raw[index + 12:index + 14] == sync_lxi:
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index - 2:index] +
-                                  raw[index + 13:index + 26])
-                    # print(f"{index} 3 ==> {new_packet.hex()}\n")
-                    packets.append(hk_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                # Check if raw[index - 1:index] + raw[index+12:index+15] == sync_lxi
-                elif (raw[index - 1:index] + raw[index + 12:index + 15] == sync_lxi):
-                    # Reorder the packet
-                    new_packet = (raw[index:index + 12] +
-                                  raw[index - 1:index] +
-                                  raw[index + 14:index + 27])
-                    # print(f"{index} 4 ==> {new_packet.hex()}\n")
-                    packets.append(hk_packet_cls.from_bytes(new_packet))
-                    index += 28
-                    continue
-                index += 28
-                continue
-            index += 28
-    else:
-        # Print in green color that the gsfc code is running
-        print("\033[92mRunning the GSFC code for Housekeeping.\033[0m")
-        while index < len(raw) - 16:
-            if raw[index:index + 4] == sync_lxi:
-                packets.append(hk_packet_cls_gsfc.from_bytes(raw[index:index + 16]))
-                index += 16
-                continue
-            index += 1
-    # Get only those packets that have the HK data
-    hk_idx = []
-    for idx, hk_packet in enumerate(packets):
-        if hk_packet is not None:
-            hk_idx.append(idx)
-
-    Date = np.full(len(hk_idx), np.nan)
-    TimeStamp = np.full(len(hk_idx), np.nan)
-    HK_id = np.full(len(hk_idx), np.nan)
-    PinPullerTemp = np.full(len(hk_idx), np.nan)
-    OpticsTemp = np.full(len(hk_idx), np.nan)
-    LEXIbaseTemp = np.full(len(hk_idx), np.nan)
-    HVsupplyTemp = np.full(len(hk_idx), np.nan)
-    V_Imon_5_2 = np.full(len(hk_idx), np.nan)
-    V_Imon_10 = np.full(len(hk_idx), np.nan)
-    V_Imon_3_3 = np.full(len(hk_idx), np.nan)
-    AnodeVoltMon = np.full(len(hk_idx), np.nan)
-    V_Imon_28 = np.full(len(hk_idx), np.nan)
-    ADC_Ground = np.full(len(hk_idx), np.nan)
-    Cmd_count = np.full(len(hk_idx), np.nan)
-    Pinpuller_Armed = np.full(len(hk_idx), np.nan)
-    Unused1 = np.full(len(hk_idx), np.nan)
-    Unused2 = np.full(len(hk_idx), np.nan)
-    HVmcpAuto = np.full(len(hk_idx), np.nan)
-    HVmcpMan = np.full(len(hk_idx), np.nan)
-    DeltaEvntCount = np.full(len(hk_idx), np.nan)
-    DeltaDroppedCount = np.full(len(hk_idx), np.nan)
-    DeltaLostEvntCount = np.full(len(hk_idx), np.nan)
+def ffill_hk_data(df=None, channels=None, add_last_update=False):
+    """
+    Replaces the NaNs of the housekeeping table with the last value before them. Each packet only
+    has the value of one of the housekeeping channels, so without this most of the table would be
+    NaN. All the columns are filled at once.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The housekeeping table, with the time of each row in the "Date" column (seconds since the
+        epoch). Default is None.
+    channels : list
+        Names of the housekeeping channels, i.e. the columns with one value every few rows.
+        Default is None.
+    add_last_update : bool
+        If True, a "<channel>_last_update" column is added for each channel, with the "Date" of the
+        packet the value of the channel comes from. This tells the new values apart from the filled
+        ones. Default is False.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The filled housekeeping table.
+    """
+    if add_last_update:
+        last_update = pd.DataFrame(
+            {
+                f"{channel}_last_update": df["Date"].where(df[channel].notna()).ffill()
+                for channel in channels
+            }
+        )
+
+    df = df.ffill()
+
+    if add_last_update:
+        df = pd.concat([df, last_update], axis=1)
+    return df
+
+
+def create_df_hk(packets=None, in_file_name=None, last_update=False):
+    """
+    Computes the housekeeping values from the housekeeping packets decoded from a binary file and
+    creates their DataFrame. The DataFrame has the same columns as the L1a csv file, and the
+    "Date" column is also its index.
+
+    Parameters
+    ----------
+    packets : numpy.recarray
+        Block of the housekeeping packets, see decode_hk_frames.
+    in_file_name : str
+        Name of the binary file the packets were read from. Default is None.
+    last_update : bool
+        If True, a "<channel>_last_update" column is added for each housekeeping channel with the
+        time the value of the channel was last updated, see ffill_hk_data. Default is False.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        DataFrame of the housekeeping packets.
+    """
+    input_file_name = in_file_name
+
+    n_packets = len(packets["timestamp"])
+
+    Date = np.full(n_packets, np.nan)
+    TimeStamp = np.full(n_packets, np.nan)
+    HK_id = np.full(n_packets, np.nan)
+    PinPullerTemp = np.full(n_packets, np.nan)
+    OpticsTemp = np.full(n_packets, np.nan)
+    LEXIbaseTemp = np.full(n_packets, np.nan)
+    HVsupplyTemp = np.full(n_packets, np.nan)
+    V_Imon_5_2 = np.full(n_packets, np.nan)
+    V_Imon_10 = np.full(n_packets, np.nan)
+    V_Imon_3_3 = np.full(n_packets, np.nan)
+    AnodeVoltMon = np.full(n_packets, np.nan)
+    V_Imon_28 = np.full(n_packets, np.nan)
+    ADC_Ground = np.full(n_packets, np.nan)
+    Cmd_count = np.full(n_packets, np.nan)
+    Pinpuller_Armed = np.full(n_packets, np.nan)
+    Unused1 = np.full(n_packets, np.nan)
+    Unused2 = np.full(n_packets, np.nan)
+    HVmcpAuto = np.full(n_packets, np.nan)
+    HVmcpMan = np.full(n_packets, np.nan)
+    DeltaEvntCount = np.full(n_packets, np.nan)
+    DeltaDroppedCount = np.full(n_packets, np.nan)
+    DeltaLostEvntCount = np.full(n_packets, np.nan)
 
     all_data_dict = {
         "Date": Date,
@@ -780,34 +2092,34 @@ def read_binary_data_hk(
         )
         lxi_unit = 1
 
-    for ii, idx in enumerate(hk_idx):
-        hk_packet = packets[idx]
-        # Convert to seconds from milliseconds for the timestamp
-        if "payload" in in_file_name:
-            all_data_dict["Date"][ii] = hk_packet.Date
-        else:
-            default_time = datetime.datetime(
-                2024, 1, 1, 0, 0, 0, tzinfo=pytz.timezone("UTC")
-            )
-            new_time = default_time + datetime.timedelta(
-                milliseconds=hk_packet.timestamp
-            )
-            all_data_dict["Date"][ii] = new_time.timestamp()
-        all_data_dict["TimeStamp"][ii] = hk_packet.timestamp / 1e3
-        all_data_dict["HK_id"][ii] = hk_packet.hk_id
-        key = str(hk_packet.hk_id)
-        if key in selected_keys:
-            all_data_dict[key][ii] = lmsc.hk_value_comp(
-                ii=ii,
-                vpc=volts_per_count,
-                hk_value=hk_packet.hk_value,
-                hk_id=hk_packet.hk_id,
-                lxi_unit=lxi_unit,
-            )
+    # Convert to seconds from milliseconds for the timestamp
+    if "payload" in in_file_name:
+        all_data_dict["Date"][:] = packets["Date"]
+    else:
+        default_time = datetime.datetime(
+            2024, 1, 1, 0, 0, 0, tzinfo=pytz.timezone("UTC")
+        )
+        all_data_dict["Date"][:] = [
+            (default_time + datetime.timedelta(milliseconds=timestamp)).timestamp()
+            for timestamp in packets["timestamp"].tolist()
+        ]
+    all_data_dict["TimeStamp"][:] = packets["timestamp"] / 1e3
+    all_data_dict["HK_id"][:] = packets["hk_id"]
+
+    # Calibrate all the values at once, then put each of them in the column of its hk_id
+    hk_value_calibrated = lmsc.hk_value_comp_array(
+        vpc=volts_per_count,
+        hk_value=packets["hk_value"],
+        hk_id=packets["hk_id"],
+        lxi_unit=lxi_unit,
+    )
+    for key in selected_keys:
+        is_key = packets["hk_id"] == int(key)
+        all_data_dict[key][is_key] = hk_value_calibrated[is_key]
 
-        all_data_dict["DeltaEvntCount"][ii] = hk_packet.delta_event_count
-        all_data_dict["DeltaDroppedCount"][ii] = hk_packet.delta_drop_event_count
-        all_data_dict["DeltaLostEvntCount"][ii] = hk_packet.delta_lost_event_count
+    all_data_dict["DeltaEvntCount"][:] = packets["delta_event_count"]
+    all_data_dict["DeltaDroppedCount"][:] = packets["delta_drop_event_count"]
+    all_data_dict["DeltaLostEvntCount"][:] = packets["delta_lost_event_count"]
 
     # Create a dataframe with the data
     df_key_list = [
@@ -835,9 +2147,7 @@ def read_binary_data_hk(
         "DeltaLostEvntCount",
     ]
 
-    Date_datetime = [
-        datetime.datetime.utcfromtimestamp(x) for x in all_data_dict["Date"]
-    ]
+    Date_datetime = unix_to_datetime(all_data_dict["Date"])
 
     df = pd.DataFrame(columns=df_key_list)
     for ii, key in enumerate(df_key_list):
@@ -845,11 +2155,7 @@ def read_binary_data_hk(
 
     # For the dataframe, replace the nans with the value from the previous index.
     # This is to make sure that the file isn't inundated with nans.
-    for key in df.keys():
-        for ii in range(1, len(df[key])):
-            if np.isnan(df[key][ii]):
-                # df[key][ii] = df[key][ii - 1]
-                df.loc[ii, key] = df.loc[ii - 1, key]
+    df = ffill_hk_data(df=df, channels=df_key_list[3:19], add_last_update=last_update)
 
     # Set the date column to the Date_datetime
     df["Date"] = Date_datetime
@@ -872,44 +2178,58 @@ def read_binary_data_hk(
 
     # Set Date as the index without replacing the column
     df.set_index("Date", inplace=True, drop=False)
-    # Split the file name in a folder and a file name
-    # Format filenames and folder names for the different operating systems
-    if platform.system() == "Linux":
-        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + "_hk_output_L1a.csv"
-        output_folder_name_list = os.path.dirname(os.path.normpath(in_file_name)).split("/")
-        output_folder_name = "/".join(output_folder_name_list[:-2]) + "/L1a/hk/" + output_folder_name_list[-1]
-        save_file_name = output_folder_name + "/" + output_file_name
-    elif platform.system() == "Windows":
-        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + "_hk_output_L1a.csv"
-        output_folder_name_list = os.path.dirname(os.path.normpath(in_file_name)).split("\\")
-        output_folder_name = "\\".join(output_folder_name_list[:-2]) + "\\L1a\\hk\\" + output_folder_name_list[-1]
-        save_file_name = output_folder_name + "\\" + output_file_name
-    elif platform.system() == "Darwin":
-        output_file_name = os.path.basename(os.path.normpath(in_file_name)).split(".")[0] + "_hk_output_L1a.csv"
-        output_folder_name_list = os.path.dirname(os.path.normpath(in_file_name)).split("/")
-        output_folder_name = "/".join(output_folder_name_list[:-2]) + "/L1a/hk/" + output_folder_name_list[-1]
-        save_file_name = output_folder_name + "/" + output_file_name
-    else:
-        raise OSError("Operating system not supported.")
-
-    # Check if the save folder exists, if not then create it
-    if not Path(output_folder_name).exists():
-        Path(output_folder_name).mkdir(parents=True, exist_ok=True)
-
-    # Save the dataframe to a csv file
-    df.to_csv(save_file_name, index=False)
 
-    return df, save_file_name
+    return df
 
 
-def open_file_sci(start_time=None, end_time=None):
-    # define a global variable for the file name
+def save_binary_data_hk(
+    packets=None,
+    in_file_name=None,
+    number_of_decimals=6,
+    last_update=False,
+    save_in_background=False,
+):
+    """
+    Computes the housekeeping values from the housekeeping packets decoded from a binary file and
+    saves them to the L1a csv file.
 
-    file_val = filedialog.askopenfilename(
-        initialdir="../data/data/GSFC/2022_04_29_0900_LEXI_HK_unit1_mcp_unit1_eBox_1800V_hk_/",
-        title="Select file",
-        filetypes=(("csv files", "*.csv"), ("all files", "*.*")),
-    )
+    Parameters
+    ----------
+    packets : numpy.recarray
+        Block of the housekeeping packets, see decode_hk_frames.
+    in_file_name : str
+        Name of the binary file the packets were read from. Default is None.
+    number_of_decimals : int
+        Number of decimals to save. Default is 6.
+    last_update : bool
+        If True, a "<channel>_last_update" column is added for each housekeeping channel with the
+        time the value of the channel was last updated, see ffill_hk_data. Default is False.
+    save_in_background : bool
+        If True, the csv file is saved in the background, see save_l1a_file. Default is False.
+
+    Returns
+    -------
+        df : pandas.DataFrame
+            DataFrame of the housekeeping packet.
+        save_file_name : str
+            Name of the output file.
+    """
+    df = create_df_hk(packets=packets, in_file_name=in_file_name, last_update=last_update)
+
+    save_file_name = get_l1a_file_name(in_file_name=in_file_name, data_type="hk")
+    save_l1a_file(df=df, save_file_name=save_file_name, background=save_in_background)
+
+    return df, save_file_name
+
+
+def open_file_sci(start_time=None, end_time=None):
+    # define a global variable for the file name
+
+    file_val = filedialog.askopenfilename(
+        initialdir="../data/data/GSFC/2022_04_29_0900_LEXI_HK_unit1_mcp_unit1_eBox_1800V_hk_/",
+        title="Select file",
+        filetypes=(("csv files", "*.csv"), ("npz files", "*.npz"), ("all files", "*.*")),
+    )
 
     # Get the file name from the file path for different operating systems
     if platform.system() == "Linux":
@@ -921,6 +2241,8 @@ def open_file_sci(start_time=None, end_time=None):
     else:
         raise OSError("Operating system not supported.")
     global_variables.all_file_details['file_name_sci'] = file_val
+    global_variables.all_file_details.pop("file_sizes", None)
+    global_variables.all_file_details.pop("sci_histograms", None)
 
     df_all_sci, df_slice_sci = read_csv_sci(
         file_val=file_val, t_start=start_time, t_end=end_time
@@ -937,7 +2259,7 @@ def open_file_hk(start_time=None, end_time=None):
     file_val = filedialog.askopenfilename(
         initialdir="../data/processed_data/hk/",
         title="Select file",
-        filetypes=(("csv files", "*.csv"), ("all files", "*.*")),
+        filetypes=(("csv files", "*.csv"), ("npz files", "*.npz"), ("all files", "*.*")),
     )
     
     # Get the file name from the file path for different operating systems
@@ -995,6 +2317,9 @@ def open_file_b(t_start=None, t_end=None):
         df_all_sci,
     ) = read_binary_file(file_val=file_val, t_start=t_start, t_end=t_end)
     global_variables.all_file_details["file_name_b"] = file_name_b
+    global_variables.all_file_details["decode_stats"] = decode_stats
+    global_variables.all_file_details["file_sizes"] = loaded_file_sizes
+    global_variables.all_file_details["sci_histograms"] = sci_histograms
     global_variables.all_file_details["file_name_hk"] = file_name_hk
     global_variables.all_file_details["file_name_sci"] = file_name_sci
 
@@ -1013,7 +2338,15 @@ def open_file_b(t_start=None, t_end=None):
     return file_val
 
 
-def open_file_b_multiple(file_val=None, t_start=None, t_end=None, multiple_files=True):
+def open_file_b_multiple(
+    file_val=None,
+    t_start=None,
+    t_end=None,
+    multiple_files=True,
+    n_workers=1,
+    use_cache=True,
+    archive_in_background=True,
+):
     # Cut path to the file off
     file_name_b = file_val
     # Read the binary file
@@ -1025,9 +2358,18 @@ def open_file_b_multiple(file_val=None, t_start=None, t_end=None, multiple_files
         df_all_hk,
         df_all_sci,
     ) = read_binary_file(
-        file_val=file_val, t_start=t_start, t_end=t_end, multiple_files=multiple_files
+        file_val=file_val,
+        t_start=t_start,
+        t_end=t_end,
+        multiple_files=multiple_files,
+        n_workers=n_workers,
+        use_cache=use_cache,
+        archive_in_background=archive_in_background,
     )
     global_variables.all_file_details["file_name_b"] = file_name_b
+    global_variables.all_file_details["decode_stats"] = decode_stats
+    global_variables.all_file_details["file_sizes"] = loaded_file_sizes
+    global_variables.all_file_details["sci_histograms"] = sci_histograms
     global_variables.all_file_details["file_name_hk"] = file_name_hk
     global_variables.all_file_details["file_name_sci"] = file_name_sci
 
@@ -1046,6 +2388,466 @@ def open_file_b_multiple(file_val=None, t_start=None, t_end=None, multiple_files
     return file_val
 
 
+class binary_file_follower:
+    """
+    Follows a binary file which is still being written, e.g. by PIT during the instrument tests.
+    Each call to read_new_data decodes only the bytes appended to the file since the previous
+    call. The bytes at the end which can't be decoded yet are carried over to the next call, the
+    same way as iter_binary_file does it, so the packets are the same as the ones decoded from the
+    whole file.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the binary file. Default is None.
+    position : int
+        Number of bytes of the file which were already decoded, e.g. the size of the file when it
+        was loaded. The file is followed from the last frame boundary before it. Default is 0.
+    hk_fill : pandas.Series
+        Last values of the housekeeping channels decoded from the file, which the new housekeeping
+        rows are filled with until the channels are updated (see ffill_hk_data). Default is None.
+
+    The decoder statistics of the part of the file which is followed are in "stats", see
+    new_decode_stats.
+    """
+
+    def __init__(self, file_name=None, position=0, hk_fill=None):
+        self.file_name = file_name
+        self.is_payload = "payload" in file_name
+        self.hk_fill = hk_fill
+        self.carry = b""
+        self.stats = new_decode_stats(file_name=file_name)
+        if self.is_payload:
+            # Start at a frame boundary, with the last 3 bytes of the frame before it
+            next_frame = position // 28 * 28
+            self.offset = min(next_frame, 3)
+            self.position = next_frame - self.offset
+        else:
+            # A packet can start in the last 15 bytes, which weren't searched yet
+            self.offset = 0
+            self.position = max(position - 15, 0)
+
+    @property
+    def decoded_size(self):
+        """
+        Number of bytes of the file which were decoded, i.e. the position a new follower of the
+        file carries on from (see position).
+        """
+        if self.is_payload:
+            return self.position - len(self.carry) + self.offset
+        return self.position - len(self.carry) + 15
+
+    def read_new_data(self, final=False):
+        """
+        Decodes the bytes appended to the file since the previous call. If the file got smaller,
+        it was replaced and is followed again from the start.
+
+        Parameters
+        ----------
+        final : bool
+            If True, the file isn't written anymore, so the bytes carried over are decoded too.
+            Default is False.
+
+        Returns
+        -------
+        df_sci : pandas.DataFrame
+            The new science packets, see create_df_sci. None if there isn't any.
+        df_hk : pandas.DataFrame
+            The new housekeeping packets, see create_df_hk. None if there isn't any.
+        """
+        file_size = os.path.getsize(self.file_name)
+        if file_size < self.position:
+            logger.warning(f"{self.file_name} got smaller, following it from the start")
+            self.__init__(file_name=self.file_name)
+        if file_size == self.position and not (final and self.carry):
+            return None, None
+
+        with open(self.file_name, "rb") as file:
+            file.seek(self.position)
+            raw = self.carry + file.read(file_size - self.position)
+        self.stats["n_bytes"] += file_size - self.position
+        self.position = file_size
+
+        start_time = time.perf_counter()
+        packets_sci, packets_hk, self.carry, self.offset = decode_raw_chunk(
+            raw=raw, offset=self.offset, is_payload=self.is_payload, final=final, stats=self.stats
+        )
+        self.stats["decode_time"] += time.perf_counter() - start_time
+        if final:
+            self.carry = b""
+            self.offset = 0
+
+        df_sci = None
+        if len(packets_sci["timestamp"]) > 0:
+            df_sci = create_df_sci(packets=packets_sci, in_file_name=self.file_name)
+
+        df_hk = None
+        if len(packets_hk["timestamp"]) > 0:
+            df_hk = create_df_hk(packets=packets_hk, in_file_name=self.file_name)
+            # Carry on filling the channels from the rows decoded before
+            if self.hk_fill is not None:
+                df_hk = df_hk.fillna(self.hk_fill)
+            self.hk_fill = df_hk[hk_channels].iloc[-1]
+
+        return df_sci, df_hk
+
+
+# Names of the housekeeping channels, i.e. the columns of the housekeeping data which are filled
+# from the rows before them
+hk_channels = [
+    "PinPullerTemp",
+    "OpticsTemp",
+    "LEXIbaseTemp",
+    "HVsupplyTemp",
+    "+5.2V_Imon",
+    "+10V_Imon",
+    "+3.3V_Imon",
+    "AnodeVoltMon",
+    "+28V_Imon",
+    "ADC_Ground",
+    "Cmd_count",
+    "Pinpuller_Armed",
+    "Unused1",
+    "Unused2",
+    "HVmcpAuto",
+    "HVmcpMan",
+]
+
+# State of the follow mode, see start_follow
+follow_state = {}
+
+
+class followed_file_details(dict):
+    """
+    Class for global_variables.all_file_details while the files of the folder are followed.
+    follow_folder adds the new rows of the data to it as blocks (see add_block), which are only
+    merged with the data when the data is looked up, so following the files costs in proportion
+    to the new data instead of to all the data loaded so far.
+
+    The v*_shift columns of the science data are computed again when the blocks are merged, but
+    only for the channels whose offsets moved since the data was last merged.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.blocks = {}
+        self.counts = {}
+        self.moved_channels = {}
+
+    def add_block(self, key=None, df=None, counts=None, moved_channels=()):
+        """
+        Adds a block of new rows to the data under a key.
+
+        Parameters
+        ----------
+        key : str
+            The key of the data, e.g. "df_all_sci". Default is None.
+        df : pandas.DataFrame
+            The new rows, with the same columns as the data. Default is None.
+        counts : dict
+            Histograms of the voltages of the science data with the new rows, which their offsets
+            are computed from (see get_voltage_histograms). None for the housekeeping data.
+            Default is None.
+        moved_channels : iterable
+            The channels whose offsets moved with the new rows. Default is ().
+        """
+        self.blocks.setdefault(key, []).append(df)
+        if counts is not None:
+            self.counts[key] = counts
+        self.moved_channels.setdefault(key, set()).update(moved_channels)
+
+    def merge_blocks(self, key=None):
+        """
+        Merges the blocks added under a key with the data, see merge_time_blocks.
+
+        Parameters
+        ----------
+        key : str
+            The key of the data. Default is None.
+        """
+        blocks = self.blocks.pop(key, None)
+        if not blocks:
+            return
+        df = merge_time_blocks(blocks=[super().__getitem__(key)] + blocks, column=None)
+        moved_channels = self.moved_channels.pop(key, set())
+        if moved_channels:
+            offsets = get_voltage_offsets(counts=self.counts[key])
+            for channel in moved_channels:
+                df[voltage_shift_columns[channel]] = df[channel] - offsets[channel]
+        super().__setitem__(key, df)
+
+    def __getitem__(self, key):
+        self.merge_blocks(key=key)
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+
+def start_follow(folder_name=None, t_start=None, t_end=None):
+    """
+    Starts following the files of a folder which was loaded with open_file_b_multiple. From then
+    on, follow_folder appends the data written to the files to the data in
+    global_variables.all_file_details. Each file is followed from where the load got to (see
+    loaded_file_sizes), so the data written between the load and this call isn't missed. The
+    files which weren't in the folder when it was loaded are followed from their start.
+
+    Parameters
+    ----------
+    folder_name : str
+        The folder of the binary files. Default is None.
+    t_start : str or datetime.datetime
+        Start time of the sliced data. If None, the slice has no start. Default is None.
+    t_end : str or datetime.datetime
+        End time of the sliced data. If None, all the new data is added to the slice. Default is
+        None.
+
+    Raises
+    ------
+    ValueError :
+        If no data was loaded yet.
+    """
+    if "df_all_sci" not in global_variables.all_file_details:
+        raise ValueError("The data must be loaded before it can be followed.")
+    df_all_sci = global_variables.all_file_details["df_all_sci"]
+    df_all_hk = global_variables.all_file_details["df_all_hk"]
+
+    hk_fill = None
+    if len(df_all_hk) > 0:
+        hk_fill = df_all_hk[hk_channels].iloc[-1]
+
+    file_sizes = global_variables.all_file_details.get("file_sizes")
+    if file_sizes is None:
+        # The data wasn't loaded from the binary files, so they are followed from their size
+        logger.warning(f"The files of {folder_name} weren't loaded, following them from now")
+        print(
+            f"\n \x1b[1;31;255m WARNING: The files of {folder_name} weren't loaded, only the data "
+            "written to them from now on is followed \x1b[0m"
+        )
+
+    follow_state.clear()
+    follow_state["folder_name"] = folder_name
+    if not isinstance(global_variables.all_file_details, followed_file_details):
+        global_variables.all_file_details = followed_file_details(
+            global_variables.all_file_details
+        )
+    follow_state["followers"] = {}
+    with os.scandir(folder_name) as entries:
+        for entry in entries:
+            if entry.name.endswith((".dat", ".txt")) and entry.is_file():
+                file_name = os.path.join(folder_name, entry.name)
+                follow_state["followers"][file_name] = binary_file_follower(
+                    file_name=file_name,
+                    position=(
+                        entry.stat().st_size if file_sizes is None
+                        else file_sizes.get(os.path.abspath(file_name), 0)
+                    ),
+                    hk_fill=hk_fill,
+                )
+
+    follow_state["t_start"] = None if t_start is None else pd.to_datetime(t_start, utc=True)
+    follow_state["t_end"] = None if t_end is None else pd.to_datetime(t_end, utc=True)
+    # Histograms of the voltages, which are updated with the new data instead of being computed
+    # from all the data every time. They start from the histograms of the time windows of the
+    # load (see read_binary_file), if the data was loaded from the binary files. These are only
+    # those of the data as it was loaded, so they aren't used again once rows are appended.
+    df_slice_sci = global_variables.all_file_details["df_slice_sci"]
+    histograms = global_variables.all_file_details.pop("sci_histograms", None)
+    if histograms is None:
+        follow_state["counts_all"] = get_voltage_histograms(df=df_all_sci)
+        follow_state["counts_slice"] = get_voltage_histograms(df=df_slice_sci)
+    else:
+        follow_state["counts_all"] = dict(
+            zip(voltage_channels, histograms["counts"].sum(axis=(0, 1)))
+        )
+        # The slice is the events of the data between its first and last times which aren't
+        # commanded
+        follow_state["counts_slice"] = get_voltage_histograms(df=df_slice_sci)
+        if len(df_slice_sci) > 0:
+            follow_state["counts_slice"] = get_range_histograms(
+                df=df_all_sci,
+                histograms=histograms,
+                t_start=df_slice_sci.index.min(),
+                t_end=df_slice_sci.index.max(),
+                keep_commanded=False,
+            )
+
+    logger.info(f"Following {len(follow_state['followers'])} files in {folder_name}")
+    print(
+        f"\n Following \x1b[1;32;255m {len(follow_state['followers'])} \x1b[0m files in "
+        f"\x1b[1;32;255m {folder_name} \x1b[0m"
+    )
+
+
+def stop_follow():
+    """
+    Stops following the files of the folder, see start_follow. The number of bytes of each file
+    which were decoded is kept in place of the sizes of the files when they were loaded, so that
+    following the files again carries on from there.
+    """
+    if follow_state and isinstance(global_variables.all_file_details, followed_file_details):
+        global_variables.all_file_details["file_sizes"] = {
+            os.path.abspath(file_name): follower.decoded_size
+            for file_name, follower in follow_state["followers"].items()
+        }
+    follow_state.clear()
+
+
+def append_sci_data(details=None, key=None, df_new=None, counts=None):
+    """
+    Appends new science data to the science data with the positions (see read_csv_sci). The
+    positions are only computed for the new rows, which are added as a block to the data (see
+    followed_file_details). The voltages of all the rows are corrected again when the block is
+    merged, if the offsets moved.
+
+    Parameters
+    ----------
+    details : followed_file_details
+        The data, see start_follow. Default is None.
+    key : str
+        The key of the science data, "df_all_sci" or "df_slice_sci". Default is None.
+    df_new : pandas.DataFrame
+        The new science data, with "Date" as its index. Default is None.
+    counts : dict
+        Histograms of the voltages of the science data, see get_voltage_histograms. They are
+        updated with the new data. Default is None.
+    """
+    offsets = get_voltage_offsets(counts=counts)
+    new_counts = get_voltage_histograms(df=df_new)
+    for channel in counts:
+        counts[channel] += new_counts[channel]
+    # The model is got for every poll, so that is only logged at the debug level
+    df_new = add_positions(df=df_new, counts=counts, log_level=logging.DEBUG)
+
+    new_offsets = get_voltage_offsets(counts=counts)
+    details.add_block(
+        key=key,
+        df=df_new,
+        counts=counts,
+        moved_channels=[channel for channel in counts if new_offsets[channel] != offsets[channel]],
+    )
+
+
+def follow_folder():
+    """
+    Decodes the data written to the followed files since the last call, and to the files which
+    were created in the folder since then, and appends it to the data in
+    global_variables.all_file_details (see start_follow). Only the new data is decoded and its
+    positions computed.
+
+    Raises
+    ------
+    ValueError :
+        If the follow mode wasn't started.
+
+    Returns
+    -------
+    n_sci : int
+        Number of new science rows.
+    n_hk : int
+        Number of new housekeeping rows.
+    """
+    if not follow_state or not isinstance(
+        global_variables.all_file_details, followed_file_details
+    ):
+        raise ValueError("The follow mode must be started first, see start_follow.")
+
+    folder_name = follow_state["folder_name"]
+    followers = follow_state["followers"]
+    with os.scandir(folder_name) as entries:
+        for entry in entries:
+            file_name = os.path.join(folder_name, entry.name)
+            if (
+                entry.name.endswith((".dat", ".txt"))
+                and entry.is_file()
+                and file_name not in followers
+            ):
+                followers[file_name] = binary_file_follower(file_name=file_name)
+
+    # Once PIT starts writing a new file, the files before it are complete. Only the PIT files
+    # which start before the newest one, by the start time in their names, are finished, never
+    # the newest one, which PIT may still be writing.
+    start_times = {
+        file_name: get_file_start_time(file_name=file_name)
+        for file_name in followers
+        if os.path.basename(file_name).startswith("payload_lexi_")
+    }
+    start_times = {
+        file_name: start_time for file_name, start_time in start_times.items()
+        if start_time is not None
+    }
+    newest_start_time = max(start_times.values(), default=None)
+
+    df_sci_list = []
+    df_hk_list = []
+    for file_name, follower in followers.items():
+        df_sci, df_hk = follower.read_new_data(
+            final=file_name in start_times and start_times[file_name] < newest_start_time
+        )
+        if df_sci is not None:
+            df_sci_list.append(df_sci)
+        if df_hk is not None:
+            df_hk_list.append(df_hk)
+
+    t_start = follow_state["t_start"]
+    t_end = follow_state["t_end"]
+    n_sci = 0
+    n_hk = 0
+    if df_sci_list:
+        # Same as the data read by read_csv_sci
+        df_sci = pd.concat(df_sci_list, ignore_index=True)
+        df_sci["Date"] = pd.to_datetime(df_sci["Date"], utc=True)
+        df_sci = sort_time_block(df=df_sci.set_index("Date"))
+
+        # Same rows as the ones read_binary_file keeps
+        df_sci = df_sci[
+            (df_sci["Channel1"] > 0)
+            & (df_sci["Channel2"] > 0)
+            & (df_sci["Channel3"] > 0)
+            & (df_sci["Channel4"] > 0)
+        ]
+        n_sci = len(df_sci)
+        if n_sci > 0:
+            append_sci_data(
+                details=global_variables.all_file_details,
+                key="df_all_sci",
+                df_new=df_sci.copy(),
+                counts=follow_state["counts_all"],
+            )
+            df_sci = df_sci[~df_sci["IsCommanded"]].loc[t_start:t_end]
+            if len(df_sci) > 0:
+                append_sci_data(
+                    details=global_variables.all_file_details,
+                    key="df_slice_sci",
+                    df_new=df_sci.copy(),
+                    counts=follow_state["counts_slice"],
+                )
+
+    if df_hk_list:
+        # Same as the data read by read_csv_hk
+        df_hk = pd.concat(df_hk_list).reset_index(drop=True)
+        df_hk["Date"] = pd.to_datetime(df_hk["Date"], utc=True)
+        df_hk = sort_time_block(df=df_hk.set_index("Date"))
+
+        n_hk = len(df_hk)
+        if n_hk > 0:
+            for key, df_new in (("df_all_hk", df_hk), ("df_slice_hk", df_hk.loc[t_start:t_end])):
+                global_variables.all_file_details.add_block(key=key, df=df_new)
+
+    if n_sci > 0 or n_hk > 0:
+        logger.info(f"Appended {n_sci} science and {n_hk} housekeeping rows from {folder_name}")
+
+    return n_sci, n_hk
+
+
 def lin_correction(
     x,
     y,
@@ -1062,9 +2864,326 @@ def lin_correction(
     return x_lin, y_lin
 
 
+# The pickle files of the nonlinearity correction models, by name, and the name of the model
+# which is used by default. Other versions can be added with register_gp_model. Each model is
+# loaded at most once per process and kept in gp_models, along with the modification time of its
+# file, until the file changes (see get_gp_model).
+gp_model_files = {
+    "gp_data_3.0_10_0.0_0.8_4": (
+        "../data/gp_models/gp_data_3.0_10_0.0_0.8_4_Matern(length_scale=5, nu=2.5).pickle"
+    ),
+}
+gp_model_default = "gp_data_3.0_10_0.0_0.8_4"
+gp_models = {}
+gp_models_lock = threading.Lock()
+
+
+def register_gp_model(name=None, file_name=None):
+    """
+    Adds a nonlinearity correction model, so that it can be used by its name alongside the other
+    ones. The model is only loaded when it is first used.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model. If a model with the same name was registered, it is replaced. Default
+        is None.
+    file_name : str
+        Name of the pickle file of the model. Default is None.
+    """
+    with gp_models_lock:
+        gp_model_files[name] = file_name
+        gp_models.pop(name, None)
+
+
+def get_gp_model(name=None, log_level=logging.INFO):
+    """
+    Gets a nonlinearity correction model. It is loaded from its pickle file the first time it is
+    used, and kept for the next times, unless the file was modified since it was loaded. The time
+    it took is logged either way.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model, see gp_model_files. If None, gp_model_default is used. Default is None.
+    log_level : int
+        Level at which getting a model which was already loaded is logged, e.g. logging.DEBUG for
+        the small chunks of data of the follow mode. Loading a model is always logged at the info
+        level. Default is logging.INFO.
+
+    Returns
+    -------
+    gp_model : object
+        The Gaussian Process model.
+    """
+    if name is None:
+        name = gp_model_default
+    if name not in gp_model_files:
+        raise KeyError(f"No nonlinearity correction model is named {name}")
+
+    t_start = time.perf_counter()
+    with gp_models_lock:
+        file_name = gp_model_files[name]
+        mtime_ns = os.stat(file_name).st_mtime_ns
+        entry = gp_models.get(name)
+        if entry is not None and entry["mtime_ns"] == mtime_ns:
+            logger.log(
+                log_level,
+                f"Nonlinearity correction model {name} was already loaded "
+                f"({time.perf_counter() - t_start:.6f} s)",
+            )
+            return entry["gp_model"]
+
+        # Get the gp_model from the pickle file
+        with open(file_name, "rb") as f:
+            gp_model = pickle.load(f)
+        gp_models[name] = {"gp_model": gp_model, "mtime_ns": mtime_ns}
+
+    logger.info(
+        f"{'Reloaded' if entry is not None else 'Loaded'} the nonlinearity correction model "
+        f"{name} from {file_name} in {time.perf_counter() - t_start:.3f} s"
+    )
+    return gp_model
+
+
+# The events are predicted by the nonlinearity correction models in blocks of gp_block_size
+# events, on gp_n_threads threads (see predict_gp). If gp_n_threads is None, there is a thread for
+# each CPU. The kernels of the models call BLAS, which has a thread for each CPU too, so BLAS is
+# limited to a single thread while the blocks are predicted on several threads. Otherwise there
+# would be up to the square of the number of CPUs of threads, which is slower than one thread. The
+# memory taken by the kernel matrices is bounded by the number of threads times the block size
+# times the number of training points of the model, with some tens of bytes for each.
+gp_block_size = 2000
+gp_n_threads = None
+
+
+def predict_gp(gp_model=None, xy_coord=None, return_std=False, block_size=None, n_threads=None):
+    """
+    Predicts the corrections of a nonlinearity correction model for the events in blocks of a
+    fixed size, on a pool of threads. The kernels of the model release the GIL, so the blocks are
+    predicted in parallel, each with a single BLAS thread.
+
+    Parameters
+    ----------
+    gp_model : object
+        The Gaussian Process model, see get_gp_model. Default is None.
+    xy_coord : numpy.ndarray
+        The x and y-coordinates (columns) of each event (rows). Default is None.
+    return_std : bool
+        If True, the standard deviations of the predictions are returned too. They take more time
+        to compute, so they should only be asked for if needed. Default is False.
+    block_size : int
+        Number of events in each block. If None, gp_block_size is used. Default is None.
+    n_threads : int
+        Number of threads. If None, gp_n_threads is used. Default is None.
+
+    Returns
+    -------
+    delta_xy : numpy.ndarray
+        The corrections of x and y of each event.
+    sigma : numpy.ndarray
+        The standard deviations of the corrections, only if return_std is True.
+    """
+    if block_size is None:
+        block_size = gp_block_size
+    if n_threads is None:
+        n_threads = gp_n_threads if gp_n_threads is not None else os.cpu_count() or 1
+
+    blocks = [
+        xy_coord[block_start:block_start + block_size]
+        for block_start in range(0, len(xy_coord), block_size)
+    ]
+    if len(blocks) <= 1:
+        return gp_model.predict(xy_coord, return_std=return_std)
+    n_threads = min(n_threads, len(blocks))
+
+    def predict_block(block):
+        return gp_model.predict(block, return_std=return_std)
+
+    # The limit of the BLAS threads is for the whole process, so it is set around the pool rather
+    # than in each thread. threadpoolctl is installed along with scikit-learn, which the models
+    # need.
+    blas_limits = contextlib.nullcontext()
+    if n_threads > 1:
+        from threadpoolctl import threadpool_limits
+
+        blas_limits = threadpool_limits(limits=1, user_api="blas")
+    with blas_limits, concurrent.futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+        results = list(executor.map(predict_block, blocks))
+
+    if return_std:
+        return tuple(np.concatenate(result) for result in zip(*results))
+    return np.concatenate(results)
+
+
+# If gp_use_grid is True, non_lin_correction interpolates the corrections of the model on a grid
+# of MCP coordinates over the detector disk, instead of predicting them with the model for each
+# event (see get_gp_grid). The grid has a spacing of gp_grid_step and covers the disk of radius
+# gp_grid_radius around the center of the detector, which has nearly all of the events. It is
+# computed once for each model and kept in gp_grids and in gp_grid_folder on the disk.
+gp_use_grid = False
+gp_grid_radius = 12
+gp_grid_step = 0.1
+gp_grid_folder = "../cache/gp_grid"
+gp_grids = {}
+
+
+def get_gp_grid(name=None):
+    """
+    Gets the corrections of a nonlinearity correction model on a grid of MCP coordinates over the
+    detector disk. The model is evaluated on the grid once and the grid is saved in
+    gp_grid_folder, so that it is only computed again if the model or the grid changes. The
+    points of the grid which aren't needed to interpolate within the disk are NaN.
+
+    Parameters
+    ----------
+    name : str
+        Name of the model, see get_gp_model. If None, gp_model_default is used. Default is None.
+
+    Returns
+    -------
+    grid : dict
+        The x and y-coordinates of the grid ("x" and "y") and the corrections of x and y at each
+        point ("delta_xy", indexed by y, x and the coordinate).
+    """
+    if name is None:
+        name = gp_model_default
+
+    mtime_ns = os.stat(gp_model_files[name]).st_mtime_ns
+    key = (name, mtime_ns, gp_grid_radius, gp_grid_step)
+    grid = gp_grids.get(name)
+    if grid is not None and grid["key"] == key:
+        return grid
+
+    grid_file_name = Path(gp_grid_folder) / f"{name}_{gp_grid_radius}_{gp_grid_step}.npz"
+    try:
+        with np.load(grid_file_name) as data:
+            grid = {item: data[item] for item in data.files}
+        if grid["mtime_ns"] != mtime_ns:
+            grid = None
+    except (OSError, KeyError, ValueError):
+        grid = None
+
+    if grid is None:
+        t_start = time.perf_counter()
+        n_steps = int(np.ceil(gp_grid_radius / gp_grid_step)) + 1
+        coords = gp_grid_step * np.arange(-n_steps, n_steps + 1)
+        xx, yy = np.meshgrid(coords, coords)
+        # The grid points of the cells which are at least partly in the disk
+        in_disk = np.hypot(xx, yy) <= gp_grid_radius + 2 * gp_grid_step
+        delta_xy = np.full(xx.shape + (2,), np.nan)
+        delta_xy[in_disk] = predict_gp(
+            gp_model=get_gp_model(name=name), xy_coord=np.array([xx[in_disk], yy[in_disk]]).T
+        )
+        grid = {"x": coords, "y": coords, "delta_xy": delta_xy, "mtime_ns": mtime_ns}
+        logger.info(
+            f"Computed the grid of the nonlinearity correction model {name} with "
+            f"{in_disk.sum()} points in {time.perf_counter() - t_start:.3f} s"
+        )
+        try:
+            Path(gp_grid_folder).mkdir(parents=True, exist_ok=True)
+            np.savez(grid_file_name, **grid)
+        except OSError as e:
+            logger.warning(f"The grid of the nonlinearity correction model could not be saved: {e}")
+
+    grid["key"] = key
+    gp_grids[name] = grid
+
+    return grid
+
+
+def interpolate_gp_grid(grid=None, xy_coord=None):
+    """
+    Interpolates the corrections of a nonlinearity correction model on its grid (see
+    get_gp_grid) bilinearly, at the given MCP coordinates.
+
+    Parameters
+    ----------
+    grid : dict
+        The grid of the model. Default is None.
+    xy_coord : numpy.ndarray
+        The x and y-coordinates (columns) of each event (rows). Default is None.
+
+    Returns
+    -------
+    delta_xy : numpy.ndarray
+        The corrections of x and y of each event. They are NaN for the events outside of the grid
+        or the disk.
+    """
+    x = grid["x"]
+    y = grid["y"]
+    step_x = x[1] - x[0]
+    step_y = y[1] - y[0]
+
+    # The cell of each event, and where the event is in it
+    fx = (xy_coord[:, 0] - x[0]) / step_x
+    fy = (xy_coord[:, 1] - y[0]) / step_y
+    in_grid = (fx >= 0) & (fx < len(x) - 1) & (fy >= 0) & (fy < len(y) - 1)
+    ix = np.where(in_grid, fx, 0).astype(np.intp)
+    iy = np.where(in_grid, fy, 0).astype(np.intp)
+    wx = (fx - ix)[:, np.newaxis]
+    wy = (fy - iy)[:, np.newaxis]
+
+    delta_xy_grid = grid["delta_xy"]
+    delta_xy = (
+        (1 - wy) * ((1 - wx) * delta_xy_grid[iy, ix] + wx * delta_xy_grid[iy, ix + 1])
+        + wy * ((1 - wx) * delta_xy_grid[iy + 1, ix] + wx * delta_xy_grid[iy + 1, ix + 1])
+    )
+    delta_xy[~in_grid] = np.nan
+
+    return delta_xy
+
+
+def check_gp_grid(x=None, y=None, name=None):
+    """
+    Checks how accurate the corrections interpolated on the grid of a nonlinearity correction
+    model (see get_gp_grid) are, by comparing them with the ones predicted by the model for
+    each event. lxi_benchmarks runs this on the sample datasets. With the grid step of 0.1 and
+    the smooth Matern kernel of the model, the differences are expected to be far below the
+    resolution of the positions.
+
+    Parameters
+    ----------
+    x : numpy.ndarray
+        x position data in MCP coordinates. Default is None.
+    y : numpy.ndarray
+        y position data in MCP coordinates. Default is None.
+    name : str
+        Name of the model, see get_gp_model. If None, gp_model_default is used. Default is None.
+
+    Returns
+    -------
+    accuracy : dict
+        The number of events compared ("n_events"), the largest and the root mean square
+        distance between the corrected positions ("max_error" and "rms_error"), and the fraction
+        of the events which are outside of the disk of the grid ("outside_fraction").
+    """
+    xy_coord = np.array([x, y], dtype=float).T
+    xy_coord = xy_coord[np.isfinite(xy_coord).all(axis=1)]
+
+    delta_xy_grid = interpolate_gp_grid(grid=get_gp_grid(name=name), xy_coord=xy_coord)
+    delta_xy_model = predict_gp(gp_model=get_gp_model(name=name), xy_coord=xy_coord)
+
+    in_disk = np.isfinite(delta_xy_grid).all(axis=1)
+    error = np.hypot(*(delta_xy_grid[in_disk] - delta_xy_model[in_disk]).T)
+    accuracy = {
+        "n_events": len(xy_coord),
+        "max_error": float(error.max()) if len(error) else 0.0,
+        "rms_error": float(np.sqrt(np.mean(error**2))) if len(error) else 0.0,
+        "outside_fraction": float(1 - in_disk.mean()) if len(in_disk) else 0.0,
+    }
+    logger.info(f"Accuracy of the grid of the nonlinearity correction model: {accuracy}")
+
+    return accuracy
+
+
 def non_lin_correction(
         x,
         y,
+        model_name=None,
+        use_grid=None,
+        return_std=False,
+        log_level=logging.INFO,
 ):
     """
     Function to apply nonlinearity correction to MCP position x/y data. The model to apply the
@@ -1077,6 +3196,18 @@ def non_lin_correction(
         x position data.
     y : numpy.ndarray
         y position data.
+    model_name : str
+        Name of the model, see get_gp_model. If None, gp_model_default is used. Default is None.
+    use_grid : bool
+        If True, the corrections are interpolated on the grid of the model (see get_gp_grid),
+        and only predicted by the model for the events outside of it. If None, gp_use_grid is
+        used. Default is None.
+    return_std : bool
+        If True, the standard deviations of the corrections predicted by the model are returned
+        too. The grid is then not used. Default is False.
+    log_level : int
+        Level at which getting a model which was already loaded is logged, see get_gp_model.
+        Default is logging.INFO.
 
     Returns
     -------
@@ -1084,327 +3215,1649 @@ def non_lin_correction(
         x position data after applying nonlinearity correction.
     y_nln : numpy.ndarray
         y position data after applying nonlinearity correction.
+    sigma : numpy.ndarray
+        Standard deviations of the corrections, only if return_std is True.
     """
-    gp_model_file_name = (
-        "../data/gp_models/gp_data_3.0_10_0.0_0.8_4_Matern(length_scale=5, nu=2.5).pickle"
-    )
-
-    # Get the gp_model from the pickle file
-    with open(gp_model_file_name, "rb") as f:
-        gp_model = pickle.load(f)
-
-    # Close the pickle file
-    f.close()
+    if use_grid is None:
+        use_grid = gp_use_grid
 
+    # The model is only got where it predicts, so that the grid doesn't need it to be loaded
     xy_coord = np.array([x, y]).T
-    delta_xy, sigma = gp_model.predict(xy_coord, return_std=True)
+    if return_std:
+        delta_xy, sigma = predict_gp(
+            gp_model=get_gp_model(name=model_name, log_level=log_level),
+            xy_coord=xy_coord,
+            return_std=True,
+        )
+    elif use_grid:
+        delta_xy = interpolate_gp_grid(grid=get_gp_grid(name=model_name), xy_coord=xy_coord)
+        outside = ~np.isfinite(delta_xy).all(axis=1) & np.isfinite(xy_coord).all(axis=1)
+        if outside.any():
+            delta_xy[outside] = predict_gp(
+                gp_model=get_gp_model(name=model_name, log_level=log_level),
+                xy_coord=xy_coord[outside],
+            )
+    else:
+        delta_xy = predict_gp(
+            gp_model=get_gp_model(name=model_name, log_level=log_level), xy_coord=xy_coord
+        )
 
     corrected_xy = xy_coord - delta_xy
     x_nln = corrected_xy[:, 0]
     y_nln = corrected_xy[:, 1]
 
+    if return_std:
+        return x_nln, y_nln, sigma
     return x_nln, y_nln
 
 
-def volt_to_mcp(x, y):
-    """
-    Function to convert voltage coordinates to MCP coordinates
-    """
-    x_mcp = (x - 0.544) * 78.55
-    y_mcp = (y - 0.564) * 78.55
+def volt_to_mcp(x, y):
+    """
+    Function to convert voltage coordinates to MCP coordinates
+    """
+    x_mcp = (x - 0.544) * 78.55
+    y_mcp = (y - 0.564) * 78.55
+
+    return x_mcp, y_mcp
+
+
+def volt_to_deg(x, y):
+    """
+    Function to convert voltage coordinates to MCP coordinates
+    """
+    x_deg = (x - 0.544) * 9.1 / 7.5
+    y_deg = (y - 0.564) * 9.1 / 7.5
+
+    return x_deg, y_deg
+
+
+def get_voltage_offset(counts=None, n_bins=401, bin_min=0, bin_max=4):
+    """
+    Computes the offset of the voltage of a channel from its histogram. The offset is the lower
+    edge of the fullest bin in the lower half of the histogram.
+
+    Parameters
+    ----------
+    counts : numpy.ndarray
+        Counts of the histogram of the voltages. Default is None.
+    n_bins : int
+        Number of bins of the histogram. Default is 401.
+    bin_min : float
+        Minimum value of the bin. Default is 0.
+    bin_max : float
+        Maximum value of the bin. Default is 4.
+
+    Returns
+    -------
+    offset : float
+        The offset of the voltage.
+    """
+    bin_size = (bin_max - bin_min) / (n_bins - 1)
+
+    xx = bin_min + bin_size * np.arange(n_bins)
+
+    # Find the index where the histogram is the maximum
+    # NOTE/TODO: I don't quite understand why the offset is computed this way. Need to talk to
+    # Dennis about this and get an engineering/physics reason for it.
+    max_index = np.argmax(counts[0:int(n_bins / 2)])
+
+    z_min = 1000 * xx[max_index]
+
+    return z_min / 1000
+
+
+# The channels of the voltages of the science data. The histograms of their voltages are kept for
+# time windows of offset_window_length seconds (see get_window_histograms). If
+# offset_rolling_length is not None, the offsets of the voltages of each event are computed from
+# the events within a rolling time window of that many seconds around it, instead of from all the
+# data, for long loads over which the offsets drift (see get_rolling_offsets).
+voltage_channels = ("Channel1", "Channel2", "Channel3", "Channel4")
+offset_window_length = 60
+offset_rolling_length = None
+
+# Histograms of the time windows of the science data of the last load of read_binary_file. The
+# histograms which following the files starts from are added up from them, see start_follow.
+sci_histograms = None
+
+# Number of bytes of each binary file (by absolute path) which the last load of read_binary_file
+# got to: the bytes which were decoded, or the size of the files of the folder which weren't in
+# the time range. Following the files carries on from there, see start_follow.
+loaded_file_sizes = {}
+
+
+def get_voltage_bins(values=None, n_bins=401, bin_min=0, bin_max=4):
+    """
+    Finds the bins of the histogram of the voltages which each voltage falls in. The bins are the
+    same as the ones of numpy.histogram with the same number of bins and range, down to the
+    rounding of the voltages on their edges.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The voltages. Default is None.
+    n_bins : int
+        Number of bins of the histogram. Default is 401.
+    bin_min : float
+        Minimum value of the bin. Default is 0.
+    bin_max : float
+        Maximum value of the bin. Default is 4.
+
+    Returns
+    -------
+    bins : numpy.ndarray
+        The bin of each voltage. Voltages outside of the range, or missing, are in the bin n_bins.
+    """
+    values = np.asarray(values)
+    bin_type = np.result_type(bin_min, bin_max, values)
+    if np.issubdtype(bin_type, np.integer):
+        bin_type = np.result_type(bin_type, float)
+    values = values.astype(bin_type, copy=False)
+    bin_edges = np.linspace(bin_min, bin_max, n_bins + 1, endpoint=True, dtype=bin_type)
+
+    keep = (values >= bin_edges[0]) & (values <= bin_edges[-1])
+    values = np.where(keep, values, bin_edges[0])
+    bins = ((values - bin_edges[0]) / (bin_edges[-1] - bin_edges[0]) * n_bins).astype(np.intp)
+    bins[bins == n_bins] -= 1
+    # Move the voltages which are on the wrong side of the edge of their bin after the rounding
+    bins[values < bin_edges[bins]] -= 1
+    bins[(values >= bin_edges[bins + 1]) & (bins != n_bins - 1)] += 1
+    bins[~keep] = n_bins
+
+    return bins
+
+
+def get_voltage_counts(voltages=None, n_bins=401, bin_min=0, bin_max=4):
+    """
+    Computes the histograms of several sets of voltages, e.g. of each channel, in a single
+    numpy.bincount of their bins (see get_voltage_bins). The histograms are the same as the ones
+    of numpy.histogram.
+
+    Parameters
+    ----------
+    voltages : list
+        The sets of voltages. Default is None.
+    n_bins : int
+        Number of bins of the histograms. Default is 401.
+    bin_min : float
+        Minimum value of the bin. Default is 0.
+    bin_max : float
+        Maximum value of the bin. Default is 4.
+
+    Returns
+    -------
+    counts : numpy.ndarray
+        Counts of the histogram of each set of voltages, with a row for each set.
+    """
+    # The bin n_bins of each set collects the voltages outside of the range, and is left out
+    bins = np.concatenate([
+        ii * (n_bins + 1) + get_voltage_bins(
+            values=values, n_bins=n_bins, bin_min=bin_min, bin_max=bin_max
+        )
+        for ii, values in enumerate(voltages)
+    ])
+    counts = np.bincount(bins, minlength=len(voltages) * (n_bins + 1))
+
+    return counts.reshape(len(voltages), n_bins + 1)[:, :n_bins]
+
+
+def get_voltage_histograms(df=None, n_bins=401, bin_min=0, bin_max=4):
+    """
+    Computes the histograms of the voltages of the four channels, which their offsets are
+    computed from (see get_voltage_offset). The histograms of two sets of data add up to the
+    histograms of both of them, so they can be updated as data comes in.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data. Default is None.
+    n_bins : int
+        Number of bins of the histograms. Default is 401.
+    bin_min : float
+        Minimum value of the bin. Default is 0.
+    bin_max : float
+        Maximum value of the bin. Default is 4.
+
+    Returns
+    -------
+    counts : dict
+        Counts of the histogram of each of the channels.
+    """
+    counts = get_voltage_counts(
+        voltages=[df[channel].values for channel in voltage_channels],
+        n_bins=n_bins,
+        bin_min=bin_min,
+        bin_max=bin_max,
+    )
+
+    return dict(zip(voltage_channels, counts))
+
+
+def get_window_histograms(df=None, window_length=None, n_bins=401, bin_min=0, bin_max=4):
+    """
+    Computes the histograms of the voltages of the four channels for each time window of the
+    science data, for the commanded and the other events separately, in a single
+    numpy.bincount. Only the events with all channels greater than 0 are counted, which are the
+    ones read_binary_file keeps. The histograms of any time range are then the sum of those of
+    the windows within it (see get_range_histograms), and the histograms of several files are the
+    sum of theirs (see merge_window_histograms), so the data doesn't have to be binned again.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data, with the times in the "Date" column or in the index. Default is None.
+    window_length : float
+        Length of the time windows in seconds. They start at multiples of it since the epoch. If
+        None, offset_window_length is used. Default is None.
+    n_bins : int
+        Number of bins of the histograms. Default is 401.
+    bin_min : float
+        Minimum value of the bin. Default is 0.
+    bin_max : float
+        Maximum value of the bin. Default is 4.
+
+    Returns
+    -------
+    histograms : dict or None
+        The length of the windows ("window_length"), the number of each window which has events
+        since the epoch ("windows", sorted) and their histograms ("counts", indexed by the window,
+        by whether the events are commanded and by the channel). None if the times aren't all
+        valid datetimes.
+    """
+    if window_length is None:
+        window_length = offset_window_length
+
+    times = get_time_values(df=df, column="Date" if "Date" in df.columns else None)
+    dates = df["Date"] if "Date" in df.columns else df.index
+    if times is None or not np.issubdtype(np.asarray(dates.values).dtype, np.datetime64):
+        return None
+
+    is_positive = np.ones(len(df), dtype=bool)
+    for channel in voltage_channels:
+        is_positive &= df[channel].values > 0
+
+    windows, window_index = np.unique(
+        times[is_positive] // int(window_length * 1e9), return_inverse=True
+    )
+    is_commanded = df["IsCommanded"].values[is_positive].astype(bool)
+    bins = np.concatenate([
+        ((window_index * 2 + is_commanded) * len(voltage_channels) + ii) * (n_bins + 1)
+        + get_voltage_bins(
+            values=df[channel].values[is_positive], n_bins=n_bins, bin_min=bin_min,
+            bin_max=bin_max
+        )
+        for ii, channel in enumerate(voltage_channels)
+    ])
+    counts = np.bincount(bins, minlength=len(windows) * 2 * len(voltage_channels) * (n_bins + 1))
+    counts = counts.reshape(len(windows), 2, len(voltage_channels), n_bins + 1)[..., :n_bins]
+
+    return {
+        "window_length": window_length,
+        "windows": windows.astype(np.int64),
+        "counts": counts.astype(np.int32),
+    }
+
+
+def merge_window_histograms(histograms_list=None):
+    """
+    Merges the histograms of the time windows of several sets of science data, e.g. of the files
+    of a folder (see get_window_histograms). The histograms of the windows which are in more than
+    one set are added up.
+
+    Parameters
+    ----------
+    histograms_list : list
+        The histograms of the time windows of each set. Default is None.
+
+    Returns
+    -------
+    histograms : dict or None
+        The histograms of the time windows of all the sets. None if those of a set are missing,
+        or if the windows aren't all of the same length.
+    """
+    if (
+        len(histograms_list) == 0
+        or any(histograms is None for histograms in histograms_list)
+        or len({histograms["window_length"] for histograms in histograms_list}) > 1
+    ):
+        return None
+
+    windows, window_index = np.unique(
+        np.concatenate([histograms["windows"] for histograms in histograms_list]),
+        return_inverse=True,
+    )
+    all_counts = np.concatenate([histograms["counts"] for histograms in histograms_list])
+    counts = np.zeros((len(windows),) + all_counts.shape[1:], dtype=all_counts.dtype)
+    np.add.at(counts, window_index, all_counts)
+
+    return {
+        "window_length": histograms_list[0]["window_length"],
+        "windows": windows,
+        "counts": counts,
+    }
+
+
+def get_range_histograms(
+    df=None, histograms=None, t_start=None, t_end=None, keep_commanded=True
+):
+    """
+    Computes the histograms of the voltages of the four channels of the science data from t_start
+    to t_end, from the histograms of its time windows. Only the events in the windows which are
+    partly in the time range are binned again.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data the histograms were computed from, i.e. its events with all channels
+        greater than 0, indexed by time (see set_time_index). Default is None.
+    histograms : dict
+        Histograms of the time windows of df, see get_window_histograms. Default is None.
+    t_start : datetime.datetime
+        Start time of the range, time-zone aware (see get_time_bounds). Default is None.
+    t_end : datetime.datetime
+        End time of the range, time-zone aware. Default is None.
+    keep_commanded : bool
+        If False, the commanded events are left out of the histograms. Default is True.
+
+    Returns
+    -------
+    counts : dict
+        Counts of the histogram of each of the channels, see get_voltage_histograms.
+    """
+    times = df.index.values.view(np.int64)
+    start = df.index.searchsorted(t_start, side="left")
+    stop = df.index.searchsorted(t_end, side="right")
+    window_ns = int(histograms["window_length"] * 1e9)
+
+    # The windows of the first and last events are only counted if none of their events are out
+    # of the range
+    first_window = last_window = 0
+    if stop > start:
+        first_window = times[start] // window_ns
+        if start > 0 and times[start - 1] // window_ns == first_window:
+            first_window += 1
+        last_window = times[stop - 1] // window_ns
+        if stop < len(times) and times[stop] // window_ns == last_window:
+            last_window -= 1
+    n_bins = histograms["counts"].shape[-1]
+    counts = np.zeros((len(voltage_channels), n_bins), dtype=np.int64)
+    if stop <= start or first_window > last_window:
+        rows = np.arange(start, stop)
+    else:
+        rows = np.r_[
+            start:np.searchsorted(times, first_window * window_ns, side="left"),
+            np.searchsorted(times, (last_window + 1) * window_ns, side="left"):stop,
+        ]
+        window_counts = histograms["counts"][
+            np.searchsorted(histograms["windows"], first_window, side="left"):
+            np.searchsorted(histograms["windows"], last_window, side="right")
+        ]
+        counts += (window_counts.sum(axis=1) if keep_commanded else window_counts[:, 0]).sum(
+            axis=0
+        )
+
+    if not keep_commanded:
+        rows = rows[~df["IsCommanded"].values[rows].astype(bool)]
+    counts += get_voltage_counts(
+        voltages=[df[channel].values[rows] for channel in voltage_channels], n_bins=n_bins
+    )
+
+    return dict(zip(voltage_channels, counts))
+
+
+def get_rolling_offsets(histograms=None, rolling_length=None):
+    """
+    Computes the offsets of the voltages of the four channels for each time window of the
+    science data, from the histograms of the windows which start within half of rolling_length
+    of it. Both the commanded and the other events are counted.
+
+    Parameters
+    ----------
+    histograms : dict
+        Histograms of the time windows of the science data, see get_window_histograms. Default is
+        None.
+    rolling_length : float
+        Length of the rolling time window in seconds. If None, offset_rolling_length is used.
+        Default is None.
+
+    Returns
+    -------
+    offsets : numpy.ndarray
+        The offset of the voltage of each of the channels (columns) for each of the windows
+        (rows) of histograms.
+    """
+    if rolling_length is None:
+        rolling_length = offset_rolling_length
+
+    windows = histograms["windows"]
+    counts = histograms["counts"].sum(axis=1, dtype=np.int64)
+    half_length = rolling_length / histograms["window_length"] / 2
+    first = np.searchsorted(windows, windows - half_length, side="left")
+    last = np.searchsorted(windows, windows + half_length, side="right")
+
+    # The histograms of the rolling window are updated as it moves, by adding the windows coming
+    # into it and removing the ones leaving it
+    offsets = np.zeros((len(windows), len(voltage_channels)))
+    rolling_counts = np.zeros(counts.shape[1:], dtype=np.int64)
+    n_in = n_out = 0
+    for ii in range(len(windows)):
+        rolling_counts += counts[n_in:last[ii]].sum(axis=0)
+        rolling_counts -= counts[n_out:first[ii]].sum(axis=0)
+        n_in, n_out = last[ii], first[ii]
+        offsets[ii] = [
+            get_voltage_offset(counts=rolling_counts[jj], n_bins=counts.shape[-1])
+            for jj in range(len(voltage_channels))
+        ]
+
+    return offsets
+
+
+def add_rolling_offsets(df=None, histograms=None, rolling_length=None):
+    """
+    Corrects the voltages of the science data for the offsets of the rolling time windows around
+    them (see get_rolling_offsets), instead of the offsets of all the data.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data with the positions, indexed by time, which the histograms were computed
+        from. The columns of the corrected voltages are replaced. Default is None.
+    histograms : dict
+        Histograms of the time windows of df, see get_window_histograms. Default is None.
+    rolling_length : float
+        Length of the rolling time window in seconds. If None, offset_rolling_length is used.
+        Default is None.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The science data with the corrected voltages.
+    """
+    offsets = get_rolling_offsets(histograms=histograms, rolling_length=rolling_length)
+    window_index = np.searchsorted(
+        histograms["windows"],
+        df.index.values.view(np.int64) // int(histograms["window_length"] * 1e9),
+    )
+    for ii, channel in enumerate(voltage_channels):
+        df[voltage_shift_columns[channel]] = df[channel].values - offsets[window_index, ii]
+
+    return df
+
+
+# The columns of the voltages corrected for their offsets, by channel
+voltage_shift_columns = {
+    "Channel1": "v1_shift",
+    "Channel3": "v3_shift",
+    "Channel4": "v4_shift",
+    "Channel2": "v2_shift",
+}
+
+
+def get_voltage_offsets(counts=None):
+    """
+    Computes the offsets of the voltages of the four channels from their histograms.
+
+    Parameters
+    ----------
+    counts : dict
+        Counts of the histogram of each of the channels, see get_voltage_histograms. Default is
+        None.
+
+    Returns
+    -------
+    offsets : dict
+        The offset of the voltage of each of the channels, see get_voltage_offset.
+    """
+    return {channel: get_voltage_offset(counts=counts[channel]) for channel in counts}
+
+
+def add_positions(df=None, counts=None, log_level=logging.INFO):
+    """
+    Adds the x and y-coordinates of the particles to the science data, along with the voltages
+    corrected for their offsets. The columns are the same as the ones read_csv_sci adds.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data. The columns are added to it. Default is None.
+    counts : dict
+        Histograms of the voltages the offsets are computed from, see get_voltage_histograms. If
+        None, they are computed from df. Default is None.
+    log_level : int
+        Level at which getting the nonlinearity correction model is logged if it was already
+        loaded, see get_gp_model. Default is logging.INFO.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The science data with the positions.
+    """
+    if counts is None:
+        counts = get_voltage_histograms(df=df)
+    offsets = get_voltage_offsets(counts=counts)
+
+    x = df["Channel3"] / (df["Channel3"] + df["Channel1"])
+    y = df["Channel2"] / (df["Channel2"] + df["Channel4"])
+
+    # Correct for the non-linearity in the positions using lineat correction model
+    x_lin, y_lin = lin_correction(x, y)
+
+    # Get the x,y value in mcp units
+    x_mcp, y_mcp = volt_to_mcp(x, y)
+    x_mcp_lin, y_mcp_lin = volt_to_mcp(x_lin, y_lin)
+
+    # Correct for the non-linearity in the positions using non-linear correction model
+    try:
+        x_mcp_nln, y_mcp_nln = non_lin_correction(x_mcp_lin, y_mcp_lin, log_level=log_level)
+    except Exception:
+        # Set them to NaNs of the same length as x_mcp
+        x_mcp_nln = np.full(len(x_mcp_lin), np.nan)
+        y_mcp_nln = np.full(len(y_mcp_lin), np.nan)
+
+    # Get the x,y value in deg units
+    x_deg, y_deg = volt_to_deg(x_mcp, y_mcp)
+    x_deg_lin, y_deg_lin = volt_to_deg(x_mcp_lin, y_mcp_lin)
+
+    df.loc[:, "x_val"] = x
+    df.loc[:, "x_val_lin"] = x_lin
+    df.loc[:, "x_mcp"] = x_mcp
+    df.loc[:, "x_mcp_lin"] = x_mcp_lin
+    df.loc[:, "x_mcp_nln"] = x_mcp_nln
+    df.loc[:, "x_deg"] = x_deg
+    df.loc[:, "x_deg_lin"] = x_deg_lin
+    df.loc[:, "v1_shift"] = df["Channel1"] - offsets["Channel1"]
+    df.loc[:, "v3_shift"] = df["Channel3"] - offsets["Channel3"]
+
+    df.loc[:, "y_val"] = y
+    df.loc[:, "y_val_lin"] = y_lin
+    df.loc[:, "y_mcp"] = y_mcp
+    df.loc[:, "y_mcp_lin"] = y_mcp_lin
+    df.loc[:, "y_mcp_nln"] = y_mcp_nln
+    df.loc[:, "y_deg"] = y_deg
+    df.loc[:, "y_deg_lin"] = y_deg_lin
+    df.loc[:, "v4_shift"] = df["Channel4"] - offsets["Channel4"]
+    df.loc[:, "v2_shift"] = df["Channel2"] - offsets["Channel2"]
+
+    return df
+
+
+def compute_position(v1=None, v2=None, n_bins=401, bin_min=0, bin_max=4):
+    """
+    The function computes the position of the particle in the xy-plane. The ratios to compute
+    both the x and y position are taken from Dennis' code. The code computes the offset of the
+    four voltages as measured by LEXI. We then subtract the offset from the four voltages to get
+    the shifted voltages and then compute the position of the particle based on the shifted
+    voltages.
+
+    Parameters
+    ----------
+    v1 : float
+        Voltage of the first channel. Default is None.
+    v2 : float
+        Voltage of the second channel. Default is None.
+    n_bins : int
+        Number of bins to compute the position. Default is 401.
+    bin_min : float
+        Minimum value of the bin. Default is 0.
+    bin_max : float
+        Maximum value of the bin. Default is 4.
+
+    Returns
+    -------
+    particle_pos : float
+        position of the particle along one of the axis. Whether it gives x or y position depends
+        on which voltages were provided. For example, if v1 and v3 were provided, then the x
+        position is returned. Else if v4 and v2 were provided, then the y position is returned.
+        It is important to note that the order of the voltages is important.
+    v1_shift: float
+        Offset corrected voltage of the first channel.
+    v2_shift: float
+        Offset corrected voltage of the second channel.
+    """
+    # make 1-D histogram of both channels
+    counts_v1, counts_v2 = get_voltage_counts(
+        voltages=[v1, v2], n_bins=n_bins, bin_min=bin_min, bin_max=bin_max
+    )
+
+    n1_z = get_voltage_offset(counts=counts_v1, n_bins=n_bins, bin_min=bin_min, bin_max=bin_max)
+    n2_z = get_voltage_offset(counts=counts_v2, n_bins=n_bins, bin_min=bin_min, bin_max=bin_max)
+
+    v1_shift = v1 - n1_z
+    v2_shift = v2 - n2_z
+
+    # particle_pos = v2_shift / (v2_shift + v1_shift)
+    particle_pos = v2 / (v2 + v1)
+
+    return particle_pos, v1_shift, v2_shift
+
+
+def get_unsorted_range(values=None):
+    """
+    Finds the shortest range of an array which, once sorted, makes the whole array sorted. The
+    values before the range are sorted and not larger than any value after them, and the values
+    after the range are sorted and not smaller than any value before them.
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        The values. Default is None.
+
+    Returns
+    -------
+    start : int
+        Start of the range.
+    stop : int
+        End of the range. It is equal to start if the values are already sorted.
+    """
+    if len(values) < 2 or not np.any(values[1:] < values[:-1]):
+        return 0, 0
+
+    # The range starts at the first value which is larger than a value after it, and ends after
+    # the last value which is smaller than a value before it
+    suffix_min = np.minimum.accumulate(values[::-1])[::-1]
+    prefix_max = np.maximum.accumulate(values)
+    start = int(np.argmax(values > suffix_min))
+    stop = len(values) - int(np.argmax((values < prefix_max)[::-1]))
+    return start, stop
+
+
+def get_time_values(df=None, column=None):
+    """
+    Gets the times of a DataFrame as an array which can be compared and sorted, with the
+    datetimes as integers. None if the times can't be sorted that way, e.g. if some are missing.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data. Default is None.
+    column : str
+        The column with the times. If None, the index is used. Default is None.
+
+    Returns
+    -------
+    values : numpy.ndarray or None
+        The times.
+    """
+    values = np.asarray((df.index if column is None else df[column]).values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        if np.isnat(values).any():
+            return None
+        return values.view(np.int64)
+    if np.issubdtype(values.dtype, np.number) and not np.isnan(values).any():
+        return values
+    return None
+
+
+def sort_time_block(df=None, column=None):
+    """
+    Sorts a block of data by time. The data of a file is nearly always in the order of time
+    already, so this only checks it, and only sorts the shortest slice which is out of order
+    (see get_unsorted_range) instead of the whole block. The sort is stable, i.e. the rows at the
+    same time stay in the order they are in.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The data. Default is None.
+    column : str
+        The column with the times. If None, the data is sorted by its index. Default is None.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The sorted data. It is the same DataFrame if it was already sorted.
+    """
+    values = get_time_values(df=df, column=column)
+    if values is None:
+        # Missing times are put at the end, as pandas does it
+        if column is None:
+            return df.sort_index(kind="stable")
+        return df.sort_values(column, kind="stable")
+
+    start, stop = get_unsorted_range(values=values)
+    if start == stop:
+        return df
+
+    order = np.arange(len(values))
+    order[start:stop] = start + np.argsort(values[start:stop], kind="stable")
+    logger.info(f"Sorted {stop - start} of {len(values)} rows which were out of order")
+    return df.iloc[order]
+
+
+def merge_time_blocks(blocks=None, column="Date"):
+    """
+    Merges blocks of data, e.g. the data of each file of a folder, into a single DataFrame sorted
+    by time. Each block is sorted first if it isn't already (see sort_time_block). The blocks
+    which don't overlap in time are then simply concatenated in the order of their times, and
+    only the groups of blocks which overlap are merged. These are merged with a stable sort of
+    the rows of the group, which for sorted blocks is a k-way merge of their runs.
+
+    This gives the same data as concatenating the blocks and sorting the result, without sorting
+    all the data when the files are already in order, which they nearly always are.
+
+    Parameters
+    ----------
+    blocks : list
+        The blocks of data, all with the same columns. Default is None.
+    column : str
+        The column with the times. If None, the blocks are merged by their index. Default is
+        "Date".
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The merged data.
+    """
+    blocks = [sort_time_block(df=df, column=column) for df in blocks]
+    times = [get_time_values(df=df, column=column) for df in blocks]
+    if len(blocks) < 2 or any(values is None for values in times):
+        return sort_time_block(df=pd.concat(blocks), column=column)
+
+    # Put the blocks in the order of their first time, and group the blocks which overlap the
+    # ones before them
+    order = sorted(
+        (ii for ii in range(len(blocks)) if len(times[ii]) > 0), key=lambda ii: times[ii][0]
+    )
+    groups = []
+    group_end = None
+    for ii in order:
+        if group_end is None or times[ii][0] >= group_end:
+            groups.append([ii])
+            group_end = times[ii][-1]
+        else:
+            groups[-1].append(ii)
+            group_end = max(group_end, times[ii][-1])
+
+    merged = []
+    for group in groups:
+        if len(group) == 1:
+            merged.append(blocks[group[0]])
+        else:
+            merged.append(
+                sort_time_block(df=pd.concat([blocks[ii] for ii in group]), column=column)
+            )
+    n_merged = sum(len(group) for group in groups if len(group) > 1)
+    if n_merged > 0:
+        logger.info(f"Merged {n_merged} of {len(blocks)} blocks which overlap in time")
+
+    # The empty blocks are concatenated too, so that the columns are the same as with pd.concat
+    merged += [df for df, values in zip(blocks, times) if len(values) == 0]
+    return pd.concat(merged)
+
+
+def set_time_index(df=None):
+    """
+    Sets the index of a DataFrame read from an L1a file to the time of its rows, sorted. The time
+    column is renamed to "TimeStamp" and the "Date" column, which becomes the index, is converted
+    to datetimes in UTC.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The DataFrame, with the columns of the L1a file. It is modified. Default is None.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        The DataFrame indexed by time.
+    """
+    # Check all the keys and find out which one has the word "time" in it
+    for key in df.keys():
+        if "time" in key.lower():
+            time_col = key
+            break
+    # Rename the time column to TimeStamp
+    df.rename(columns={time_col: "TimeStamp"}, inplace=True)
+
+    # Convert the Date column from string to datetime in utc
+    try:
+        df["Date"] = pd.to_datetime(df["Date"], utc=True)
+    except Exception:
+        # Convert timestamp to datetime and set it to Date
+        df["Date"] = pd.to_datetime(df["TimeStamp"], unit="s", utc=True)
+
+    # Set the index to the time column
+    df.set_index("Date", inplace=True)
+    # Sort the dataframe by timestamp, if it isn't already
+    df = sort_time_block(df=df)
+
+    return df
+
+
+def get_time_bounds(df=None, t_start=None, t_end=None):
+    """
+    Gets the time-zone aware start and end times of a time range of the science data. If they
+    aren't given, the range is all of the data.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data, indexed by time (see set_time_index). Default is None.
+    t_start : datetime.datetime or str
+        Start time of the range, as "%Y-%m-%d %H:%M:%S" if it is a string. Times which aren't
+        time-zone aware are in UTC. Default is None.
+    t_end : datetime.datetime or str
+        End time of the range, the same as t_start. Default is None.
+
+    Returns
+    -------
+    t_start : datetime.datetime
+        Start time of the range.
+    t_end : datetime.datetime
+        End time of the range.
+    """
+    if t_start is None:
+        t_start = df.index.min()
+    else:
+        # Check if t_start and t_end are datetime objects. If not, convert them to datetime
+        if not isinstance(t_start, datetime.datetime):
+            t_start = datetime.datetime.strptime(t_start, "%Y-%m-%d %H:%M:%S")
+        if not isinstance(t_end, datetime.datetime):
+            t_end = datetime.datetime.strptime(t_end, "%Y-%m-%d %H:%M:%S")
+        # Check if t_start is time-zone aware. If not, make it time-zone aware
+        if t_start.tzinfo is None:
+            t_start = t_start.replace(tzinfo=pytz.utc)
+    if t_end is None:
+        t_end = df.index.max()
+    else:
+        # Check if t_end is time-zone aware. If not, make it time-zone aware
+        if t_end.tzinfo is None:
+            t_end = t_end.replace(tzinfo=pytz.utc)
+
+    return t_start, t_end
+
+
+def get_sci_slice(
+    df=None, t_start=None, t_end=None, keep_commanded=True, offsets=None, counts=None
+):
+    """
+    Selects the science data from t_start to t_end out of the data which add_positions added the
+    positions to. The positions of an event don't depend on the other events, so they aren't
+    computed again: the slice is the range of rows of the time range, found by a binary search
+    of the sorted times. Only the voltages corrected for their offsets depend on the events they
+    are computed from, so they are corrected again if the offsets of the slice differ from those
+    of the whole data.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        The science data with the positions, indexed by time (see set_time_index). Default is
+        None.
+    t_start : datetime.datetime
+        Start time of the slice, time-zone aware (see get_time_bounds). Default is None.
+    t_end : datetime.datetime
+        End time of the slice, time-zone aware. Default is None.
+    keep_commanded : bool
+        If False, the commanded events are left out of the slice. Default is True.
+    offsets : dict
+        Offsets of the voltages of the whole data, see get_voltage_offsets. If None, e.g. if the
+        voltages were corrected for the offsets of rolling time windows (see
+        add_rolling_offsets), they aren't corrected again. Default is None.
+    counts : dict
+        Histograms of the voltages of the slice, e.g. from those of the time windows of df (see
+        get_range_histograms). If None, they are computed from its rows. Default is None.
+
+    Returns
+    -------
+    df_slice : pandas.DataFrame
+        The science data from t_start to t_end. Its rows are the ones of df, so it shouldn't be
+        modified in place.
+    """
+    start = df.index.searchsorted(t_start, side="left")
+    stop = df.index.searchsorted(t_end, side="right")
+    df_slice = df.iloc[start:stop]
+
+    if not keep_commanded:
+        is_not_commanded = df_slice["IsCommanded"].eq(False).values
+        if not is_not_commanded.all():
+            df_slice = df_slice[is_not_commanded]
+
+    # A new DataFrame sharing the rows, so that setting its columns doesn't change df
+    df_slice = df_slice.copy(deep=False)
+
+    if offsets is None:
+        return df_slice
+
+    if counts is None:
+        counts = get_voltage_histograms(df=df_slice)
+    slice_offsets = get_voltage_offsets(counts=counts)
+    if slice_offsets != offsets:
+        for channel, column in voltage_shift_columns.items():
+            df_slice[column] = df_slice[channel] - slice_offsets[channel]
+
+    return df_slice
+
+
+def read_csv_sci(file_val=None, t_start=None, t_end=None, df=None):
+    """
+    Reads a csv file and returns a pandas dataframe for the selected time range along with x and
+    y-coordinates.
+
+    Parameters
+    ----------
+    file_val : str
+        Path to the input file. Default is None.
+    t_start : float
+        Start time of the data. Default is None.
+    t_end : float
+        End time of the data. Default is None.
+    df : pandas.DataFrame
+        If given, this DataFrame is used instead of reading the csv file, e.g. the DataFrame
+        created from a binary file by read_binary_file. It must have the same columns as the csv
+        file, and is not modified. Default is None.
+
+    NOTE: If the csv file has a file in the columnar L1a format (".npz") next to it which isn't
+    older than it, that file is read instead, see read_l1a_npz. "file_val" can also be the name of
+    the ".npz" file.
+    """
+
+    if df is None:
+        npz_file_name = find_l1a_npz(file_name=file_val)
+        if npz_file_name is not None:
+            df = read_l1a_npz(file_name=npz_file_name).reset_index(drop=True)
+        else:
+            df = pd.read_csv(file_val, index_col=False)
+    else:
+        # Same as the DataFrame read from the csv file. This is a new DataFrame, so the given one
+        # is not modified.
+        df = df.reset_index(drop=True)
+
+    df = set_time_index(df=df)
+
+    t_start, t_end = get_time_bounds(df=df, t_start=t_start, t_end=t_end)
+
+    # Compute the x and y-coordinates and the shift in the voltages once, for the entire
+    # dataframe. The sliced dataframe is the range of its rows from t_start to t_end.
+    counts = get_voltage_histograms(df=df)
+    df = add_positions(df=df, counts=counts)
+    df_slice_sci = get_sci_slice(
+        df=df, t_start=t_start, t_end=t_end, offsets=get_voltage_offsets(counts=counts)
+    )
+
+    return df, df_slice_sci
+
+
+def read_csv_hk(file_val=None, t_start=None, t_end=None, df=None):
+    """
+    Reads a csv file and returns a pandas dataframe for the selected time range along with x and
+    y-coordinates.
+
+    Parameters
+    ----------
+    file_val : str
+        Path to the input file. Default is None.
+    t_start : float
+        Start time of the data. Default is None.
+    t_end : float
+        End time of the data. Default is None.
+    df : pandas.DataFrame
+        If given, this DataFrame is used instead of reading the csv file, e.g. the DataFrame
+        created from a binary file by read_binary_file. It must have the same columns as the csv
+        file, and is not modified. Default is None.
+
+    NOTE: If the csv file has a file in the columnar L1a format (".npz") next to it which isn't
+    older than it, that file is read instead, see read_l1a_npz. "file_val" can also be the name of
+    the ".npz" file.
+    """
+
+    global df_slice_hk
+    if df is None:
+        npz_file_name = find_l1a_npz(file_name=file_val)
+        if npz_file_name is not None:
+            df = read_l1a_npz(file_name=npz_file_name).reset_index(drop=True)
+        else:
+            df = pd.read_csv(file_val, index_col=False)
+    else:
+        # Same as the DataFrame read from the csv file. This is a new DataFrame, so the given one
+        # is not modified.
+        df = df.reset_index(drop=True)
+
+    df = set_time_index(df=df)
+
+    if t_start is None:
+        t_start = df.index.min()
+    if t_end is None:
+        t_end = df.index.max()
+
+    # Select dataframe from timestamp t_start to t_end
+    df_slice_hk = df.loc[t_start:t_end].copy()
+
+    return df, df_slice_hk
+
+
+# Decoder statistics of each file of the last load, and their totals over all the loads since
+# the program started, see record_decode_stats
+decode_stats = []
+decode_stats_total = new_decode_stats()
+decode_stats_total["n_files"] = 0
+
+
+def record_decode_stats(stats_list=None):
+    """
+    Records the decoder statistics of the files of a load, so that the GUI can show them (see
+    lxi_misc_codes.print_decode_stats), and adds them to the totals over all the loads. The totals
+    are logged, along with a warning if frames were lost.
+
+    Parameters
+    ----------
+    stats_list : list
+        The decoder statistics of each file, see new_decode_stats. Default is None.
+
+    Returns
+    -------
+    stats_load : dict
+        The totals of the decoder statistics of the load.
+    """
+    global decode_stats
+
+    decode_stats = list(stats_list)
+    stats_load = new_decode_stats()
+    stats_load["n_files"] = len(decode_stats)
+    for stats in decode_stats:
+        for counter in decode_stats_counters + ["decode_time"]:
+            stats_load[counter] += stats[counter]
+    for counter in decode_stats_counters + ["decode_time", "n_files"]:
+        decode_stats_total[counter] += stats_load[counter]
+
+    logger.info(f"Decoder statistics of the load: {stats_load}")
+    logger.info(f"Decoder statistics of all the loads: {decode_stats_total}")
+
+    # Each repaired packet takes the frame holding the rest of it, so only the frames dropped
+    # besides those are lost data
+    n_repaired = sum(
+        stats_load[counter] for counter in decode_stats_counters if "repaired" in counter
+    )
+    n_lost = max(stats_load["n_skipped"] - n_repaired, 0)
+    if n_lost > 0 or stats_load["n_trailing_bytes"] > 0:
+        print(
+            f"\n \x1b[1;31;255m WARNING: {n_lost} of {stats_load['n_frames']} frames were "
+            f"dropped and {stats_load['n_trailing_bytes']} bytes were left at the end of the "
+            "files \x1b[0m"
+        )
+        logger.warning(
+            f"{n_lost} frames were dropped and {stats_load['n_trailing_bytes']} bytes were left "
+            "at the end of the files"
+        )
+    return stats_load
+
+
+def decode_binary_file(file_name=None, use_mmap=False):
+    """
+    Decodes a binary file into the DataFrames of its science and housekeeping packets. This is
+    what each worker does when the files of a folder are decoded in parallel, see
+    decode_binary_files.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the binary file. Default is None.
+    use_mmap : bool
+        If True, the file is memory-mapped and decoded without copying it. Default is False.
+
+    Returns
+    -------
+    df_sci : pandas.DataFrame
+        DataFrame of the science packets, see create_df_sci.
+    df_hk : pandas.DataFrame
+        DataFrame of the housekeeping packets, see create_df_hk.
+    stats : dict
+        The decoder statistics of the file, see new_decode_stats.
+    histograms : dict or None
+        Histograms of the voltages of the time windows of the science data, see
+        get_window_histograms.
+    """
+    # Read the science and housekeeping packets from the file in one go
+    packets_sci, packets_hk, stats = read_binary_data(
+        in_file_name=file_name, use_mmap=use_mmap, return_stats=True
+    )
+
+    df_sci = create_df_sci(packets=packets_sci, in_file_name=file_name, number_of_decimals=6)
+    df_hk = create_df_hk(packets=packets_hk, in_file_name=file_name)
+    histograms = get_window_histograms(df=df_sci)
+
+    return df_sci, df_hk, stats, histograms
+
+
+def decode_binary_files(file_list=None, use_mmap=False, n_workers=1):
+    """
+    Decodes a list of binary files, either one after the other or in parallel in a pool of
+    processes. The results are in the same order as the files in the list, whatever the number
+    of workers is, so the data is the same either way.
+
+    Parameters
+    ----------
+    file_list : list
+        Names of the binary files. Default is None.
+    use_mmap : bool
+        If True, the files are memory-mapped and decoded without copying them. Default is False.
+    n_workers : int
+        Number of processes decoding the files. If 1, the files are decoded in this process.
+        Default is 1.
+
+    Returns
+    -------
+    blocks : list
+        The DataFrames, decoder statistics and histograms of the voltages (df_sci, df_hk, stats,
+        histograms) of each file, see
+        decode_binary_file.
+    """
+    # Check the number of workers
+    if not isinstance(n_workers, int) or n_workers < 1:
+        raise ValueError("The number of workers must be a positive integer.")
+
+    if n_workers == 1 or len(file_list) < 2:
+        blocks = []
+        for file_number, file_name in enumerate(file_list):
+            # Print in cyan color that file number is being read from the directory conatining total
+            print(
+                f"\n Reading file \x1b[1;36;255m {file_number + 1} \x1b[0m of "
+                f"total \x1b[1;36;255m {len(file_list)} \x1b[0m files."
+            )
+            blocks.append(decode_binary_file(file_name=file_name, use_mmap=use_mmap))
+        return blocks
+
+    n_workers = min(n_workers, len(file_list))
+    print(
+        f"\n Reading \x1b[1;36;255m {len(file_list)} \x1b[0m files with "
+        f"\x1b[1;36;255m {n_workers} \x1b[0m workers."
+    )
+    # map gives the results in the order of the files, not in the order they are done
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        blocks = list(
+            executor.map(
+                decode_binary_file, file_list, [use_mmap] * len(file_list), chunksize=1
+            )
+        )
+    logger.info(f"Decoded {len(file_list)} files with {n_workers} workers")
+
+    return blocks
+
 
-    return x_mcp, y_mcp
+# Folder of the decode cache, and the largest size it is allowed to take on the disk. The version
+# is increased whenever the decoded data changes, so that the old cached data isn't used anymore.
+# Each file has the files with the suffixes below in the cache.
+decode_cache_folder = "../cache/decode"
+decode_cache_max_size = 2 * 2**30
+decode_cache_version = 3
+decode_cache_suffixes = ("_sci.npz", "_sci.json", "_hk.npz", "_hk.json", "_hist.npz")
 
 
-def volt_to_deg(x, y):
+def save_window_histograms(histograms=None, save_file_name=None):
     """
-    Function to convert voltage coordinates to MCP coordinates
-    """
-    x_deg = (x - 0.544) * 9.1 / 7.5
-    y_deg = (y - 0.564) * 9.1 / 7.5
+    Saves the histograms of the voltages of the time windows of the science data, see
+    get_window_histograms.
 
-    return x_deg, y_deg
+    Parameters
+    ----------
+    histograms : dict
+        The histograms. Default is None.
+    save_file_name : str
+        Name of the ".npz" file. Default is None.
+    """
+    np.savez(save_file_name, **histograms)
 
 
-def compute_position(v1=None, v2=None, n_bins=401, bin_min=0, bin_max=4):
+def read_window_histograms(file_name=None, df=None):
     """
-    The function computes the position of the particle in the xy-plane. The ratios to compute
-    both the x and y position are taken from Dennis' code. The code computes the offset of the
-    four voltages as measured by LEXI. We then subtract the offset from the four voltages to get
-    the shifted voltages and then compute the position of the particle based on the shifted
-    voltages.
+    Reads the histograms of the voltages of the time windows of the science data saved by
+    save_window_histograms. If they are missing or their windows don't have the length
+    offset_window_length, they are computed again from the science data.
 
     Parameters
     ----------
-    v1 : float
-        Voltage of the first channel. Default is None.
-    v2 : float
-        Voltage of the second channel. Default is None.
-    n_bins : int
-        Number of bins to compute the position. Default is 401.
-    bin_min : float
-        Minimum value of the bin. Default is 0.
-    bin_max : float
-        Maximum value of the bin. Default is 4.
+    file_name : str
+        Name of the ".npz" file. Default is None.
+    df : pandas.DataFrame
+        The science data the histograms were computed from. Default is None.
 
     Returns
     -------
-    particle_pos : float
-        position of the particle along one of the axis. Whether it gives x or y position depends
-        on which voltages were provided. For example, if v1 and v3 were provided, then the x
-        position is returned. Else if v4 and v2 were provided, then the y position is returned.
-        It is important to note that the order of the voltages is important.
-    v1_shift: float
-        Offset corrected voltage of the first channel.
-    v2_shift: float
-        Offset corrected voltage of the second channel.
+    histograms : dict or None
+        The histograms, see get_window_histograms.
     """
-    bin_size = (bin_max - bin_min) / (n_bins - 1)
+    try:
+        with np.load(file_name) as data:
+            histograms = {key: data[key] for key in data.files}
+        histograms["window_length"] = histograms["window_length"].item()
+        if histograms["window_length"] == offset_window_length:
+            return histograms
+    except (OSError, KeyError, ValueError):
+        pass
 
-    # make 1-D histogram of all 4 channels
-    hist_v1 = np.histogram(v1, bins=n_bins, range=(bin_min, bin_max))
-    hist_v2 = np.histogram(v2, bins=n_bins, range=(bin_min, bin_max))
+    return get_window_histograms(df=df)
 
-    xx = bin_min + bin_size * np.arange(n_bins)
 
-    # Find the index where the histogram is the maximum
-    # NOTE/TODO: I don't quite understand why the offset is computed this way. Need to talk to
-    # Dennis about this and get an engineering/physics reason for it.
-    max_index_v1 = np.argmax(hist_v1[0][0:int(n_bins / 2)])
-    max_index_v2 = np.argmax(hist_v2[0][0:int(n_bins / 2)])
+def get_file_hash(file_name=None):
+    """
+    Computes the hash of the content of a file.
 
-    z1_min = 1000 * xx[max_index_v1]
+    Parameters
+    ----------
+    file_name : str
+        Name of the file. Default is None.
 
-    z2_min = 1000 * xx[max_index_v2]
+    Returns
+    -------
+    file_hash : str
+        The BLAKE2b hash of the file, as a hex string.
+    """
+    file_hash = hashlib.blake2b(digest_size=16)
+    with open(file_name, "rb") as file:
+        for chunk in iter(lambda: file.read(2**22), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
 
-    n1_z = z1_min / 1000
-    n2_z = z2_min / 1000
 
-    v1_shift = v1 - n1_z
-    v2_shift = v2 - n2_z
+def read_decode_cache_index(cache_folder=None):
+    """
+    Reads the index of the decode cache. The index has an entry for each cached file, with its
+    size, modification time and hash, the size of its cached data and the last time it was used.
 
-    # particle_pos = v2_shift / (v2_shift + v1_shift)
-    particle_pos = v2 / (v2 + v1)
+    Parameters
+    ----------
+    cache_folder : str
+        Folder of the decode cache. If None, decode_cache_folder is used. Default is None.
 
-    return particle_pos, v1_shift, v2_shift
+    Returns
+    -------
+    index : dict
+        The index of the decode cache. It is empty if the cache is empty or was made by another
+        version of the decoder.
+    """
+    if cache_folder is None:
+        cache_folder = decode_cache_folder
+
+    try:
+        with open(Path(cache_folder) / "index.json", "r") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        index = {}
+    if index.get("version") != decode_cache_version:
+        index = {"version": decode_cache_version, "files": {}}
+
+    return index
 
 
-def read_csv_sci(file_val=None, t_start=None, t_end=None):
+def invalidate_decode_cache(cache_folder=None):
     """
-    Reads a csv file and returns a pandas dataframe for the selected time range along with x and
-    y-coordinates.
+    Removes all the data of the decode cache. This must be done whenever the way the files are
+    decoded changes, e.g. after the housekeeping calibration is changed.
 
     Parameters
     ----------
-    file_val : str
-        Path to the input file. Default is None.
-    t_start : float
-        Start time of the data. Default is None.
-    t_end : float
-        End time of the data. Default is None.
+    cache_folder : str
+        Folder of the decode cache. If None, decode_cache_folder is used. Default is None.
     """
+    if cache_folder is None:
+        cache_folder = decode_cache_folder
 
-    df = pd.read_csv(file_val, index_col=False)
-
-    # Check all the keys and find out which one has the word "time" in it
-    for key in df.keys():
-        if "time" in key.lower():
-            time_col = key
-            break
-    # Rename the time column to TimeStamp
-    df.rename(columns={time_col: "TimeStamp"}, inplace=True)
-
-    # Convert the Date column from string to datetime in utc
-    try:
-        df["Date"] = pd.to_datetime(df["Date"], utc=True)
-    except Exception:
-        # Convert timestamp to datetime and set it to Date
-        df["Date"] = pd.to_datetime(df["TimeStamp"], unit="s", utc=True)
+    if Path(cache_folder).exists():
+        shutil.rmtree(cache_folder)
+    logger.info(f"Invalidated the decode cache in {cache_folder}")
+    print(f"\n \x1b[1;32;255m Cleared the decode cache in {cache_folder} \x1b[0m")
 
-    # Set the index to the time column
-    df.set_index("Date", inplace=True)
-    # Sort the dataframe by timestamp
-    df = df.sort_index()
 
-    if t_start is None:
-        t_start = df.index.min()
-    else:
-        # Check if t_start and t_end are datetime objects. If not, convert them to datetime
-        if not isinstance(t_start, datetime.datetime):
-            t_start = datetime.datetime.strptime(t_start, "%Y-%m-%d %H:%M:%S")
-        if not isinstance(t_end, datetime.datetime):
-            t_end = datetime.datetime.strptime(t_end, "%Y-%m-%d %H:%M:%S")
-        # Check if t_start is time-zone aware. If not, make it time-zone aware
-        if t_start.tzinfo is None:
-            t_start = t_start.replace(tzinfo=pytz.utc)
-    if t_end is None:
-        t_end = df.index.max()
-    else:
-        # Check if t_end is time-zone aware. If not, make it time-zone aware
-        if t_end.tzinfo is None:
-            t_end = t_end.replace(tzinfo=pytz.utc)
+def decode_binary_files_cached(
+    file_list=None, use_mmap=False, n_workers=1, cache_folder=None, max_cache_size=None
+):
+    """
+    Decodes a list of binary files like decode_binary_files, but keeps the DataFrames of each file
+    in a cache on the disk. Only the files which are not in the cache, or which have changed since
+    they were cached, are decoded. A file has changed if its size, its modification time and the
+    hash of its content aren't the same as when it was cached (the hash is only computed if the
+    size or the modification time have changed).
 
-    # Select dataframe from timestamp t_start to t_end
-    df_slice_sci = df.loc[t_start:t_end].copy()
-
-    # For both the sliced and entire dataframes, compute the x and y-coordinates and the shift in
-    # the voltages
-    x_slice, v1_shift_slice, v3_shift_slice = compute_position(
-        v1=df_slice_sci["Channel1"],
-        v2=df_slice_sci["Channel3"],
-        n_bins=401,
-        bin_min=0,
-        bin_max=4,
-    )
+    The data of the files which were used the longest time ago is removed from the cache when the
+    cache gets larger than max_cache_size.
 
-    x, v1_shift, v3_shift = compute_position(
-        v1=df["Channel1"], v2=df["Channel3"], n_bins=401, bin_min=0, bin_max=4
-    )
+    Parameters
+    ----------
+    file_list : list
+        Names of the binary files. Default is None.
+    use_mmap : bool
+        If True, the files are memory-mapped and decoded without copying them. Default is False.
+    n_workers : int
+        Number of processes decoding the files, see decode_binary_files. Default is 1.
+    cache_folder : str
+        Folder of the decode cache. If None, decode_cache_folder is used. Default is None.
+    max_cache_size : int
+        Largest size of the cache in bytes. If None, decode_cache_max_size is used. Default is None.
 
-    y_slice, v4_shift_slice, v2_shift_slice = compute_position(
-        v1=df_slice_sci["Channel4"],
-        v2=df_slice_sci["Channel2"],
-        n_bins=401,
-        bin_min=0,
-        bin_max=4,
-    )
+    Returns
+    -------
+    blocks : list
+        The DataFrames, decoder statistics and histograms of the voltages (df_sci, df_hk, stats,
+        histograms) of each file, see
+        decode_binary_file. The statistics of a cached file are the ones of when it was decoded,
+        with "from_cache" set to True.
+    """
+    if cache_folder is None:
+        cache_folder = decode_cache_folder
+    if max_cache_size is None:
+        max_cache_size = decode_cache_max_size
+
+    Path(cache_folder).mkdir(parents=True, exist_ok=True)
+    index = read_decode_cache_index(cache_folder=cache_folder)
+    now = time.time()
+
+    blocks = [None] * len(file_list)
+    file_stats = {}
+    missing = []
+    for ii, file_name in enumerate(file_list):
+        key = os.path.abspath(file_name)
+        stat = os.stat(file_name)
+        file_stats[key] = stat
+        entry = index["files"].get(key)
+        if entry is not None and (
+            entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns
+        ):
+            # The file may have been touched or copied without changing it
+            if entry["size"] == stat.st_size and entry["hash"] == get_file_hash(file_name):
+                entry["mtime_ns"] = stat.st_mtime_ns
+            else:
+                entry = None
+        if entry is not None:
+            try:
+                base_name = str(Path(cache_folder) / entry["name"])
+                df_sci = read_l1a_npz(file_name=base_name + "_sci.npz")
+                blocks[ii] = (
+                    df_sci,
+                    read_l1a_npz(file_name=base_name + "_hk.npz"),
+                    # The file hasn't changed since it was decoded, so all of it was read
+                    {
+                        "n_bytes": entry["size"],
+                        **entry["stats"],
+                        "file_name": file_name,
+                        "from_cache": True,
+                    },
+                    read_window_histograms(file_name=base_name + "_hist.npz", df=df_sci),
+                )
+                entry["last_used"] = now
+                continue
+            except (OSError, ValueError, KeyError):
+                logger.warning(f"The cached data of {file_name} could not be read")
+        missing.append(ii)
 
-    y, v4_shift, v2_shift = compute_position(
-        v1=df["Channel4"], v2=df["Channel2"], n_bins=401, bin_min=0, bin_max=4
+    print(
+        f"\n Found \x1b[1;32;255m {len(file_list) - len(missing)} \x1b[0m of "
+        f"\x1b[1;32;255m {len(file_list)} \x1b[0m files in the decode cache."
     )
+    new_blocks = []
+    if missing:
+        new_blocks = decode_binary_files(
+            file_list=[file_list[ii] for ii in missing], use_mmap=use_mmap, n_workers=n_workers
+        )
 
-    # Correct for the non-linearity in the positions using lineat correction model
-    x_lin_slice, y_lin_slice = lin_correction(x_slice, y_slice)
-    x_lin, y_lin = lin_correction(x, y)
+    for ii, (df_sci, df_hk, stats, histograms) in zip(missing, new_blocks):
+        blocks[ii] = (df_sci, df_hk, stats, histograms)
+        key = os.path.abspath(file_list[ii])
+        name = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        base_name = str(Path(cache_folder) / name)
+        try:
+            save_l1a_npz(df=df_sci, save_file_name=base_name + "_sci.npz")
+            save_l1a_npz(df=df_hk, save_file_name=base_name + "_hk.npz")
+            if histograms is not None:
+                save_window_histograms(
+                    histograms=histograms, save_file_name=base_name + "_hist.npz"
+                )
+        except (OSError, TypeError) as e:
+            logger.warning(f"The decoded data of {file_list[ii]} could not be cached: {e}")
+            index["files"].pop(key, None)
+            continue
+        index["files"][key] = {
+            "name": name,
+            "size": file_stats[key].st_size,
+            "mtime_ns": file_stats[key].st_mtime_ns,
+            "hash": get_file_hash(file_list[ii]),
+            "cache_size": sum(
+                os.path.getsize(base_name + suffix)
+                for suffix in decode_cache_suffixes
+                if os.path.exists(base_name + suffix)
+            ),
+            "last_used": now,
+            "stats": stats,
+        }
+
+    # Remove the least recently used files until the cache fits in its maximum size
+    entries = sorted(index["files"].items(), key=lambda item: item[1]["last_used"])
+    cache_size = sum(entry["cache_size"] for _, entry in entries)
+    for key, entry in entries:
+        if cache_size <= max_cache_size:
+            break
+        for suffix in decode_cache_suffixes:
+            Path(cache_folder, entry["name"] + suffix).unlink(missing_ok=True)
+        cache_size -= entry["cache_size"]
+        del index["files"][key]
+        logger.info(f"Removed {key} from the decode cache")
 
-    # Get the x,y value in mcp units
-    x_mcp_slice, y_mcp_slice = volt_to_mcp(x_slice, y_slice)
-    x_mcp, y_mcp = volt_to_mcp(x, y)
-    x_mcp_lin_slice, y_mcp_lin_slice = volt_to_mcp(x_lin_slice, y_lin_slice)
-    x_mcp_lin, y_mcp_lin = volt_to_mcp(x_lin, y_lin)
+    with open(Path(cache_folder) / "index.json", "w") as file:
+        json.dump(index, file, indent=4)
 
-    # Correct for the non-linearity in the positions using non-linear correction model
-    # NOTE: The non-linear correction is only applied on the mcp coordinates after linear correction
-    # has been applied.
-    try:
-        x_mcp_nln_slice, y_mcp_nln_slice = non_lin_correction(x_mcp_lin_slice, y_mcp_lin_slice)
-    except Exception:
-        # Set theem to NaNs of the same length as x_mcp_slice
-        x_mcp_nln_slice = np.full(len(x_mcp_lin_slice), np.nan)
-        y_mcp_nln_slice = np.full(len(y_mcp_lin_slice), np.nan)
+    return blocks
 
-    try:
-        x_mcp_nln, y_mcp_nln = non_lin_correction(x_mcp_lin, y_mcp_lin)
-    except Exception:
-        # Set them to NaNs of the same length as x_mcp
-        x_mcp_nln = np.full(len(x_mcp_lin), np.nan)
-        y_mcp_nln = np.full(len(y_mcp_lin), np.nan)
 
-    # Get the x,y value in deg units
-    x_deg_slice, y_deg_slice = volt_to_deg(x_mcp_slice, y_mcp_slice)
-    x_deg, y_deg = volt_to_deg(x_mcp, y_mcp)
-    x_deg_lin_slice, y_deg_lin_slice = volt_to_deg(x_mcp_lin_slice, y_mcp_lin_slice)
-    x_deg_lin, y_deg_lin = volt_to_deg(x_mcp_lin, y_mcp_lin)
+# Folder of the file indices of the data folders. The version is increased whenever the content
+# of the index changes, so that the old indices are rebuilt.
+file_index_folder = "../cache/file_index"
+file_index_version = 2
 
-    # Add the x-coordinate to the dataframe
-    df_slice_sci["x_val"] = x_slice
-    df_slice_sci.loc[:, "x_val_lin"] = x_lin_slice
-    df_slice_sci.loc[:, "x_mcp"] = x_mcp_slice
-    df_slice_sci.loc[:, "x_mcp_lin"] = x_mcp_lin_slice
-    df_slice_sci.loc[:, "x_mcp_nln"] = x_mcp_nln_slice
-    df_slice_sci.loc[:, "x_deg"] = x_deg_slice
-    df_slice_sci.loc[:, "x_deg_lin"] = x_deg_lin_slice
-    df_slice_sci.loc[:, "v1_shift"] = v1_shift_slice
-    df_slice_sci.loc[:, "v3_shift"] = v3_shift_slice
 
-    df.loc[:, "x_val"] = x
-    df.loc[:, "x_val_lin"] = x_lin
-    df.loc[:, "x_mcp"] = x_mcp
-    df.loc[:, "x_mcp_lin"] = x_mcp_lin
-    df.loc[:, "x_mcp_nln"] = x_mcp_nln
-    df.loc[:, "x_deg"] = x_deg
-    df.loc[:, "x_deg_lin"] = x_deg_lin
-    df.loc[:, "v1_shift"] = v1_shift
-    df.loc[:, "v3_shift"] = v3_shift
-
-    # Add the y-coordinate to the dataframe
-    df_slice_sci.loc[:, "y_val"] = y_slice
-    df_slice_sci.loc[:, "y_val_lin"] = y_lin_slice
-    df_slice_sci.loc[:, "y_mcp"] = y_mcp_slice
-    df_slice_sci.loc[:, "y_mcp_lin"] = y_mcp_lin_slice
-    df_slice_sci.loc[:, "y_mcp_nln"] = y_mcp_nln_slice
-    df_slice_sci.loc[:, "y_deg"] = y_deg_slice
-    df_slice_sci.loc[:, "y_deg_lin"] = y_deg_lin_slice
-    df_slice_sci.loc[:, "v4_shift"] = v4_shift_slice
-    df_slice_sci.loc[:, "v2_shift"] = v2_shift_slice
+def get_file_start_time(file_name=None):
+    """
+    Gets the start time of a binary file from its name, e.g. 1716500403 for the file
+    "payload_lexi_1716500403_21928.dat".
 
-    df.loc[:, "y_val"] = y
-    df.loc[:, "y_val_lin"] = y_lin
-    df.loc[:, "y_mcp"] = y_mcp
-    df.loc[:, "y_mcp_lin"] = y_mcp_lin
-    df.loc[:, "y_mcp_nln"] = y_mcp_nln
-    df.loc[:, "y_deg"] = y_deg
-    df.loc[:, "y_deg_lin"] = y_deg_lin
-    df.loc[:, "v4_shift"] = v4_shift
-    df.loc[:, "v2_shift"] = v2_shift
+    Parameters
+    ----------
+    file_name : str
+        Name of the binary file. Default is None.
 
-    return df, df_slice_sci
+    Returns
+    -------
+    start_time : float
+        Start time of the file in unix seconds, or None if the name has no start time.
+    """
+    try:
+        return float(os.path.basename(file_name).split("_")[2])
+    except (IndexError, ValueError):
+        return None
 
 
-def read_csv_hk(file_val=None, t_start=None, t_end=None):
+def get_file_time_range(file_name=None, n_bytes=2**16):
     """
-    Reads a csv file and returns a pandas dataframe for the selected time range along with x and
-    y-coordinates.
+    Gets the first and the last PIT time stamps of a binary file. Only the PIT frames in the first
+    and the last n_bytes of the file are looked at, so the whole file doesn't have to be read. A
+    frame is only used if both its PIT and its LEXI sync words are where they should be, so that
+    bytes which happen to look like a PIT sync word aren't taken for a time stamp. Only the PIT
+    ("payload") files have PIT frames, the other files have no time stamps.
 
     Parameters
     ----------
-    file_val : str
-        Path to the input file. Default is None.
-    t_start : float
-        Start time of the data. Default is None.
-    t_end : float
-        End time of the data. Default is None.
+    file_name : str
+        Name of the binary file. Default is None.
+    n_bytes : int
+        Number of bytes read at the start and at the end of the file. Default is 2**16.
+
+    Returns
+    -------
+    first_time : float
+        First PIT time stamp of the file in unix seconds, or None if there isn't any.
+    last_time : float
+        Last PIT time stamp of the file in unix seconds, or None if there isn't any.
     """
+    if "payload" not in os.path.basename(file_name):
+        return None, None
+
+    file_size = os.path.getsize(file_name)
+    dates = []
+    with open(file_name, "rb") as file:
+        # The frames are laid out every 28 bytes from the start of the file
+        tail_start = max(file_size - n_bytes, 0) // 28 * 28
+        for start, stop in ((0, min(n_bytes, file_size)), (tail_start, file_size)):
+            file.seek(start)
+            raw = file.read(stop - start)
+            frames = np.frombuffer(raw, dtype=pit_frame_dtype, count=len(raw) // 28)
+            is_frame = (frames["sync_pit"] == sync_pit_word) & (frames["sync_lxi"] == sync_lxi_word)
+            Date = frames["Date"][is_frame].astype(float)
+            is_valid = (Date >= pd.Timestamp.min.timestamp()) & (Date <= pd.Timestamp.max.timestamp())
+            dates.append(Date[is_valid])
+    Date = np.concatenate(dates)
+    if len(Date) == 0:
+        return None, None
+
+    return float(Date.min()), float(Date.max())
+
+
+def update_file_index(folder_name=None, index_folder=None):
+    """
+    Updates the file index of a folder of binary files. The index has an entry for each file,
+    with its size and modification time, its start time from the file name and its first and last
+    PIT time stamps. The index is kept on the disk, and only the files which are new or have
+    changed since the last update are read.
 
-    global df_slice_hk
-    df = pd.read_csv(file_val, index_col=False)
+    Parameters
+    ----------
+    folder_name : str
+        Folder of the binary files. Default is None.
+    index_folder : str
+        Folder of the file indices. If None, file_index_folder is used. Default is None.
 
-    # Check all the keys and find out which one has the word "time" in it
-    for key in df.keys():
-        if "time" in key.lower():
-            time_col = key
-            break
-    # Rename the time column to TimeStamp
-    df.rename(columns={time_col: "TimeStamp"}, inplace=True)
+    Returns
+    -------
+    index : dict
+        The file index of the folder.
+    """
+    if index_folder is None:
+        index_folder = file_index_folder
 
-    # Convert the Date column from string to datetime in utc
+    folder_name = os.path.abspath(folder_name)
+    index_name = (
+        Path(index_folder) / f"{hashlib.blake2b(folder_name.encode(), digest_size=16).hexdigest()}.json"
+    )
     try:
-        df["Date"] = pd.to_datetime(df["Date"], utc=True)
-    except Exception:
-        # Convert timestamp to datetime and set it to Date
-        df["Date"] = pd.to_datetime(df["TimeStamp"], unit="s", utc=True)
-
-    # Set the index to the time column
-    df.set_index("Date", inplace=True)
-    # Sort the dataframe by timestamp
-    df = df.sort_index()
-
-    if t_start is None:
-        t_start = df.index.min()
-    if t_end is None:
-        t_end = df.index.max()
-
-    # Select dataframe from timestamp t_start to t_end
-    df_slice_hk = df.loc[t_start:t_end].copy()
+        with open(index_name, "r") as file:
+            index = json.load(file)
+    except (OSError, ValueError):
+        index = {}
+    if index.get("version") != file_index_version or index.get("folder") != folder_name:
+        index = {"version": file_index_version, "folder": folder_name, "files": {}}
+
+    files = {}
+    n_updated = 0
+    with os.scandir(folder_name) as entries:
+        for entry in entries:
+            if not entry.name.endswith((".dat", ".txt")) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            file_entry = index["files"].get(entry.name)
+            if (
+                file_entry is None
+                or file_entry["size"] != stat.st_size
+                or file_entry["mtime_ns"] != stat.st_mtime_ns
+            ):
+                first_time, last_time = get_file_time_range(file_name=entry.path)
+                file_entry = {
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "start": get_file_start_time(file_name=entry.name),
+                    "first": first_time,
+                    "last": last_time,
+                }
+                n_updated += 1
+            files[entry.name] = file_entry
+
+    if n_updated > 0 or len(files) != len(index["files"]):
+        index["files"] = files
+        Path(index_folder).mkdir(parents=True, exist_ok=True)
+        with open(index_name, "w") as file:
+            json.dump(index, file)
+        logger.info(f"Updated {n_updated} of {len(files)} files in the file index of {folder_name}")
+
+    return index
+
+
+def select_files(index=None, t_start_unix=None, t_end_unix=None, folder_name=None):
+    """
+    Selects the files of a file index which have data in a time range. A file is selected if the
+    time between its first and last PIT time stamps overlaps with the time range, so a file which
+    starts before t_start_unix and runs past it is selected too. The files are found with a binary
+    search on the first time stamps of the files, and on the running maximum of their last time
+    stamps.
 
-    return df, df_slice_hk
+    The start time from the file name is used for a file without PIT time stamps. A file without
+    any of them is always selected.
 
+    Parameters
+    ----------
+    index : dict
+        File index of the folder, see update_file_index. Default is None.
+    t_start_unix : float
+        Start of the time range in unix seconds. If None, all the files are selected. Default is
+        None.
+    t_end_unix : float
+        End of the time range in unix seconds. If None, all the files are selected. Default is
+        None.
+    folder_name : str
+        Folder put in front of the names of the files. If None, the folder of the index is used.
+        Default is None.
 
-def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=False):
+    Returns
+    -------
+    file_list : list
+        Names of the selected files, sorted by name.
+    """
+    if folder_name is None:
+        folder_name = index["folder"]
+
+    names = sorted(index["files"])
+    file_list = [os.path.join(folder_name, name) for name in names]
+    if t_start_unix is None or t_end_unix is None:
+        return file_list
+
+    entries = [index["files"][name] for name in names]
+    first_time = np.array(
+        [entry["start"] if entry["first"] is None else entry["first"] for entry in entries],
+        dtype=float,
+    )
+    last_time = np.array(
+        [entry["start"] if entry["last"] is None else entry["last"] for entry in entries],
+        dtype=float,
+    )
+    is_known = ~np.isnan(first_time)
+    known_idx = np.flatnonzero(is_known)
+
+    order = known_idx[np.argsort(first_time[known_idx], kind="stable")]
+    first_sorted = first_time[order]
+    last_sorted = last_time[order]
+    # The files before lo all end before t_start_unix, and the ones from hi on start after
+    # t_end_unix
+    lo = np.searchsorted(np.maximum.accumulate(last_sorted), t_start_unix, side="left")
+    hi = np.searchsorted(first_sorted, t_end_unix, side="right")
+    is_selected = ~is_known
+    is_selected[order[lo:hi][last_sorted[lo:hi] >= t_start_unix]] = True
+
+    return [file_list[ii] for ii in np.flatnonzero(is_selected)]
+
+
+def read_binary_file(
+    file_val=None,
+    t_start=None,
+    t_end=None,
+    multiple_files=False,
+    use_mmap=False,
+    save_l1a=True,
+    save_in_background=False,
+    n_workers=1,
+    use_cache=False,
+    l0_link=None,
+    archive_in_background=False,
+):
     """
     Reads the binary file using functions saved in the file "lxi_read_binary_data.py" and returns
     a pandas dataframe for the selected time range along with x and y-coordinates.
 
+    The decoded packets go straight into the dataframes, without going through the L1a csv files.
+    Saving the csv files is a separate step, which can be done in the background or skipped.
+
     Parameters
     ----------
     file_val : str
@@ -1413,6 +4866,27 @@ def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=Fal
         Start time of the data. Default is None.
     t_end : float
         End time of the data. Default is None.
+    multiple_files : bool
+        If True, all the files in the folder of file_val are read. Default is False.
+    use_mmap : bool
+        If True, the files are memory-mapped and decoded without copying them. Default is False.
+    save_l1a : bool
+        If True, the data is saved to the L1a csv files. Default is True.
+    save_in_background : bool
+        If True, the L1a csv files are saved in the background, see save_l1a_file. Default is
+        False.
+    n_workers : int
+        Number of processes decoding the files in parallel when multiple_files is True, see
+        decode_binary_files. Default is 1.
+    use_cache : bool
+        If True and multiple_files is True, the decoded files are kept in the decode cache and
+        only new or changed files are decoded, see decode_binary_files_cached. Default is False.
+    l0_link : str
+        How the files are put in the L0 folder when multiple_files is True: None to copy them,
+        "hardlink" or "reflink", see archive_l0_file. Default is None.
+    archive_in_background : bool
+        If True and multiple_files is True, the files are archived in the L0 folder by background
+        threads while they are decoded, see archive_l0_files. Default is False.
 
     Returns
     -------
@@ -1429,17 +4903,26 @@ def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=Fal
     file_name_sci : str
         The name of the Science file.
     """
+    global sci_histograms, loaded_file_sizes
 
+    histograms = None
     if multiple_files is False:
-        # Read the housekeeping data
-        df_hk, file_name_hk = read_binary_data_hk(
-            in_file_name=file_val, save_file_name=None, number_of_decimals=6
+        # Read the science and housekeeping packets from the file in one go
+        packets_sci, packets_hk, stats = read_binary_data(
+            in_file_name=file_val, use_mmap=use_mmap, return_stats=True
         )
+        record_decode_stats(stats_list=[stats])
+        loaded_file_sizes = {os.path.abspath(file_val): stats["n_bytes"]}
 
-        # Read the science data
-        df_sci, file_name_sci = read_binary_data_sci(
-            in_file_name=file_val, save_file_name=None, number_of_decimals=6
-        )
+        # Create the housekeeping and the science data
+        df_hk = create_df_hk(packets=packets_hk, in_file_name=file_val)
+        df_sci = create_df_sci(packets=packets_sci, in_file_name=file_val, number_of_decimals=6)
+        file_name_hk = get_l1a_file_name(in_file_name=file_val, data_type="hk")
+        file_name_sci = get_l1a_file_name(in_file_name=file_val, data_type="sci")
+
+        if save_l1a:
+            save_l1a_file(df=df_hk, save_file_name=file_name_hk, background=save_in_background)
+            save_l1a_file(df=df_sci, save_file_name=file_name_sci, background=save_in_background)
 
     else:
         # If only one of t_start and t_end is None, raise an error
@@ -1460,6 +4943,8 @@ def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=Fal
             t_start = None
             t_end = None
 
+        t_start_unix = None
+        t_end_unix = None
         if t_start is not None and t_end is not None:
             # Convert t_start and t_end from string to datetime in UTC timezone
             t_start = pd.to_datetime(t_start, utc=True)
@@ -1484,82 +4969,67 @@ def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=Fal
             print(f"\n \x1b[1;31;255m WARNING: {file_val} is not a directory. \x1b[0m")
             raise ValueError("file_val should be a directory.")
 
-        # Get the names of all the files in the directory with*.dat or *.txt extension
-        file_list = np.sort(
-            [
-                os.path.join(file_val, f)
-                for f in os.listdir(file_val)
-                if f.endswith((".dat", ".txt"))
-            ]
-        )
+        # Get the index of all the files in the directory with *.dat or *.txt extension
+        file_index = update_file_index(folder_name=file_val)
 
         # If file list is empty, raise an error and exit
-        if len(file_list) == 0:
+        if len(file_index["files"]) == 0:
             raise ValueError("No files found in the directory.")
         else:
             print(
-                f"Found total \x1b[1;32;255m {len(file_list)} \x1b[0m files in the directory."
+                f"Found total \x1b[1;32;255m {len(file_index['files'])} \x1b[0m files in the "
+                "directory."
             )
 
+        # Select only those files which have data in the time range
+        file_list = select_files(
+            index=file_index, t_start_unix=t_start_unix, t_end_unix=t_end_unix, folder_name=file_val
+        )
         if t_start_unix is not None and t_end_unix is not None:
-            # In file_list, select only those files which are within the time range
-            file_list = [
-                file_name
-                for file_name in file_list
-                if t_start_unix
-                <= float(os.path.basename(file_name).split("_")[2])
-                <= t_end_unix
-            ]
             print(
                 f"Found \x1b[1;32;255m {len(file_list)} \x1b[0m files in the time range "
                 f"\x1b[1;32;255m {t_start.strftime('%Y-%m-%d %H:%M:%S')} \x1b[0m to "
                 f"\x1b[1;32;255m {t_end.strftime('%Y-%m-%d %H:%M:%S')}\x1b[0m"
             )
 
-        # Loop through all the files
-        for file_name in file_list:
-            # Copy this file to another location called L0
-            if platform.system() == "Linux":
-                folder_name_list = file_name.split("/")[:-1]
-                folder_name = "/".join(folder_name_list[:-2]) + "/L0/" + folder_name_list[-1] + "/"
-                if not os.path.exists(folder_name):
-                    os.makedirs(folder_name)
-
-                # Copy the file to the L0 folder
-                shutil.copy2(file_name, folder_name)
-            elif platform.system() == "Windows":
-                folder_name_list = file_name.split("\\")[:-1]
-                folder_name = "\\".join(folder_name_list[:-2]) + "\\L0\\" + folder_name_list[-1] + "\\"
-                if not os.path.exists(folder_name):
-                    os.makedirs(folder_name)
-
-                # Copy the file to the L0 folder
-                shutil.copy2(file_name, folder_name)
-            elif platform.system() == "Darwin":
-                folder_name_list = file_name.split("/")[:-1]
-                folder_name = "/".join(folder_name_list[:-2]) + "/L0/" + folder_name_list[-1] + "/"
-                if not os.path.exists(folder_name):
-                    os.makedirs(folder_name)
-
-                # Copy the file to the L0 folder
-                shutil.copy2(file_name, folder_name)
-            else:
-                raise OSError("Operating system not supported.")
+        # Copy all the files to another location called L0
+        archive_l0_files(file_list=file_list, link=l0_link, background=archive_in_background)
 
-            # Print in cyan color that file number is being read from the directory conatining total
-            print(
-                f"\n Reading file \x1b[1;36;255m {file_list.index(file_name) + 1} \x1b[0m of "
-                f"total \x1b[1;36;255m {len(file_list)} \x1b[0m files."
+        # Decode all the files, in the order of file_list
+        if use_cache:
+            blocks = decode_binary_files_cached(
+                file_list=file_list, use_mmap=use_mmap, n_workers=n_workers
             )
-            # Read the housekeeping data
-            df_hk, file_name_hk = read_binary_data_hk(
-                in_file_name=file_name, save_file_name=None, number_of_decimals=6
+        else:
+            blocks = decode_binary_files(
+                file_list=file_list, use_mmap=use_mmap, n_workers=n_workers
             )
 
-            # Read the science data
-            df_sci, file_name_sci = read_binary_data_sci(
-                in_file_name=file_name, save_file_name=None, number_of_decimals=6
-            )
+        record_decode_stats(stats_list=[stats for _, _, stats, _ in blocks])
+        loaded_file_sizes = {
+            os.path.abspath(os.path.join(file_val, name)): file_entry["size"]
+            for name, file_entry in file_index["files"].items()
+        }
+        for file_name, (_, _, stats, _) in zip(file_list, blocks):
+            loaded_file_sizes[os.path.abspath(file_name)] = stats["n_bytes"]
+        histograms = merge_window_histograms(
+            histograms_list=[histograms for _, _, _, histograms in blocks]
+        )
+
+        for file_name, (df_sci, df_hk, stats, _) in zip(file_list, blocks):
+            file_name_hk = get_l1a_file_name(in_file_name=file_name, data_type="hk")
+            file_name_sci = get_l1a_file_name(in_file_name=file_name, data_type="sci")
+
+            # The L1a files of a file from the decode cache were saved when it was decoded, so
+            # they are only saved again if they are missing or older than the file
+            for df_l1a, l1a_file_name in ((df_hk, file_name_hk), (df_sci, file_name_sci)):
+                if save_l1a and not (
+                    stats.get("from_cache")
+                    and is_l1a_file_current(in_file_name=file_name, l1a_file_name=l1a_file_name)
+                ):
+                    save_l1a_file(
+                        df=df_l1a, save_file_name=l1a_file_name, background=save_in_background
+                    )
 
             # Append the dataframes to the list
             df_hk_list.append(df_hk)
@@ -1568,9 +5038,9 @@ def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=Fal
             df_sci_list.append(df_sci)
             file_name_sci_list.append(file_name_sci)
 
-        # Concatenate all the dataframes
-        df_hk = pd.concat(df_hk_list)
-        df_sci = pd.concat(df_sci_list)
+        # Merge the dataframes of all the files in the order of time
+        df_hk = merge_time_blocks(blocks=df_hk_list)
+        df_sci = merge_time_blocks(blocks=df_sci_list)
 
         # Set file_names_hk and file_names_sci to dates of first and last files
         save_dir = os.path.dirname(file_val)
@@ -1644,101 +5114,77 @@ def read_binary_file(file_val=None, t_start=None, t_end=None, multiple_files=Fal
             f"The Housekeeping File name =\x1b[1;32;255m {file_name_hk} \x1b[0m, \n"
             f"The Science File name =\x1b[1;32;255m{file_name_sci} \x1b[0m \n"
         )
-        # Save the dataframe to a csv file
-        df_hk.to_csv(file_name_hk, index=False)
-        df_sci.to_csv(file_name_sci, index=False)
+        if save_l1a:
+            # Save the dataframe to a csv file
+            save_l1a_file(df=df_hk, save_file_name=file_name_hk, background=save_in_background)
+            save_l1a_file(df=df_sci, save_file_name=file_name_sci, background=save_in_background)
 
-        print(
-            f"Saved the dataframes to csv files. \n"
-            f"The Housekeeping File name =\x1b[1;32;255m {file_name_hk} \x1b[0m,\n"
-            f"The Science File name =\x1b[1;32;255m{file_name_sci} \x1b[0m \n"
-        )
-    # Replace index with timestamp
-    df_hk.set_index("Date", inplace=True)
-    df_sci.set_index("Date", inplace=True)
+            print(
+                f"{'Saving' if save_in_background else 'Saved'} the dataframes to csv files. \n"
+                f"The Housekeeping File name =\x1b[1;32;255m {file_name_hk} \x1b[0m,\n"
+                f"The Science File name =\x1b[1;32;255m{file_name_sci} \x1b[0m \n"
+            )
 
-    # Sort the dataframe by timestamp
-    df_hk = df_hk.sort_index()
-    df_sci = df_sci.sort_index()
+    # The dataframes are used as they are in the L1a csv files. They may still be being saved, so
+    # they are not modified here.
+    df_hk_l1a = df_hk
+    df_sci_l1a = df_sci
 
+    # read_csv_sci and read_csv_hk sort the dataframes by time, so only the first and last times
+    # are needed here
     if t_start is None:
-        t_start = df_sci.index.min()
+        t_start = df_sci["Date"].min()
         print(f"t_start is None. Setting t_start = {t_start}")
     if t_end is None:
-        t_end = df_sci.index.max()
-
-    df_sci, df_slice_sci = read_csv_sci(
-        file_val=file_name_sci, t_start=t_start, t_end=t_end
-    )
+        t_end = df_sci["Date"].max()
 
     df_hk, df_slice_hk = read_csv_hk(
-        file_val=file_name_hk, t_start=t_start, t_end=t_end
-    )
-
-    # Select only those where "IsCommanded" is True
-    df_slice_sci = df_slice_sci[df_slice_sci["IsCommanded"] == False]
-    # df_sci = df_sci[df_sci["IsCommanded"] == False]
-
-    # Select only rows where all channels are greater than 0
-    df_slice_sci = df_slice_sci[
-        (df_slice_sci["Channel1"] > 0)
-        & (df_slice_sci["Channel2"] > 0)
-        & (df_slice_sci["Channel3"] > 0)
-        & (df_slice_sci["Channel4"] > 0)
-    ]
-    df_sci = df_sci[
-        (df_sci["Channel1"] > 0)
-        & (df_sci["Channel2"] > 0)
-        & (df_sci["Channel3"] > 0)
-        & (df_sci["Channel4"] > 0)
-    ]
-
-    # Select dataframe from timestamp t_start to t_end
-    df_slice_hk = df_slice_hk.loc[t_start:t_end].copy()
-    df_slice_sci = df_slice_sci.loc[t_start:t_end].copy()
-
-    # For both the sliced and entire dataframes, compute the x and y-coordinates and the
-    # shift in the voltages
-    x_slice, v1_shift_slice, v3_shift_slice = compute_position(
-        v1=df_slice_sci["Channel1"],
-        v2=df_slice_sci["Channel3"],
-        n_bins=401,
-        bin_min=0,
-        bin_max=4,
-    )
-
-    x, v1_shift, v3_shift = compute_position(
-        v1=df_sci["Channel1"], v2=df_sci["Channel3"], n_bins=401, bin_min=0, bin_max=4
+        file_val=file_name_hk, t_start=t_start, t_end=t_end, df=df_hk_l1a
     )
 
-    # Add the x-coordinate to the dataframe
-    df_slice_sci.loc[:, "x_val"] = x_slice
-    df_slice_sci.loc[:, "v1_shift"] = v1_shift_slice
-    df_slice_sci.loc[:, "v3_shift"] = v3_shift_slice
-
-    df_sci.loc[:, "x_val"] = x
-    df_sci.loc[:, "v1_shift"] = v1_shift
-    df_sci.loc[:, "v3_shift"] = v3_shift
-
-    y_slice, v4_shift_slice, v2_shift_slice = compute_position(
-        v1=df_slice_sci["Channel4"],
-        v2=df_slice_sci["Channel2"],
-        n_bins=401,
-        bin_min=0,
-        bin_max=4,
+    # Same as read_csv_sci, except that only the rows where all channels are greater than 0 are
+    # kept, and the commanded events are left out of the sliced dataframe. The x and
+    # y-coordinates and the shift in the voltages are computed once, for the entire dataframe.
+    df_sci = set_time_index(df=df_sci_l1a.reset_index(drop=True))
+    df_sci = df_sci.take(
+        np.flatnonzero(
+            (df_sci["Channel1"] > 0)
+            & (df_sci["Channel2"] > 0)
+            & (df_sci["Channel3"] > 0)
+            & (df_sci["Channel4"] > 0)
+        )
     )
+    t_start_sci, t_end_sci = get_time_bounds(df=df_sci, t_start=t_start, t_end=t_end)
+
+    # The histograms of the voltages, which their offsets are computed from, are kept for the
+    # time windows of each file. Those of the entire and the sliced dataframes are added up from
+    # them instead of binning the data again, and so are those which following the files starts
+    # from (see start_follow).
+    if histograms is None:
+        histograms = get_window_histograms(df=df_sci)
+    sci_histograms = histograms
+    if histograms is None:
+        counts = get_voltage_histograms(df=df_sci)
+        counts_slice = None
+    else:
+        counts = dict(zip(voltage_channels, histograms["counts"].sum(axis=(0, 1))))
+        counts_slice = get_range_histograms(
+            df=df_sci, histograms=histograms, t_start=t_start_sci, t_end=t_end_sci,
+            keep_commanded=False
+        )
 
-    y, v4_shift, v2_shift = compute_position(
-        v1=df_sci["Channel4"], v2=df_sci["Channel2"], n_bins=401, bin_min=0, bin_max=4
+    df_sci = add_positions(df=df_sci, counts=counts)
+    offsets = get_voltage_offsets(counts=counts)
+    if offset_rolling_length is not None and histograms is not None:
+        df_sci = add_rolling_offsets(df=df_sci, histograms=histograms)
+        offsets = None
+    df_slice_sci = get_sci_slice(
+        df=df_sci,
+        t_start=t_start_sci,
+        t_end=t_end_sci,
+        keep_commanded=False,
+        offsets=offsets,
+        counts=counts_slice,
     )
 
-    # Add the y-coordinate to the dataframe
-    df_slice_sci.loc[:, "y_val"] = y_slice
-    df_slice_sci.loc[:, "v4_shift"] = v4_shift_slice
-    df_slice_sci.loc[:, "v2_shift"] = v2_shift_slice
-
-    df_sci.loc[:, "y_val"] = y
-    df_sci.loc[:, "v4_shift"] = v4_shift
-    df_sci.loc[:, "v2_shift"] = v2_shift
-
     return df_slice_hk, file_name_hk, df_slice_sci, file_name_sci, df_hk, df_sci
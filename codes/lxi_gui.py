@@ -358,6 +358,58 @@ def load_and_copy_files():
     #     logger.exception(f"Exception occurred while refreshing the histogram plot: {e}")
     #     pass
 
+    # Follow the files again from where they were loaded
+    if follow_status_var.get():
+        toggle_follow()
+
+
+def follow_new_data():
+    """
+    This function is called every follow_interval milliseconds while the "Follow Files" checkbox
+    is checked. It appends the data written to the files since the last call to the loaded data
+    and refreshes the time series plots.
+    """
+    global follow_job
+    follow_job = None
+    if not follow_status_var.get():
+        return
+
+    try:
+        n_sci, n_hk = lxrf.follow_folder()
+        if n_sci > 0 or n_hk > 0:
+            refresh_ts_plot()
+    except Exception as e:
+        logger.exception(f"Exception occurred while following the files: {e}")
+
+    follow_job = root.after(follow_interval, follow_new_data)
+
+
+def toggle_follow():
+    """
+    This function is called when the "Follow Files" checkbox is clicked. It starts or stops
+    following the files in the folder, which must have been loaded with the "Load Files" button.
+    """
+    global follow_job
+    if follow_job is not None:
+        root.after_cancel(follow_job)
+        follow_job = None
+
+    if not follow_status_var.get():
+        lxrf.stop_follow()
+        return
+
+    # Same time range as the loaded data
+    start_time_new = datetime.datetime.strptime(start_time.get(), "%Y-%m-%d %H:%M:%S") - datetime.timedelta(minutes=5)
+    end_time_new = datetime.datetime.strptime(end_time.get(), "%Y-%m-%d %H:%M:%S") + datetime.timedelta(minutes=5)
+    try:
+        lxrf.start_follow(folder_name=folder_path.get(), t_start=start_time_new, t_end=end_time_new)
+    except Exception as e:
+        logger.exception(f"Exception occurred while starting to follow the files: {e}")
+        follow_status_var.set(False)
+        return
+
+    follow_job = root.after(follow_interval, follow_new_data)
+
 
 def update_time_entry(time_entry, time_entry_other):
     """
@@ -600,6 +652,28 @@ dark_mode_button = tk.Checkbutton(
 )
 dark_mode_button.grid(row=21, column=0, sticky="nsew", padx=5, pady=5)
 
+# Add a checkbox to follow the files in the folder while PIT is writing them. The new data is
+# added to the loaded data every follow_interval milliseconds.
+follow_interval = 5000
+follow_job = None
+follow_status_var = tk.BooleanVar()
+follow_status_var.set(False)
+follow_status = tk.Checkbutton(
+    sci_tab,
+    text="Follow Files",
+    variable=follow_status_var,
+    command=toggle_follow,
+    bg=bg_color,
+    fg=fg_color,
+    font=font_style,
+    relief="raised",
+    highlightthickness=5,
+    highlightcolor=bg_color,
+    selectcolor="#808080",
+    cursor="hand2",
+)
+follow_status.grid(row=21, column=1, sticky="nsew", padx=5, pady=5)
+
 sci_tab.configure(
     bg=bg_color, padx=5, pady=5, relief="raised", borderwidth=5, highlightthickness=5
 )
@@ -97,6 +97,67 @@ def print_time_details(file_type=None, start_time=None, end_time=None):
             pass
 
 
+def print_decode_stats(stats_list=None):
+    """
+    Prints the decoder statistics of the files in the data base in a nice tabular format: how many
+    frames of each file were read as they are, repaired or dropped, and how long it took to
+    decode it. See lxi_file_read_funcs.new_decode_stats.
+
+    Parameters
+    ----------
+    stats_list : list
+        The decoder statistics of each file. If None, the ones of the last load are used. Default
+        is None.
+
+    Returns
+    -------
+        None
+    """
+    if stats_list is None:
+        stats_list = global_variables.all_file_details.get("decode_stats", lxrf.decode_stats)
+
+    table = []
+    for stats in stats_list:
+        n_repaired = (
+            stats["n_repaired_slip"]
+            + stats["n_repaired_split_3"]
+            + stats["n_repaired_split_2"]
+            + stats["n_repaired_split_1"]
+        )
+        table.append(
+            [
+                str(stats["file_name"]).split("/")[-1],
+                stats["n_frames"],
+                stats["n_clean"],
+                f"{stats['n_repaired_slip']}/{stats['n_repaired_split_3']}/"
+                f"{stats['n_repaired_split_2']}/{stats['n_repaired_split_1']}",
+                n_repaired,
+                stats["n_skipped"],
+                stats["n_trailing_bytes"],
+                stats["decode_time"],
+            ]
+        )
+    print(
+        tabulate(
+            table,
+            headers=[
+                "File",
+                "Frames",
+                "Clean",
+                "Repaired (slip/3/2/1)",
+                "Repaired",
+                "Skipped",
+                "Trailing bytes",
+                "Decode time (s)",
+            ],
+            tablefmt="fancy_grid",
+            floatfmt=".3f",
+            numalign="center",
+        )
+    )
+    logger.info("Decoder statistics printed")
+
+
 def insert_file_name(file_load_entry=None, tk=None, file_name=None):
     """
     If a new file is loaded, then insert the file name into the entry box
@@ -143,7 +204,9 @@ def change_state(button=None):
             button.config(state="disabled")
 
 
-def load_folder(file_val=None, t_start=None, t_end=None, multiple_files=True):
+def load_folder(
+    file_val=None, t_start=None, t_end=None, multiple_files=True, n_workers=1, use_cache=True
+):
     """
     Load a folder of files
 
@@ -161,13 +224,26 @@ def load_folder(file_val=None, t_start=None, t_end=None, multiple_files=True):
     multiple_files : bool
         If True, then load multiple files. Default is True.
 
+    n_workers : int
+        Number of processes decoding the files in parallel. Default is 1.
+
+    use_cache : bool
+        If True, only the files which are new or have changed since the last load are decoded,
+        the others are taken from the decode cache. Default is True.
+
     Returns
     -------
         None
     """
     lxrf.open_file_b_multiple(
-        file_val=file_val, t_start=t_start, t_end=t_end, multiple_files=multiple_files
+        file_val=file_val,
+        t_start=t_start,
+        t_end=t_end,
+        multiple_files=multiple_files,
+        n_workers=n_workers,
+        use_cache=use_cache,
     )
+    print_decode_stats()
 
     return None
 
@@ -265,103 +341,140 @@ def file_name_update(file_name=None, file_type=None):
     return file_name
 
 
+# Calibration of the housekeeping values as lookup tables, one row per hk_id (0 to 15). They are
+# the only copy of the coefficients: the functions of each hk_id below (see hk_cal_value) and
+# hk_value_comp_array both use them. Each one is the linear conversion
+#     value = ((hk_value * multiplier + offset) * scale) / divisor
+# where the multiplier is the volts per count for the hk_ids flagged in hk_cal_uses_vpc, and 1
+# for the others (the counts are kept as they are). The columns of the offset, scale and divisor
+# tables are for LEXI unit 1 and unit 2.
+hk_cal_uses_vpc = np.array([True] * 10 + [False] * 4 + [True] * 2)
+hk_cal_offset = np.array(
+    [
+        [-2.73, -2.73],  # 0: PinPullerTemp
+        [-2.73, -2.73],  # 1: OpticsTemp
+        [-2.73, -2.73],  # 2: LEXIbaseTemp
+        [-2.73, -2.73],  # 3: HVsupplyTemp
+        [0.0, -1.129],  # 4: +5.2V_Imon
+        [0.0, 0.0],  # 5: +10V_Imon
+        [0.0178, -0.029],  # 6: +3.3V_Imon
+        [0.0, 0.0],  # 7: AnodeVoltMon
+        [0.00747, 0.00747],  # 8: +28V_Imon
+        [0.0, 0.0],  # 9: ADC_Ground
+        [0.0, 0.0],  # 10: Cmd_count
+        [0.0, 0.0],  # 11: Pinpuller_Armed
+        [0.0, 0.0],  # 12: Unused1
+        [0.0, 0.0],  # 13: Unused2
+        [0.0, 0.0],  # 14: HVmcpAuto
+        [0.0, 0.0],  # 15: HVmcpMan
+    ]
+)
+hk_cal_scale = np.array(
+    [[100.0, 100.0]] * 4
+    + [[1e3, 1e3], [1.0, 1.0], [1e3, 1e3], [1.0, 1.0], [1e3, 1e3]]
+    + [[1.0, 1.0]] * 7
+)
+hk_cal_divisor = np.array(
+    [[1.0, 1.0]] * 4
+    + [[18.0, 21.456], [1.0, 1.0], [9.131, 18.0], [1.0, 1.0], [17.94, 17.94]]
+    + [[1.0, 1.0]] * 7
+)
+
+
+def hk_cal_value(hk_id=None, vpc=None, hk_value=None, lxi_unit=None):
+    """
+    Converts a housekeeping value to physical units with the calibration tables.
+
+    Parameters
+    ----------
+    hk_id : int
+        The hk_id of the value. Default is None.
+    vpc : float
+        Volts per count of the digitization. Default is None.
+    hk_value : float
+        The raw housekeeping value. Default is None.
+    lxi_unit : int
+        The LEXI unit (1 or 2). Any other unit uses the calibration of unit 1. Default is None.
+
+    Returns
+    -------
+    value : float
+        The housekeeping value in physical units. The counts are returned as they are.
+    """
+    if not hk_cal_uses_vpc[hk_id]:
+        return hk_value
+    unit = 1 if lxi_unit == 2 else 0
+    return (
+        (hk_value * vpc + float(hk_cal_offset[hk_id, unit])) * float(hk_cal_scale[hk_id, unit])
+    ) / float(hk_cal_divisor[hk_id, unit])
+
+
 def PinPullerTemp_func(vpc, hk_value, lxi_unit):
-    PinPullerTemp = (hk_value * vpc - 2.73) * 100
-    return PinPullerTemp
+    return hk_cal_value(hk_id=0, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def OpticsTemp_func(vpc, hk_value, lxi_unit):
-    OpticsTemp = (hk_value * vpc - 2.73) * 100
-    return OpticsTemp
+    return hk_cal_value(hk_id=1, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def LEXIbaseTemp_func(vpc, hk_value, lxi_unit):
-    LEXIbaseTemp = (hk_value * vpc - 2.73) * 100
-    return LEXIbaseTemp
+    return hk_cal_value(hk_id=2, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def HVsupplyTemp_func(vpc, hk_value, lxi_unit):
-    HVsupplyTemp = (hk_value * vpc - 2.73) * 100
-    return HVsupplyTemp
+    return hk_cal_value(hk_id=3, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def V_Imon_5_2_func(vpc, hk_value, lxi_unit):
-    if lxi_unit == 1:
-        V_Imon_5_2 = (hk_value * vpc) * 1e3 / 18
-    elif lxi_unit == 2:
-        V_Imon_5_2 = (hk_value * vpc - 1.129) * 1e3 / 21.456
-    else:
-        V_Imon_5_2 = (hk_value * vpc) * 1e3 / 18
-    return V_Imon_5_2
+    return hk_cal_value(hk_id=4, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def V_Imon_10_func(vpc, hk_value, lxi_unit):
 
     # NOTE: The 10 V current monitor value unit is not quite true. The value is in volts but the conversion factor is missing.
-    V_Imon_10 = hk_value * vpc
-    return V_Imon_10
+    return hk_cal_value(hk_id=5, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def V_Imon_3_3_func(vpc, hk_value, lxi_unit):
-    if lxi_unit == 1:
-        V_Imon_3_3 = (hk_value * vpc + 0.0178) * 1e3 / 9.131
-    elif lxi_unit == 2:
-        V_Imon_3_3 = (hk_value * vpc - 0.029) * 1e3 / 18
-    else:
-        V_Imon_3_3 = (hk_value * vpc + 0.0178) * 1e3 / 9.131
-    return V_Imon_3_3
+    return hk_cal_value(hk_id=6, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def AnodeVoltMon_func(vpc, hk_value, lxi_unit):
     # NOTE: The anode voltage monitor value unit is not quite true. The value is in volts but the
     # conversion factor is missing.
-    AnodeVoltMon = hk_value * vpc
-    return AnodeVoltMon
+    return hk_cal_value(hk_id=7, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def V_Imon_28_func(vpc, hk_value, lxi_unit):
-    if lxi_unit == 1:
-        V_Imon_28 = (hk_value * vpc + 0.00747) * 1e3 / 17.94
-    elif lxi_unit == 2:
-        V_Imon_28 = (hk_value * vpc + 0.00747) * 1e3 / 17.94
-    else:
-        V_Imon_28 = (hk_value * vpc + 0.00747) * 1e3 / 17.94
-    return V_Imon_28
+    return hk_cal_value(hk_id=8, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def ADC_Ground_func(vpc, hk_value, ADC_Ground):
-    ADC_Ground = hk_value * vpc
-    return ADC_Ground
+    return hk_cal_value(hk_id=9, vpc=vpc, hk_value=hk_value, lxi_unit=ADC_Ground)
 
 
 def Cmd_count_func(vpc, hk_value, lxi_unit):
-    Cmd_count = hk_value
-    return Cmd_count
+    return hk_cal_value(hk_id=10, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def Pinpuller_Armed_func(vpc, hk_value, lxi_unit):
-    Pinpuller_Armed = hk_value
-    return Pinpuller_Armed
+    return hk_cal_value(hk_id=11, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def Unused1_func(vpc, hk_value, lxi_unit):
-    Unused1 = hk_value
-    return Unused1
+    return hk_cal_value(hk_id=12, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def Unused2_func(vpc, hk_value, lxi_unit):
-    Unused2 = hk_value
-    return Unused2
+    return hk_cal_value(hk_id=13, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def HVmcpAuto_func(vpc, hk_value, lxi_unit):
-    HVmcpAuto = hk_value * vpc
-    return HVmcpAuto
+    return hk_cal_value(hk_id=14, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def HVmcpMan_func(vpc, hk_value, lxi_unit):
-    HVmcpMan = hk_value * vpc
-    return HVmcpMan
+    return hk_cal_value(hk_id=15, vpc=vpc, hk_value=hk_value, lxi_unit=lxi_unit)
 
 
 def hk_value_comp(ii=None, vpc=None, hk_value=None, hk_id=None, lxi_unit=None):
@@ -389,6 +502,46 @@ def hk_value_comp(ii=None, vpc=None, hk_value=None, hk_id=None, lxi_unit=None):
     return chosen_func(vpc, hk_value, lxi_unit)
 
 
+def hk_value_comp_array(vpc=None, hk_value=None, hk_id=None, lxi_unit=None):
+    """
+    Converts an array of housekeeping values to physical units, all at once. The coefficients of
+    each value are looked up in the calibration tables by its hk_id, and the result is exactly the
+    same as hk_value_comp applied to each value.
+
+    Parameters
+    ----------
+    vpc : float
+        Volts per count of the digitization. Default is None.
+    hk_value : numpy.ndarray
+        The raw housekeeping values. Default is None.
+    hk_id : numpy.ndarray
+        The hk_id of each value. Default is None.
+    lxi_unit : int
+        The LEXI unit (1 or 2). Any other unit uses the calibration of unit 1. Default is None.
+
+    Raises
+    ------
+    ValueError :
+        If any of the hk_id is not between 0 and 15.
+
+    Returns
+    -------
+    value : numpy.ndarray
+        The housekeeping values in physical units.
+    """
+    hk_id = np.asarray(hk_id, dtype=np.int64)
+    if np.any((hk_id < 0) | (hk_id > 15)):
+        raise ValueError(f"No function found for hk_id {hk_id[(hk_id < 0) | (hk_id > 15)][0]}")
+
+    unit = 1 if lxi_unit == 2 else 0
+    multiplier = np.where(hk_cal_uses_vpc, vpc, 1.0)[hk_id]
+    # NOTE: No fused multiply-add here, so that the rounding is the same as in the functions
+    return (
+        (np.asarray(hk_value, dtype=np.float64) * multiplier + hk_cal_offset[hk_id, unit])
+        * hk_cal_scale[hk_id, unit]
+    ) / hk_cal_divisor[hk_id, unit]
+
+
 def save_csv():
     """
     The function, upon clicking the "Save CSV" button, saves the data in the csv file format in a
@@ -0,0 +1,420 @@
+import importlib
+import logging
+import os
+from pathlib import Path
+
+import lxi_file_read_funcs as lxrf
+import numpy as np
+
+importlib.reload(lxrf)
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+formatter = logging.Formatter("%(asctime)s:%(name)s:%(message)s")
+
+# Check if the log folder exists. If not, create it
+Path("../log").mkdir(parents=True, exist_ok=True)
+
+file_handler = logging.FileHandler("../log/lxi_synthetic_data.log")
+file_handler.setFormatter(formatter)
+
+logger.addHandler(file_handler)
+
+# Layout of the 12-byte PIT header of a frame, the first fields of lxrf.pit_frame_dtype
+pit_header_dtype = np.dtype([("sync_pit", ">u2"), ("Date", ">f8"), ("spare", ">u2")])
+
+# Value of the spare bytes of the PIT header, as in the PIT files
+pit_spare_word = 16
+
+# Typical 12-bit values of the housekeeping channels 0 to 11, taken from the sample datasets.
+# The flight software sends these channels one after the other.
+hk_typical_values = np.array([2677, 41, 2677, 2670, 1118, 2350, 173, 3182, 899, 0, 15, 0])
+
+# Voltages of the four channels when there is no event, in counts (see lxrf.volts_per_count)
+channel_baselines = np.array([15450, 15945, 16502, 16375])
+
+
+def generate_lexi_packets(
+    n_packets=None,
+    rng=None,
+    t_start=0.0,
+    event_rate=30.0,
+    hk_fraction=0.04,
+    commanded_fraction=0.04,
+    noise_fraction=0.3,
+    hk_id_start=0,
+):
+    """
+    Generates LEXI packets. The packets come at random times, with event_rate packets per second
+    on average. A fraction hk_fraction of them are housekeeping packets, which go through the
+    housekeeping channels 0 to 11 one after the other, and the others are science events. A
+    science event spreads its charge over the four channels depending on where it hit the MCP,
+    except for the noise events, which only have the baselines of the channels.
+
+    Parameters
+    ----------
+    n_packets : int
+        Number of packets. Default is None.
+    rng : numpy.random.Generator
+        The random number generator. Default is None.
+    t_start : float
+        Time of the start of the packets in seconds, from the start of the LEXI clock. Default is
+        0.0.
+    event_rate : float
+        Number of packets per second. Default is 30.0.
+    hk_fraction : float
+        Fraction of the packets which are housekeeping packets. Default is 0.04.
+    commanded_fraction : float
+        Fraction of the science packets which are commanded. Default is 0.04.
+    noise_fraction : float
+        Fraction of the science packets which are noise. Default is 0.3.
+    hk_id_start : int
+        The housekeeping channel of the first housekeeping packet. Default is 0.
+
+    Returns
+    -------
+    packets : numpy.ndarray
+        Structured array of the packets (dtype lxrf.lxi_packet_dtype).
+    times : numpy.ndarray
+        Time of each packet in seconds.
+    """
+    times = t_start + np.cumsum(rng.exponential(1 / event_rate, n_packets))
+    is_hk = rng.random(n_packets) < hk_fraction
+    is_commanded = ~is_hk & (rng.random(n_packets) < commanded_fraction)
+
+    # The LEXI clock counts milliseconds in the 30 lowest bits of the timestamp word
+    timestamp_word = (np.round(times * 1000).astype(np.int64) & 0x3FFFFFFF) | (
+        is_hk.astype(np.int64) << 31
+    ) | (is_commanded.astype(np.int64) << 30)
+
+    packets = np.zeros(n_packets, dtype=lxrf.lxi_packet_dtype)
+    packets["sync_lxi"] = lxrf.sync_lxi_word
+    packets["timestamp"] = timestamp_word
+
+    # Science events: the charge is split between channels 1 and 3 by the x position, and
+    # between channels 4 and 2 by the y position
+    n_sci = int((~is_hk).sum())
+    channels = channel_baselines + rng.normal(0, 3, (n_sci, 4))
+    radius = 0.35 * np.sqrt(rng.random(n_sci))
+    angle = 2 * np.pi * rng.random(n_sci)
+    x = 0.5 + radius * np.cos(angle)
+    y = 0.5 + radius * np.sin(angle)
+    charge = rng.uniform(15000, 34000, n_sci) * (rng.random(n_sci) >= noise_fraction)
+    channels[:, 0] += charge * (1 - x)
+    channels[:, 2] += charge * x
+    channels[:, 3] += charge * (1 - y)
+    channels[:, 1] += charge * y
+    channels = np.clip(np.round(channels), 0, 0xFFFF)
+    for ii, field in enumerate(("channel1", "channel2", "channel3", "channel4")):
+        packets[field][~is_hk] = channels[:, ii]
+
+    # Housekeeping packets: the channel and its 12-bit value, and the event counts since the
+    # last housekeeping packet
+    n_hk = int(is_hk.sum())
+    hk_id = (hk_id_start + np.arange(n_hk)) % len(hk_typical_values)
+    hk_value = np.clip(hk_typical_values[hk_id] + rng.integers(-2, 3, n_hk), 0, 0xFFF)
+    hk_value[hk_id >= 9] = hk_typical_values[hk_id[hk_id >= 9]]
+    packets["channel1"][is_hk] = (hk_id << 12) | hk_value
+    packets["channel2"][is_hk] = np.minimum(rng.poisson(1 / hk_fraction, n_hk), 0xFFFF)
+    packets["channel3"][is_hk] = rng.poisson(0.5, n_hk)
+
+    return packets, times
+
+
+def add_misalignments(packets=None, rng=None, slip_rate=0.0, split_rates=(0.0, 0.0, 0.0)):
+    """
+    Lays the packets out in 16-byte slots, one for each PIT frame, with some of them at the wrong
+    place in their slot, as the readers find them in the PIT files:
+    - A slipped packet starts 1 to 12 bytes into its slot and runs into the next slot.
+    - A split packet starts 13, 14 or 15 bytes into its slot, so that the first 3, 2 or 1 bytes
+      of sync_lxi are at the end of the slot and the rest at the start of the next slot.
+    The rest of the two slots of a misaligned packet is zeros.
+
+    Parameters
+    ----------
+    packets : numpy.ndarray
+        Structured array of the packets (dtype lxrf.lxi_packet_dtype). Default is None.
+    rng : numpy.random.Generator
+        The random number generator. Default is None.
+    slip_rate : float
+        Fraction of the packets which are slipped. Default is 0.0.
+    split_rates : tuple
+        Fractions of the packets with the first 3, 2 and 1 bytes of sync_lxi at the end of their
+        slot. Default is (0.0, 0.0, 0.0).
+
+    Returns
+    -------
+    slots : numpy.ndarray
+        The slots, as an array of bytes with 16 columns.
+    slot_packet : numpy.ndarray
+        Index of the packet each slot starts with, or belongs to.
+    n_misaligned : dict
+        Number of slipped packets ("n_slipped") and of split packets of each kind ("n_split_3",
+        "n_split_2" and "n_split_1").
+    """
+    n_packets = len(packets)
+    draw = rng.random(n_packets)
+    is_slipped = draw < slip_rate
+    shift = np.zeros(n_packets, dtype=np.int64)
+    shift[is_slipped] = rng.integers(1, 13, int(is_slipped.sum()))
+    n_misaligned = {"n_slipped": int(is_slipped.sum())}
+
+    # Each kind of split packet takes the next band of the draw, so the kinds don't overlap
+    rate_start = slip_rate
+    for n_bytes, split_rate in zip((3, 2, 1), split_rates):
+        is_split = (draw >= rate_start) & (draw < rate_start + split_rate)
+        shift[is_split] = 16 - n_bytes
+        n_misaligned[f"n_split_{n_bytes}"] = int(is_split.sum())
+        rate_start += split_rate
+
+    # A misaligned packet takes two slots
+    n_slots = 1 + (shift > 0)
+    slot_start = np.cumsum(n_slots) - n_slots
+    slots = np.zeros((int(n_slots.sum()), 16), dtype=np.uint8)
+    position = (16 * slot_start + shift)[:, None] + np.arange(16)
+    slots.reshape(-1)[position] = packets.view(np.uint8).reshape(n_packets, 16)
+    slot_packet = np.repeat(np.arange(n_packets), n_slots)
+
+    return slots, slot_packet, n_misaligned
+
+
+def write_pit_file(
+    file_name=None,
+    n_packets=None,
+    seed=0,
+    epoch=1716500400.0,
+    slip_rate=0.001,
+    split_rates=(0.0003, 0.0003, 0.0003),
+    chunk_size=2**20,
+    **kwargs,
+):
+    """
+    Writes a synthetic PIT file: the LEXI packets from generate_lexi_packets, each in a 28-byte
+    PIT frame with the PIT sync word and the time the PIT got the packet. The packets are
+    generated and written chunk_size at a time, so the file can be of any size. The file is the
+    same for the same seed.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the file. It should have "payload" in it, so that it's read as a PIT file.
+        Default is None.
+    n_packets : int
+        Number of packets. Default is None.
+    seed : int
+        Seed of the random number generator. Default is 0.
+    epoch : float
+        Unix time in seconds of the start of the file. Default is 1716500400.0.
+    slip_rate : float
+        Fraction of the packets which are slipped in their frame, see add_misalignments. Default
+        is 0.001.
+    split_rates : tuple
+        Fractions of the packets with the first 3, 2 and 1 bytes of sync_lxi at the end of the
+        previous frame, see add_misalignments. Default is (0.0003, 0.0003, 0.0003).
+    chunk_size : int
+        Number of packets generated at a time. Default is 2**20.
+    **kwargs :
+        Passed on to generate_lexi_packets, e.g. event_rate or hk_fraction.
+
+    Returns
+    -------
+    summary : dict
+        Number of packets of each kind, size of the file and time span of the packets.
+    """
+    rng = np.random.default_rng(seed)
+    summary = {
+        "n_packets": 0,
+        "n_sci": 0,
+        "n_hk": 0,
+        "n_slipped": 0,
+        "n_split_3": 0,
+        "n_split_2": 0,
+        "n_split_1": 0,
+    }
+    t_start = kwargs.pop("t_start", 0.0)
+    hk_id_start = kwargs.pop("hk_id_start", 0)
+
+    Path(file_name).parent.mkdir(parents=True, exist_ok=True)
+    with open(file_name, "wb") as file:
+        for chunk_start in range(0, n_packets, chunk_size):
+            n_chunk = min(chunk_size, n_packets - chunk_start)
+            packets, times = generate_lexi_packets(
+                n_packets=n_chunk, rng=rng, t_start=t_start, hk_id_start=hk_id_start, **kwargs
+            )
+            slots, slot_packet, n_misaligned = add_misalignments(
+                packets=packets, rng=rng, slip_rate=slip_rate, split_rates=split_rates
+            )
+
+            header = np.zeros(len(slots), dtype=pit_header_dtype)
+            header["sync_pit"] = lxrf.sync_pit_word
+            header["Date"] = epoch + times[slot_packet]
+            header["spare"] = pit_spare_word
+
+            frames = np.empty((len(slots), 28), dtype=np.uint8)
+            frames[:, :12] = header.view(np.uint8).reshape(-1, 12)
+            frames[:, 12:] = slots
+            frames.tofile(file)
+
+            is_hk = (packets["timestamp"] & 0x80000000) != 0
+            summary["n_packets"] += n_chunk
+            summary["n_hk"] += int(is_hk.sum())
+            summary["n_sci"] += int((~is_hk).sum())
+            for counter, count in n_misaligned.items():
+                summary[counter] += count
+            t_start = times[-1]
+            hk_id_start += int(is_hk.sum())
+
+    summary["n_bytes"] = os.path.getsize(file_name)
+    summary["duration"] = t_start
+    logger.info(f"Wrote the synthetic PIT file {file_name}: {summary}")
+    return summary
+
+
+def write_gsfc_file(
+    file_name=None, n_packets=None, seed=0, gap_rate=0.01, chunk_size=2**20, **kwargs
+):
+    """
+    Writes a synthetic GSFC file: the LEXI packets from generate_lexi_packets one after the
+    other, without PIT frames. A fraction gap_rate of the packets have 1 to 19 zero bytes before
+    them, as in the GSFC files. The file is the same for the same seed.
+
+    Parameters
+    ----------
+    file_name : str
+        Name of the file. It shouldn't have "payload" in it, so that it's read as a GSFC file.
+        Default is None.
+    n_packets : int
+        Number of packets. Default is None.
+    seed : int
+        Seed of the random number generator. Default is 0.
+    gap_rate : float
+        Fraction of the packets which have a gap before them. Default is 0.01.
+    chunk_size : int
+        Number of packets generated at a time. Default is 2**20.
+    **kwargs :
+        Passed on to generate_lexi_packets, e.g. event_rate or hk_fraction.
+
+    Returns
+    -------
+    summary : dict
+        Number of packets of each kind, size of the file and time span of the packets.
+    """
+    rng = np.random.default_rng(seed)
+    summary = {"n_packets": 0, "n_sci": 0, "n_hk": 0, "n_gaps": 0}
+    t_start = kwargs.pop("t_start", 0.0)
+    hk_id_start = kwargs.pop("hk_id_start", 0)
+
+    Path(file_name).parent.mkdir(parents=True, exist_ok=True)
+    with open(file_name, "wb") as file:
+        for chunk_start in range(0, n_packets, chunk_size):
+            n_chunk = min(chunk_size, n_packets - chunk_start)
+            packets, times = generate_lexi_packets(
+                n_packets=n_chunk, rng=rng, t_start=t_start, hk_id_start=hk_id_start, **kwargs
+            )
+            gap = rng.integers(1, 20, n_chunk) * (rng.random(n_chunk) < gap_rate)
+            packet_start = np.cumsum(16 + gap) - 16
+            data = np.zeros(int(packet_start[-1]) + 16, dtype=np.uint8)
+            data[packet_start[:, None] + np.arange(16)] = packets.view(np.uint8).reshape(-1, 16)
+            data.tofile(file)
+
+            is_hk = (packets["timestamp"] & 0x80000000) != 0
+            summary["n_packets"] += n_chunk
+            summary["n_hk"] += int(is_hk.sum())
+            summary["n_sci"] += int((~is_hk).sum())
+            summary["n_gaps"] += int((gap > 0).sum())
+            t_start = times[-1]
+            hk_id_start += int(is_hk.sum())
+
+    summary["n_bytes"] = os.path.getsize(file_name)
+    summary["duration"] = t_start
+    logger.info(f"Wrote the synthetic GSFC file {file_name}: {summary}")
+    return summary
+
+
+def write_synthetic_folder(
+    folder_name=None,
+    n_files=1,
+    n_packets=None,
+    seed=0,
+    epoch=1716500400.0,
+    gsfc=False,
+    **kwargs,
+):
+    """
+    Writes a folder of synthetic files, one after the other in time, named like the PIT files
+    ("payload_lexi_<epoch>_<n>.dat", with the start time of the file and its number) or, if gsfc
+    is True, like the GSFC files ("gsfc_synthetic_<epoch>_<n>_unit1.dat"). Each file has its own
+    seed, derived from seed, so the folder is the same for the same seed.
+
+    Parameters
+    ----------
+    folder_name : str
+        The folder. Default is None.
+    n_files : int
+        Number of files. Default is 1.
+    n_packets : int
+        Number of packets in each file. Default is None.
+    seed : int
+        Seed of the random number generator. Default is 0.
+    epoch : float
+        Unix time in seconds of the start of the first file. Default is 1716500400.0.
+    gsfc : bool
+        If True, the files are GSFC files, else PIT files. Default is False.
+    **kwargs :
+        Passed on to write_pit_file or write_gsfc_file.
+
+    Returns
+    -------
+    file_list : list
+        Names of the files.
+    summaries : list
+        Summary of each file, see write_pit_file and write_gsfc_file.
+    """
+    file_list = []
+    summaries = []
+    t_start = 0.0
+    for file_number, file_seed in enumerate(np.random.SeedSequence(seed).generate_state(n_files)):
+        file_epoch = int(epoch + t_start)
+        if gsfc:
+            file_name = os.path.join(folder_name, f"gsfc_synthetic_{file_epoch}_{file_number}_unit1.dat")
+            summary = write_gsfc_file(
+                file_name=file_name,
+                n_packets=n_packets,
+                seed=int(file_seed),
+                t_start=t_start,
+                **kwargs,
+            )
+        else:
+            file_name = os.path.join(folder_name, f"payload_lexi_{file_epoch}_{file_number}.dat")
+            summary = write_pit_file(
+                file_name=file_name,
+                n_packets=n_packets,
+                seed=int(file_seed),
+                epoch=epoch,
+                t_start=t_start,
+                **kwargs,
+            )
+        t_start = summary["duration"]
+        file_list.append(file_name)
+        summaries.append(summary)
+
+    print(
+        f"\n Wrote \x1b[1;32;255m {n_files} \x1b[0m synthetic files to "
+        f"\x1b[1;32;255m {folder_name} \x1b[0m"
+    )
+    return file_list, summaries
+
+
+if __name__ == "__main__":
+    # Four PIT files of about 28 MB each, with about one in 500 packets misaligned
+    file_list, summaries = write_synthetic_folder(
+        folder_name="../data/synthetic/raw/synthetic_datasets/",
+        n_files=4,
+        n_packets=2**20,
+        seed=42,
+        slip_rate=0.001,
+        split_rates=(0.0003, 0.0003, 0.0003),
+    )
+    for file_name, summary in zip(file_list, summaries):
+        print(file_name, summary)